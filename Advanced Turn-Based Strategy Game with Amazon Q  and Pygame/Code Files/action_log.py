@@ -0,0 +1,64 @@
+import json
+from save_load import write_atomic
+
+LOG_VERSION = 1
+CHECKPOINT_INTERVAL = 5  # Turns between checkpoints
+MATCH_LOG_FILE = "last_match.log"
+
+class ActionLog:
+    """Append-only record of every action that changed a match.
+
+    Starts from a snapshot of the engine (and its random streams), then
+    holds one record per move, attack, ability, item, spawn and end of turn,
+    naming units by uid. Checkpoints taken every few turns let a replay
+    jump close to any turn instead of starting from the beginning.
+    """
+
+    def __init__(self, seed, start_state, rng_state, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.seed = seed
+        self.start_state = start_state
+        self.rng_state = rng_state
+        self.checkpoint_interval = checkpoint_interval
+        self.records = []
+        self.checkpoints = []  # {"turn", "index", "state", "rng_state"}, in turn order
+
+    def append(self, turn, player, action, **data):
+        data.update(turn=turn, player=player, action=action)
+        self.records.append(data)
+
+    def add_checkpoint(self, turn, state, rng_state):
+        """Remember the engine state reached after the records logged so far"""
+        self.checkpoints.append({"turn": turn, "index": len(self.records), "state": state, "rng_state": rng_state})
+
+    def wants_checkpoint(self, turn):
+        return turn % self.checkpoint_interval == 0
+
+    def save(self, filename=MATCH_LOG_FILE):
+        """Write the log as JSON lines: a header, the records, then the checkpoints"""
+        header = {
+            "version": LOG_VERSION,
+            "seed": self.seed,
+            "start_state": self.start_state,
+            "rng_state": self.rng_state,
+            "checkpoint_interval": self.checkpoint_interval
+        }
+        lines = [json.dumps(header)]
+        lines.extend(json.dumps(record) for record in self.records)
+        lines.extend(json.dumps({"checkpoint": checkpoint}) for checkpoint in self.checkpoints)
+        write_atomic(filename, ("\n".join(lines) + "\n").encode("utf-8"))
+
+    @classmethod
+    def load(cls, filename=MATCH_LOG_FILE):
+        with open(filename, 'r') as f:
+            header = json.loads(f.readline())
+            if header["version"] > LOG_VERSION:
+                raise ValueError(f"Action log version {header['version']} is newer than this game supports")
+
+            log = cls(header["seed"], header["start_state"], header["rng_state"], header["checkpoint_interval"])
+            for line in f:
+                entry = json.loads(line)
+                if "checkpoint" in entry:
+                    log.checkpoints.append(entry["checkpoint"])
+                else:
+                    log.records.append(entry)
+        return log
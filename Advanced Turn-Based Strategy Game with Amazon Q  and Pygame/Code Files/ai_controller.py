@@ -1,7 +1,13 @@
 import random
+import time
 from enum import Enum
 import math
+import numpy as np
 from abilities import AbilityType, Ability
+from effects import EffectType
+from ai_fields import TurnFields
+from assignment import solve_assignment
+from influence import InfluenceMap
 
 class AIStrategy(Enum):
     AGGRESSIVE = 1    # Focus on attacking player units
@@ -9,20 +15,62 @@ class AIStrategy(Enum):
     BALANCED = 3      # Balance between attack and defense
     ABILITY_FOCUSED = 4  # Prioritize using abilities
 
+# Wall-clock seconds the AI gets to plan a turn in the game
+AI_TIME_BUDGET = 0.2
+
+# Costs in the joint move assignment: staying put loses to any real move, and
+# a tile outside a unit's options is never chosen
+STAY_COST = 1e6
+FORBIDDEN_COST = 1e9
+
+class LatencyStats:
+    """Planning time of every AI turn, and whether the time budget cut it short"""
+    
+    def __init__(self):
+        self.latencies = []
+        self.bound = []
+    
+    def record(self, elapsed, bound):
+        self.latencies.append(elapsed)
+        self.bound.append(bound)
+    
+    def summary(self):
+        """Turn count, mean/95th percentile/max latency in milliseconds, and how often the budget bound"""
+        if not self.latencies:
+            return {"turns": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "bound_rate": 0.0}
+        ordered = sorted(self.latencies)
+        return {
+            "turns": len(ordered),
+            "mean_ms": 1000 * sum(ordered) / len(ordered),
+            "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+            "max_ms": 1000 * ordered[-1],
+            "bound_rate": sum(self.bound) / len(self.bound)
+        }
+
 class AIController:
-    def __init__(self, difficulty=1):
+    def __init__(self, difficulty=1, player=1, rng=None, time_budget=None):
         """
         Initialize the AI controller with a difficulty level
         difficulty: 1 (Easy), 2 (Medium), 3 (Hard)
+        player: the side this controller plays (1 for the regular AI opponent)
+        rng: random.Random to draw from, e.g. engine.rng.stream("ai1") (default: the global random module)
+        time_budget: wall-clock seconds to plan a turn in, or None to always finish the plan
         """
         self.difficulty = difficulty
+        self.player = player
+        self.rng = rng if rng is not None else random
+        self.time_budget = time_budget
+        self.deadline = None
+        self.budget_bound = False  # Whether the budget ran out during the last turn
+        self.cancelled = False
+        self.latency = LatencyStats()
         # Set strategy based on difficulty
         if difficulty == 1:
             self.strategy = AIStrategy.BALANCED
         elif difficulty == 2:
-            self.strategy = random.choice([AIStrategy.AGGRESSIVE, AIStrategy.DEFENSIVE])
+            self.strategy = self.rng.choice([AIStrategy.AGGRESSIVE, AIStrategy.DEFENSIVE])
         else:
-            self.strategy = random.choice([AIStrategy.AGGRESSIVE, AIStrategy.DEFENSIVE, AIStrategy.ABILITY_FOCUSED])
+            self.strategy = self.rng.choice([AIStrategy.AGGRESSIVE, AIStrategy.DEFENSIVE, AIStrategy.ABILITY_FOCUSED])
         
         # AI decision weights (adjusted by difficulty)
         self.weights = {
@@ -35,20 +83,183 @@ class AIController:
             "group_cohesion": 0.3 + (difficulty * 0.2)  # Tendency to keep units together
         }
         
-        # Cache for pathfinding and threat calculations
-        self.path_cache = {}
+        # Size of the random factor added to scores to avoid predictability
+        self.noise = 5
+        
+        # Threat and reachable tiles of units, keyed by uid. Once the controller
+        # watches an engine these are kept for the whole match and board events
+        # drop only the entries they affect; otherwise they are cleared every turn.
         self.threat_cache = {}
+        self.reach_cache = {}  # uid -> ((x, y, move range), reachable tiles)
+        self.changes = []  # (event, uid, tiles changed) since the last planned turn
+        self.watching = False
+        
+        # Per-side coverage and threat grids, patched for the units that changed since the last turn
+        self.influence = None
+        self.stale_units = set()  # uids to re-stamp into the influence map
         
+        # Occupancy index of the board being played, set for each turn
+        self.board = None
+        
+        # (units, enemies, allies) of the unit list being planned, so it is only split once per turn
+        self.sides = None
+        
+        # Threat and distance grids precomputed at the start of each turn
+        self.fields = None
+        
+    def start_clock(self):
+        """Start timing a turn against the time budget"""
+        self.turn_start = time.perf_counter()
+        self.deadline = self.turn_start + self.time_budget if self.time_budget is not None else None
+        self.budget_bound = False
+    
+    def out_of_time(self):
+        """Whether the turn's time budget has run out, or planning was cancelled"""
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.budget_bound = True
+        return self.budget_bound or self.cancelled
+    
+    def cancel(self):
+        """Make planning (possibly on another thread) wrap up as soon as possible"""
+        self.cancelled = True
+    
     def reset_caches(self):
         """Reset the caches when the game state changes significantly"""
-        self.path_cache = {}
         self.threat_cache = {}
+        self.reach_cache = {}
+        self.influence = None
+        self.stale_units = set()
+    
+    def watch(self, engine):
+        """Keep caches across turns, updated from the engine's board events"""
+        engine.add_listener(self.handle_engine_event)
+        self.watching = True
+    
+    def handle_engine_event(self, event, data):
+        """Note a board change; the caches are updated when the next turn is planned"""
+        unit = data.get("unit")
+        if event == "unit_moved":
+            self.changes.append((event, unit.uid, [data["from"], (unit.x, unit.y)]))
+        elif event in ("unit_died", "spawn"):
+            self.changes.append((event, unit.uid, [(unit.x, unit.y)]))
+        elif event in ("hp_changed", "unit_changed"):
+            self.changes.append((event, unit.uid, []))
+        elif event == "board_reset":
+            self.changes.append((event, None, []))
+    
+    def apply_changes(self):
+        """Drop the cache entries made stale by the board events since the last turn"""
+        changes, self.changes = self.changes, []
+        tiles = []
+        for event, uid, changed_tiles in changes:
+            if event == "board_reset":
+                self.reset_caches()
+                tiles = []
+                continue
+            if event != "unit_moved":
+                self.threat_cache.pop(uid, None)
+            self.stale_units.add(uid)
+            tiles.extend(changed_tiles)
+        
+        # Reachable tiles only depend on the tiles within the unit's move range
+        for uid, ((x, y, move_range), _) in list(self.reach_cache.items()):
+            if any(abs(x - tile_x) + abs(y - tile_y) <= move_range for tile_x, tile_y in tiles):
+                del self.reach_cache[uid]
+    
+    def update_influence(self, units, grid_width, grid_height):
+        """Bring the influence map up to date: re-stamp changed units, or build it if there is none"""
+        if self.influence is None or (self.influence.width, self.influence.height) != (grid_width, grid_height):
+            self.influence = InfluenceMap(grid_width, grid_height)
+            self.influence.rebuild(units, self.calculate_unit_threat)
+        elif self.stale_units:
+            units_by_uid = {unit.uid: unit for unit in units}
+            for uid in self.stale_units:
+                unit = units_by_uid.get(uid)
+                if unit is None:
+                    self.influence.remove(uid)
+                else:
+                    self.influence.update_unit(unit, self.calculate_unit_threat(unit))
+        self.stale_units = set()
+    
+    def threat_around(self, unit, units=()):
+        """Summed threat of the enemies that could move and attack a unit this turn"""
+        if self.influence is not None:
+            return float(self.influence.danger[1 - self.player][unit.y, unit.x])
+        
+        threat_level = 0
+        for other in units:
+            if other.player != self.player:
+                distance = abs(unit.x - other.x) + abs(unit.y - other.y)
+                if distance <= other.attack_range + other.move_range:
+                    threat_level += self.calculate_unit_threat(other)
+        return threat_level
+    
+    def area_target_count(self, center, units=()):
+        """Number of enemies an area attack centred on a unit would hit (itself included)"""
+        if self.influence is not None:
+            return int(self.influence.presence[center.player][center.y, center.x])
+        return sum(1 for other in units
+                   if other.player == center.player and abs(center.x - other.x) + abs(center.y - other.y) <= 1)
+    
+    def split_sides(self, units):
+        """Enemy and own units of a unit list"""
+        if self.sides is not None and self.sides[0] is units:
+            return self.sides[1], self.sides[2]
+        return ([u for u in units if u.player != self.player],
+                [u for u in units if u.player == self.player])
+    
+    def enemies_within(self, unit, player_units, radius):
+        """Enemies within a distance of a unit, in list order.
+        
+        On a large board it is quicker to look at the tiles around the unit
+        than at every enemy; units are listed in uid order, so sorting by uid
+        keeps the list order.
+        """
+        if self.board is None or (2 * radius + 1) ** 2 >= len(player_units):
+            return [u for u in player_units if abs(unit.x - u.x) + abs(unit.y - u.y) <= radius]
+        
+        found = []
+        for dy in range(-radius, radius + 1):
+            span = radius - abs(dy)
+            for dx in range(-span, span + 1):
+                other = self.board.unit_at(unit.x + dx, unit.y + dy)
+                if other is not None and other.player != self.player:
+                    found.append(other)
+        found.sort(key=lambda u: u.uid)
+        return found
+    
+    def get_reachable_tiles(self, unit):
+        """Tiles a unit can move to on self.board, from the cache while nothing nearby changed"""
+        move_range = unit.get_stat_with_effects("move_range")
+        key = (unit.x, unit.y, move_range)
+        entry = self.reach_cache.get(unit.uid)
+        if entry is None or entry[0] != key:
+            entry = (key, self.board.reachable_tiles(unit, move_range))
+            if unit.uid is not None:
+                self.reach_cache[unit.uid] = entry
+        return entry[1]
+    
+    def calculate_store_threats(self, store, rows):
+        """Threat of many UnitStore rows at once (same rules as calculate_unit_threat)"""
+        threat = store.attack[rows] * 1.0
+        threat *= 0.5 + (0.5 * store.hp[rows] / store.max_hp[rows])
+        threat *= 1.0 + (store.attack_range[rows] * 0.2)
+        threat *= 1.0 + (store.move_range[rows] * 0.1)
+        
+        # Adjust for ability availability
+        ability = store.ability[rows]
+        ability_factor = np.select(
+            [ability == AbilityType.AREA_ATTACK.value, ability == AbilityType.DOUBLE_ATTACK.value,
+             ability == AbilityType.TELEPORT.value],
+            [1.5, 1.4, 1.3], 1.2)
+        ready = (store.ability_cooldown[rows] == 0) & ~store.ability_used[rows]
+        return threat * np.where(ready, ability_factor, 1.0)
     
     def calculate_unit_threat(self, unit):
         """Calculate how threatening a unit is based on its stats and abilities"""
-        # Cache check
-        cache_key = f"{unit.unit_type.name}_{unit.hp}_{unit.attack}_{unit.ability_cooldown}"
-        if cache_key in self.threat_cache:
+        # Only units on the engine's board report their changes; UnitStore rows are never cached
+        cache_key = unit.uid if self.board is not None else None
+        if cache_key is not None and cache_key in self.threat_cache:
             return self.threat_cache[cache_key]
             
         # Base threat is attack power
@@ -77,19 +288,103 @@ class AIController:
                 threat *= 1.2  # Other abilities are moderately threatening
         
         # Cache the result
-        self.threat_cache[cache_key] = threat
+        if cache_key is not None:
+            self.threat_cache[cache_key] = threat
         return threat
     
     def find_best_move(self, unit, units, obstacles, grid_width, grid_height):
         """Find the best move for a unit based on the current game state"""
-        player_units = [u for u in units if u.player == 0]
-        ai_units = [u for u in units if u.player == 1]
+        options = self.find_move_options(unit, units, obstacles, grid_width, grid_height)
+        if options is None:
+            return None
+        return self.pick_move(*options)
+    
+    def find_move_options(self, unit, units, obstacles, grid_width, grid_height):
+        """Tiles a unit could move to and the score of each, or None if it has nowhere to go"""
+        player_units, ai_units = self.split_sides(units)
         
         # If no player units, no need to move
         if not player_units:
             return None
             
-        # Get all possible moves
+        # Get all possible moves, following real paths around obstacles when
+        # the board is available
+        if self.board is not None:
+            possible_moves = list(self.get_reachable_tiles(unit))
+        else:
+            possible_moves = self.get_move_diamond(unit, units, obstacles, grid_width, grid_height)
+        
+        if not possible_moves:
+            return None
+            
+        # Score all moves at once with array lookups when the turn fields are ready
+        if self.fields is not None:
+            return possible_moves, self.score_moves(unit, possible_moves)
+        
+        # Score each move
+        scores = [self.evaluate_move(unit, move_x, move_y, player_units, ai_units, obstacles, grid_width, grid_height)
+                  for move_x, move_y in possible_moves]
+        return possible_moves, np.array(scores, dtype=float)
+    
+    def pick_move(self, moves, scores):
+        """Pick the best scored move, or one of the top 3 now and then on easy"""
+        if self.difficulty == 1 and self.rng.random() < 0.3:
+            top_n = min(3, len(moves))
+            top_moves = np.argsort(-scores, kind="stable")[:top_n]
+            return moves[top_moves[self.rng.randint(0, top_n-1)]]
+        
+        return moves[int(np.argmax(scores))]
+    
+    def assign_moves(self, move_options, reserved=()):
+        """Give every unit a different destination, maximizing the summed move score.
+        
+        move_options: (unit, candidate tiles, scores) for each unit that may move
+        reserved: tiles nobody may move to, e.g. teleport destinations
+        Units that only had tiles better used by others stay put. Returns {unit: (x, y)}.
+        """
+        # Units only compete with units sharing a candidate tile, so each such group is solved on its own
+        group_of_tile = {}
+        parent = list(range(len(move_options)))
+        
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+        
+        for index, (_, moves, _) in enumerate(move_options):
+            for tile in moves:
+                if tile in group_of_tile:
+                    parent[find(index)] = find(group_of_tile[tile])
+                else:
+                    group_of_tile[tile] = index
+        
+        groups = {}
+        for index in range(len(move_options)):
+            groups.setdefault(find(index), []).append(index)
+        
+        destinations = {}
+        for members in groups.values():
+            tiles = sorted({tile for index in members for tile in move_options[index][1]} - set(reserved))
+            column_of = {tile: column for column, tile in enumerate(tiles)}
+            
+            # One column per tile, plus a column per unit for staying put, which any real move beats
+            cost = np.full((len(members), len(tiles) + len(members)), FORBIDDEN_COST)
+            for row, index in enumerate(members):
+                _, moves, scores = move_options[index]
+                for tile, score in zip(moves, scores):
+                    if tile in column_of:
+                        cost[row, column_of[tile]] = -score
+                cost[row, len(tiles) + row] = STAY_COST
+            
+            for row, column in enumerate(solve_assignment(cost)):
+                if column < len(tiles):
+                    destinations[move_options[members[row]][0]] = tiles[column]
+        
+        return destinations
+    
+    def get_move_diamond(self, unit, units, obstacles, grid_width, grid_height):
+        """Get free tiles within move range, ignoring what lies on the path"""
         possible_moves = []
         for dx in range(-unit.move_range, unit.move_range + 1):
             for dy in range(-unit.move_range, unit.move_range + 1):
@@ -97,39 +392,25 @@ class AIController:
                     new_x, new_y = unit.x + dx, unit.y + dy
                     if self.is_valid_position(new_x, new_y, units, obstacles, grid_width, grid_height):
                         possible_moves.append((new_x, new_y))
-        
-        if not possible_moves:
-            return None
-            
-        # Score each move
-        scored_moves = []
-        for move_x, move_y in possible_moves:
-            score = self.evaluate_move(unit, move_x, move_y, player_units, ai_units, obstacles, grid_width, grid_height)
-            scored_moves.append((move_x, move_y, score))
-        
-        # Sort by score (highest first)
-        scored_moves.sort(key=lambda x: x[2], reverse=True)
-        
-        # Add some randomness based on difficulty
-        # On easy, might not always pick the best move
-        if self.difficulty == 1 and random.random() < 0.3:
-            # Pick from top 3 moves if available
-            top_n = min(3, len(scored_moves))
-            return scored_moves[random.randint(0, top_n-1)][:2]
-        
-        # Return best move
-        return scored_moves[0][:2] if scored_moves else None
+        return possible_moves
     
-    def is_valid_position(self, x, y, units, obstacles, grid_width, grid_height):
-        """Check if a position is valid for movement"""
+    def is_valid_position(self, x, y, units, obstacles, grid_width, grid_height, terrain_only=False):
+        """Check if a position is valid for movement (terrain_only: ignore units, only the grid and obstacles count)"""
+        # Use the board's occupancy index when one was provided for this turn
+        if self.board is not None:
+            if terrain_only:
+                return not self.board.is_blocked(x, y)
+            return self.board.is_free(x, y)
+        
         # Check grid boundaries
         if x < 0 or x >= grid_width or y < 0 or y >= grid_height:
             return False
             
         # Check for units
-        for unit in units:
-            if unit.x == x and unit.y == y:
-                return False
+        if not terrain_only:
+            for unit in units:
+                if unit.x == x and unit.y == y:
+                    return False
                 
         # Check for obstacles
         for obstacle in obstacles:
@@ -140,6 +421,9 @@ class AIController:
     
     def evaluate_move(self, unit, move_x, move_y, player_units, ai_units, obstacles, grid_width, grid_height):
         """Evaluate a potential move and return a score"""
+        if self.fields is not None:
+            return float(self.score_moves(unit, [(move_x, move_y)])[0])
+        
         score = 0
         
         # Calculate distance to closest player unit
@@ -215,11 +499,14 @@ class AIController:
                     score -= (min_distance_to_player - unit.attack_range) * 3
         
         # Consider safety - avoid positions where multiple player units could attack
-        threat_level = 0
-        for player_unit in player_units:
-            attack_distance = abs(move_x - player_unit.x) + abs(move_y - player_unit.y)
-            if attack_distance <= player_unit.attack_range:
-                threat_level += self.calculate_unit_threat(player_unit)
+        if self.influence is not None:
+            threat_level = float(self.influence.threat[1 - self.player][move_y, move_x])
+        else:
+            threat_level = 0
+            for player_unit in player_units:
+                attack_distance = abs(move_x - player_unit.x) + abs(move_y - player_unit.y)
+                if attack_distance <= player_unit.attack_range:
+                    threat_level += self.calculate_unit_threat(player_unit)
         
         # Higher difficulty AIs are better at avoiding danger
         score -= threat_level * (0.5 + (self.difficulty * 0.25))
@@ -229,7 +516,7 @@ class AIController:
         surrounded_count = 0
         for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
             check_x, check_y = move_x + dx, move_y + dy
-            if not self.is_valid_position(check_x, check_y, [], obstacles, grid_width, grid_height):
+            if not self.is_valid_position(check_x, check_y, (), obstacles, grid_width, grid_height, terrain_only=True):
                 surrounded_count += 1
         
         # Being surrounded is bad, but having some cover is good
@@ -239,14 +526,78 @@ class AIController:
             score += 10  # Some cover is good
             
         # Add a small random factor to avoid predictability
-        score += random.uniform(-5, 5)
+        score += self.rng.uniform(-self.noise, self.noise)
         
         return score
     
+    def evaluate_moves(self, unit, moves, player_units, ai_units, obstacles, grid_width, grid_height):
+        """Scores of several candidate tiles, in one pass over the fields when they are available"""
+        if self.fields is not None:
+            return self.score_moves(unit, moves).tolist() if moves else []
+        return [self.evaluate_move(unit, x, y, player_units, ai_units, obstacles, grid_width, grid_height)
+                for x, y in moves]
+    
+    def get_teleport_tiles(self, unit, teleport_range, units, obstacles, grid_width, grid_height):
+        """Free tiles a unit could teleport to"""
+        tiles = []
+        for dx in range(-teleport_range, teleport_range + 1):
+            for dy in range(-teleport_range, teleport_range + 1):
+                if abs(dx) + abs(dy) <= teleport_range:
+                    new_x, new_y = unit.x + dx, unit.y + dy
+                    if self.is_valid_position(new_x, new_y, units, obstacles, grid_width, grid_height):
+                        tiles.append((new_x, new_y))
+        return tiles
+    
+    def score_moves(self, unit, moves):
+        """Score many candidate tiles at once from the per-turn fields (same rules as evaluate_move)"""
+        fields = self.fields
+        xs = np.array([move[0] for move in moves])
+        ys = np.array([move[1] for move in moves])
+        
+        distance_to_player = fields.enemy_distance[ys, xs]
+        distance_to_ally = fields.ally_distance(unit, ys, xs)
+        scores = np.zeros(len(moves))
+        
+        # Adjust score based on strategy
+        if self.strategy == AIStrategy.AGGRESSIVE:
+            scores -= distance_to_player * 10
+            scores -= np.where(distance_to_ally < 2, 20, 0)
+            
+        elif self.strategy == AIStrategy.DEFENSIVE:
+            scores += np.where(distance_to_player < unit.attack_range, 30,
+                               -(distance_to_player - unit.attack_range) * 5)
+            scores += np.where(distance_to_ally > 0, np.maximum(0, (5 - distance_to_ally) * 10), 0)
+            
+        elif self.strategy == AIStrategy.BALANCED:
+            scores += np.where(distance_to_player <= unit.attack_range, 40,
+                               -(distance_to_player - unit.attack_range) * 3)
+            scores += np.where((distance_to_ally >= 1) & (distance_to_ally <= 3), 15, 0)
+            
+        elif self.strategy == AIStrategy.ABILITY_FOCUSED:
+            if unit.ability == AbilityType.AREA_ATTACK:
+                ability_range = Ability.get_ability_data(unit.ability)["range"]
+                scores += fields.area_target_count(ability_range)[ys, xs] * 25
+            else:
+                scores += np.where(distance_to_player <= unit.attack_range, 40,
+                                   -(distance_to_player - unit.attack_range) * 3)
+        
+        # Consider safety - higher difficulty AIs are better at avoiding danger
+        scores -= fields.threat[ys, xs] * (0.5 + (self.difficulty * 0.25))
+        
+        # Being surrounded is bad, but having some cover is good
+        cover = fields.cover[ys, xs]
+        scores += np.where(cover >= 3, -30, np.where(cover >= 1, 10, 0))
+        
+        # Add a small random factor to avoid predictability
+        scores += np.array([self.rng.uniform(-self.noise, self.noise) for _ in moves])
+        
+        return scores
+    
     def find_best_attack_target(self, unit, units):
         """Find the best target for an attack"""
-        player_units = [u for u in units if u.player == 0]
-        attackable_units = [u for u in player_units if unit.can_attack(u)]
+        player_units, _ = self.split_sides(units)
+        in_range = self.enemies_within(unit, player_units, unit.get_stat_with_effects("attack_range"))
+        attackable_units = [u for u in in_range if unit.can_attack(u)]
         
         if not attackable_units:
             return None
@@ -261,10 +612,10 @@ class AIController:
         scored_targets.sort(key=lambda x: x[1], reverse=True)
         
         # Add some randomness based on difficulty
-        if self.difficulty == 1 and random.random() < 0.3 and len(scored_targets) > 1:
+        if self.difficulty == 1 and self.rng.random() < 0.3 and len(scored_targets) > 1:
             # Pick from top 2 targets if available
             top_n = min(2, len(scored_targets))
-            return scored_targets[random.randint(0, top_n-1)][0]
+            return scored_targets[self.rng.randint(0, top_n-1)][0]
             
         # Return best target
         return scored_targets[0][0] if scored_targets else None
@@ -277,10 +628,8 @@ class AIController:
         estimated_damage = max(1, attacker.attack - target.defense // 2)
         
         # Check for shield effect
-        for effect in target.active_effects:
-            if effect["type"] == "shield":
-                estimated_damage = int(estimated_damage * 0.5)  # 50% damage reduction
-                break
+        if target.has_effect(EffectType.SHIELD):
+            estimated_damage = int(estimated_damage * 0.5)  # 50% damage reduction
                 
         # Killing a unit is highly valuable
         if target.hp <= estimated_damage:
@@ -307,7 +656,7 @@ class AIController:
             score -= 10  # Less valuable to attack units that have already acted
             
         # Add a small random factor
-        score += random.uniform(-5, 5)
+        score += self.rng.uniform(-self.noise, self.noise)
         
         return score
     
@@ -320,31 +669,27 @@ class AIController:
         base_chance = self.weights["use_ability"]
         
         # Adjust based on ability type and situation
-        player_units = [u for u in units if u.player == 0]
-        ai_units = [u for u in units if u.player == 1]
+        player_units, ai_units = self.split_sides(units)
         
         if unit.ability == AbilityType.SHIELD:
             # Use shield if under threat
-            threat_level = 0
-            for player_unit in player_units:
-                distance = abs(unit.x - player_unit.x) + abs(unit.y - player_unit.y)
-                if distance <= player_unit.attack_range + player_unit.move_range:
-                    threat_level += self.calculate_unit_threat(player_unit)
+            threat_level = self.threat_around(unit, player_units)
                     
             # More likely to use shield when threatened
-            return random.random() < (base_chance * (0.5 + min(1.5, threat_level / 50)))
+            return self.rng.random() < (base_chance * (0.5 + min(1.5, threat_level / 50)))
             
         elif unit.ability == AbilityType.DOUBLE_ATTACK:
             # Use double attack if there are good targets
-            attackable_units = [u for u in player_units if unit.can_attack(u)]
+            in_range = self.enemies_within(unit, player_units, unit.get_stat_with_effects("attack_range"))
+            attackable_units = [u for u in in_range if unit.can_attack(u)]
             if attackable_units:
                 # More likely to use if there are multiple targets or high value targets
                 if len(attackable_units) > 1:
-                    return random.random() < (base_chance * 1.3)
+                    return self.rng.random() < (base_chance * 1.3)
                 else:
                     target = attackable_units[0]
                     target_value = self.evaluate_attack_target(unit, target) / 50  # Normalize
-                    return random.random() < (base_chance * (0.7 + target_value))
+                    return self.rng.random() < (base_chance * (0.7 + target_value))
             return False
             
         elif unit.ability == AbilityType.AREA_ATTACK:
@@ -352,21 +697,15 @@ class AIController:
             ability_data = Ability.get_ability_data(unit.ability)
             best_target_count = 0
             
-            for player_unit in player_units:
-                distance = abs(unit.x - player_unit.x) + abs(unit.y - player_unit.y)
-                if distance <= ability_data["range"]:
-                    # Count targets in area
-                    targets_in_area = 0
-                    for potential_target in player_units:
-                        area_distance = abs(player_unit.x - potential_target.x) + abs(player_unit.y - potential_target.y)
-                        if area_distance <= 1:  # 1-tile radius
-                            targets_in_area += 1
-                    
-                    best_target_count = max(best_target_count, targets_in_area)
+            for player_unit in self.enemies_within(unit, player_units, ability_data["range"]):
+                # Count targets in area (1-tile radius)
+                targets_in_area = self.area_target_count(player_unit, player_units)
+                
+                best_target_count = max(best_target_count, targets_in_area)
             
             # Use area attack if it would hit multiple targets
             if best_target_count >= 2:
-                return random.random() < (base_chance * (0.5 + (best_target_count * 0.25)))
+                return self.rng.random() < (base_chance * (0.5 + (best_target_count * 0.25)))
             return False
             
         elif unit.ability == AbilityType.TELEPORT:
@@ -374,31 +713,25 @@ class AIController:
             ability_data = Ability.get_ability_data(unit.ability)
             
             # Find best teleport destination
-            best_score = -float('inf')
-            for dx in range(-ability_data["range"], ability_data["range"] + 1):
-                for dy in range(-ability_data["range"], ability_data["range"] + 1):
-                    if abs(dx) + abs(dy) <= ability_data["range"]:
-                        new_x, new_y = unit.x + dx, unit.y + dy
-                        if self.is_valid_position(new_x, new_y, units, obstacles, grid_width, grid_height):
-                            score = self.evaluate_move(unit, new_x, new_y, player_units, ai_units, obstacles, grid_width, grid_height)
-                            best_score = max(best_score, score)
+            destinations = self.get_teleport_tiles(unit, ability_data["range"], units, obstacles, grid_width, grid_height)
+            scores = self.evaluate_moves(unit, destinations, player_units, ai_units, obstacles, grid_width, grid_height)
+            best_score = max(scores, default=-float('inf'))
             
             # Use teleport if there's a significantly better position
             current_score = self.evaluate_move(unit, unit.x, unit.y, player_units, ai_units, obstacles, grid_width, grid_height)
             if best_score > current_score + 30:
-                return random.random() < base_chance * 1.5
+                return self.rng.random() < base_chance * 1.5
             return False
             
         # Default case
-        return random.random() < base_chance
+        return self.rng.random() < base_chance
     
     def use_ability(self, unit, units, obstacles, grid_width, grid_height):
         """Use the unit's ability in the most effective way"""
         if unit.ability_used or unit.ability_cooldown > 0:
             return None
             
-        player_units = [u for u in units if u.player == 0]
-        ai_units = [u for u in units if u.player == 1]
+        player_units, ai_units = self.split_sides(units)
         ability_data = Ability.get_ability_data(unit.ability)
         
         if unit.ability == AbilityType.SHIELD or unit.ability == AbilityType.DOUBLE_ATTACK:
@@ -410,19 +743,13 @@ class AIController:
             best_target = None
             max_targets = 0
             
-            for player_unit in player_units:
-                distance = abs(unit.x - player_unit.x) + abs(unit.y - player_unit.y)
-                if distance <= ability_data["range"]:
-                    # Count targets in area
-                    targets_in_area = 0
-                    for potential_target in player_units:
-                        area_distance = abs(player_unit.x - potential_target.x) + abs(player_unit.y - potential_target.y)
-                        if area_distance <= 1:  # 1-tile radius
-                            targets_in_area += 1
-                    
-                    if targets_in_area > max_targets:
-                        max_targets = targets_in_area
-                        best_target = player_unit
+            for player_unit in self.enemies_within(unit, player_units, ability_data["range"]):
+                # Count targets in area (1-tile radius)
+                targets_in_area = self.area_target_count(player_unit, player_units)
+                
+                if targets_in_area > max_targets:
+                    max_targets = targets_in_area
+                    best_target = player_unit
             
             if best_target:
                 return {"type": "target", "x": best_target.x, "y": best_target.y}
@@ -433,15 +760,12 @@ class AIController:
             best_pos = None
             best_score = -float('inf')
             
-            for dx in range(-ability_data["range"], ability_data["range"] + 1):
-                for dy in range(-ability_data["range"], ability_data["range"] + 1):
-                    if abs(dx) + abs(dy) <= ability_data["range"]:
-                        new_x, new_y = unit.x + dx, unit.y + dy
-                        if self.is_valid_position(new_x, new_y, units, obstacles, grid_width, grid_height):
-                            score = self.evaluate_move(unit, new_x, new_y, player_units, ai_units, obstacles, grid_width, grid_height)
-                            if score > best_score:
-                                best_score = score
-                                best_pos = (new_x, new_y)
+            destinations = self.get_teleport_tiles(unit, ability_data["range"], units, obstacles, grid_width, grid_height)
+            scores = self.evaluate_moves(unit, destinations, player_units, ai_units, obstacles, grid_width, grid_height)
+            for position, score in zip(destinations, scores):
+                if score > best_score:
+                    best_score = score
+                    best_pos = position
             
             if best_pos:
                 return {"type": "position", "x": best_pos[0], "y": best_pos[1]}
@@ -449,20 +773,83 @@ class AIController:
             
         return None
     
-    def process_turn(self, ai_units, player_units, all_units, obstacles, grid_width, grid_height):
-        """Process the entire AI turn and return the actions to take"""
-        # Reset caches at the start of turn
-        self.reset_caches()
+    def process_turn(self, ai_units, player_units, all_units, obstacles, grid_width, grid_height, board=None):
+        """Plan the entire AI turn within the time budget and return the actions to take"""
+        self.start_clock()
+        actions = self.plan_turn(ai_units, player_units, all_units, obstacles, grid_width, grid_height, board)
+        self.check_destinations(actions)
+        self.latency.record(time.perf_counter() - self.turn_start, self.budget_bound)
+        return actions
+    
+    def check_destinations(self, actions):
+        """Drop any planned move or teleport onto a tile another unit of the plan already goes to.
         
-        actions = []
+        Planners hand out destinations jointly, so this only reports a planner bug;
+        the engine would skip such a move anyway.
+        """
+        taken = set()
+        for action_data in actions:
+            unit_actions = action_data["actions"]
+            for name in ("ability", "move"):
+                action = unit_actions.get(name)
+                if not action or (name == "ability" and action["type"] != "position"):
+                    continue
+                tile = (action["x"], action["y"])
+                if tile in taken:
+                    print(f"AI planned two units onto {tile}, dropping the second {name}")
+                    del unit_actions[name]
+                else:
+                    taken.add(tile)
+    
+    def plan_turn(self, ai_units, player_units, all_units, obstacles, grid_width, grid_height, board=None):
+        """Plan the turn, improving the plan until the time budget runs out.
+        
+        With a budget, a quick plan for every unit comes first, so the whole
+        side always acts. Units are then planned in full, closest to the enemy
+        first since their choices matter most; units not reached in time keep
+        their quick plan.
+        """
+        # Bring the caches up to date with what changed since the last turn
+        if self.watching:
+            self.apply_changes()
+        else:
+            self.reset_caches()
+        self.board = board
+        self.sides = (all_units,) + self.split_sides(all_units)
+        self.update_influence(all_units, grid_width, grid_height)
+        
+        # Precompute threat, distance and cover grids once for the whole turn
+        if board is not None:
+            self.fields = TurnFields.from_board(player_units, ai_units, board, self.calculate_unit_threat,
+                                                self.influence, 1 - self.player)
+        else:
+            self.fields = TurnFields.from_obstacles(player_units, ai_units, obstacles, grid_width, grid_height,
+                                                    self.calculate_unit_threat, self.influence, 1 - self.player)
+        
+        planned = {}
+        move_options = []  # (unit, tiles, scores), assigned jointly once every unit is planned
+        reserved = set()  # Teleport destinations, which moves must avoid
+        order = ai_units
+        quick_plan = {}
+        if self.deadline is not None:
+            order = sorted(ai_units, key=lambda unit: self.fields.enemy_distance[unit.y, unit.x])
+            quick_plan = self.plan_quick_turn(order, all_units, obstacles, grid_width, grid_height)
         
         # Process each AI unit
-        for unit in ai_units:
+        for unit in order:
+            if self.out_of_time():
+                break
             unit_actions = {}
             
             # First, check if we should use ability
             if self.should_use_ability(unit, all_units, obstacles, grid_width, grid_height):
                 ability_action = self.use_ability(unit, all_units, obstacles, grid_width, grid_height)
+                if ability_action and ability_action["type"] == "position":
+                    # Another unit already teleports to the tile, so this one moves normally instead
+                    if (ability_action["x"], ability_action["y"]) in reserved:
+                        ability_action = None
+                    else:
+                        reserved.add((ability_action["x"], ability_action["y"]))
                 if ability_action:
                     unit_actions["ability"] = ability_action
             
@@ -471,12 +858,140 @@ class AIController:
             if attack_target:
                 unit_actions["attack"] = {"target": attack_target}
             
-            # Finally, check if we should move
-            if not unit.moved:
-                best_move = self.find_best_move(unit, all_units, obstacles, grid_width, grid_height)
-                if best_move:
+            # Finally, score where the unit could move (a teleport already moved it elsewhere)
+            if not unit.moved and unit_actions.get("ability", {}).get("type") != "position":
+                options = self.find_move_options(unit, all_units, obstacles, grid_width, grid_height)
+                if options:
+                    moves, scores = options
+                    # Easy units don't coordinate: each sticks to its own pick, sometimes one of its top 3 tiles
+                    if self.difficulty == 1:
+                        index = moves.index(self.pick_move(moves, scores))
+                        moves, scores = moves[index:index + 1], scores[index:index + 1]
+                    move_options.append((unit, moves, scores))
+            
+            planned[unit] = unit_actions
+        
+        # Units not reached in time keep their quick plan, and their destinations are kept from the others
+        for unit in order:
+            if unit not in planned:
+                unit_actions = quick_plan[unit]
+                move = unit_actions.get("move")
+                if move and (move["x"], move["y"]) in reserved:
+                    del unit_actions["move"]  # A teleport took the tile
+                elif move:
+                    reserved.add((move["x"], move["y"]))
+                planned[unit] = unit_actions
+        
+        # Hand out destinations jointly so no two units go for the same tile
+        for unit, tile in self.assign_moves(move_options, reserved).items():
+            planned[unit]["move"] = {"x": tile[0], "y": tile[1]}
+        self.sides = None
+        
+        # Actions are applied in the units' usual order
+        return [{"unit": unit, "actions": planned[unit]} for unit in ai_units]
+    
+    def plan_quick_turn(self, units, all_units, obstacles, grid_width, grid_height):
+        """A cheap plan for every unit: its best attack in range, then a step to the free tile nearest the enemy.
+        
+        Returns {unit: actions}; plan_turn falls back on it for units it has no time to plan in full.
+        """
+        player_units, _ = self.split_sides(all_units)
+        enemy_distance = self.fields.enemy_distance
+        taken = set()
+        plans = {}
+        for unit in units:
+            unit_actions = {}
+            attack_target = self.find_best_attack_target(unit, all_units)
+            if attack_target:
+                unit_actions["attack"] = {"target": attack_target}
+            
+            if not unit.moved and player_units:
+                if self.board is not None:
+                    tiles = self.get_reachable_tiles(unit)
+                else:
+                    tiles = self.get_move_diamond(unit, all_units, obstacles, grid_width, grid_height)
+                tiles = [tile for tile in tiles if tile not in taken]
+                if tiles:
+                    tile = min(tiles, key=lambda tile: enemy_distance[tile[1], tile[0]])
+                    if enemy_distance[tile[1], tile[0]] < enemy_distance[unit.y, unit.x]:
+                        taken.add(tile)
+                        unit_actions["move"] = {"x": tile[0], "y": tile[1]}
+            
+            plans[unit] = unit_actions
+        return plans
+    
+    def get_free_tiles(self, unit, free, passable):
+        """Free tiles a unit can walk to within its move range (same rules as Board.reachable_tiles).
+        
+        free: bool grid of tiles it may stop on
+        passable: bool grid of tiles it may walk through, i.e. neither obstacles nor enemies
+        """
+        move_range = unit.move_range
+        height, width = free.shape
+        left, top = max(unit.x - move_range, 0), max(unit.y - move_range, 0)
+        right, bottom = min(unit.x + move_range + 1, width), min(unit.y + move_range + 1, height)
+        walkable = passable[top:bottom, left:right]
+        
+        # Grow the reached area one step at a time, only over walkable tiles
+        reached = np.zeros(walkable.shape, dtype=bool)
+        reached[unit.y - top, unit.x - left] = True
+        for _ in range(move_range):
+            grown = reached.copy()
+            grown[1:] |= reached[:-1]
+            grown[:-1] |= reached[1:]
+            grown[:, 1:] |= reached[:, :-1]
+            grown[:, :-1] |= reached[:, 1:]
+            grown &= walkable
+            grown[unit.y - top, unit.x - left] = True
+            if np.array_equal(grown, reached):
+                break
+            reached = grown
+        
+        ys, xs = np.nonzero(reached & free[top:bottom, left:right])
+        return list(zip((xs + left).tolist(), (ys + top).tolist()))
+    
+    def process_store_turn(self, store, blocked, fields=None):
+        """Plan a turn for the AI's rows of a UnitStore, for battles too large for Unit objects.
+        
+        blocked: bool array of shape (grid_height, grid_width), True for obstacles
+        fields: TurnFields already built for this store and side, if any
+        Returns actions naming units and targets by row, for UnitStore.apply_ai_actions.
+        Abilities are not used.
+        """
+        self.board = None
+        
+        views = store.views()
+        ai_units = [view for view in views if view.player == self.player]
+        if fields is None:
+            fields = TurnFields.from_store(store, self.player, blocked, self.calculate_store_threats, ai_units)
+        self.fields = fields
+        
+        # Tiles taken by planned moves are reserved so two units don't pick the same one
+        occupancy = store.occupancy(blocked.shape[1], blocked.shape[0])
+        free = ~blocked & (occupancy < 0)
+        # Obstacles and enemies block the way, allies can be walked through
+        passable = ~blocked & ((occupancy < 0) | (store.player[occupancy] == self.player))
+        has_enemies = bool(np.any(store.player != self.player))
+        
+        actions = []
+        for unit in ai_units:
+            unit_actions = {}
+            
+            # Attack the best enemy in range
+            targets = [views[row] for row in store.enemies_in_range(unit.row)]
+            attack_target = self.find_best_attack_target(unit, targets) if not unit.attacked else None
+            if attack_target:
+                unit_actions["attack"] = {"row": attack_target.row}
+            
+            # Then move
+            if not unit.moved and has_enemies:
+                moves = self.get_free_tiles(unit, free, passable)
+                if moves:
+                    best_move = self.pick_move(moves, self.score_moves(unit, moves))
+                    free[unit.y, unit.x] = True
+                    free[best_move[1], best_move[0]] = False
                     unit_actions["move"] = {"x": best_move[0], "y": best_move[1]}
             
-            actions.append({"unit": unit, "actions": unit_actions})
+            actions.append({"row": unit.row, "actions": unit_actions})
         
         return actions
@@ -0,0 +1,209 @@
+import numpy as np
+
+# Most grid cells compared against units at once; more units are processed in chunks
+CHUNK_CELLS = 1 << 22
+# Up to this many unit-cell pairs, nearest distances are worked out pair by pair
+DIRECT_CELLS = 1 << 18
+
+class TurnFields:
+    """Per-turn NumPy grids the AI reads instead of rescanning units for every tile"""
+
+    def __init__(self, blocked, enemies, enemy_threats, allies, ally_keys=None, threat=None, enemy_cluster=None):
+        """
+        blocked: bool array of shape (grid_height, grid_width), True for obstacles
+        enemies: (xs, ys, attack ranges) arrays of the units the AI is fighting against
+        enemy_threats: threat value of each enemy
+        allies: (xs, ys) arrays of the units on the AI's side
+        ally_keys: objects identifying each ally, for ally_distance()
+        threat, enemy_cluster: enemy threat and "enemies on or next to" grids kept by an
+            InfluenceMap; computed here when not given
+        """
+        self.height, self.width = blocked.shape
+        self.grid_ys, self.grid_xs = np.indices(blocked.shape)
+        self.enemy_xs, self.enemy_ys, enemy_ranges = enemies
+        self.ally_index = {key: index for index, key in enumerate(ally_keys or [])}
+        self.enemy_cluster = enemy_cluster
+
+        # Summed threat of every enemy that can attack each tile without moving
+        self.threat = threat if threat is not None else np.zeros(blocked.shape)
+        if threat is None:
+            for start, end in self._chunks(len(self.enemy_xs)):
+                distance = self._distances(self.enemy_xs[start:end], self.enemy_ys[start:end])
+                in_range = distance <= enemy_ranges[start:end, np.newaxis, np.newaxis]
+                self.threat += (in_range * enemy_threats[start:end, np.newaxis, np.newaxis]).sum(axis=0)
+
+        # Distance to the closest enemy unit
+        self.enemy_distance = self._nearest_two(self.enemy_xs, self.enemy_ys)[0]
+
+        # Closest and second closest ally, so a unit's own position can be
+        # excluded when asking for its nearest ally
+        ally_xs, ally_ys = allies
+        self.ally_nearest, self.ally_nearest_index, self.ally_second = self._nearest_two(ally_xs, ally_ys)
+
+        # Number of orthogonal neighbours that are off the grid or blocked
+        padded = np.pad(blocked, 1, constant_values=True)
+        self.cover = (padded[:-2, 1:-1].astype(int) + padded[2:, 1:-1] +
+                      padded[1:-1, :-2] + padded[1:-1, 2:])
+
+        self.area_targets = {}  # Area attack target counts, keyed by ability range
+
+    @staticmethod
+    def unit_columns(units):
+        """Positions and attack ranges of a list of units as arrays"""
+        return (np.array([unit.x for unit in units], dtype=np.int32),
+                np.array([unit.y for unit in units], dtype=np.int32),
+                np.array([unit.attack_range for unit in units], dtype=np.int32))
+
+    @classmethod
+    def from_units(cls, player_units, ai_units, blocked, threat_of, influence=None, enemy_side=None):
+        """
+        player_units: units the AI is fighting against
+        ai_units: units on the AI's side
+        threat_of: function returning the threat value of a unit
+        influence: up-to-date InfluenceMap to read the threat and clustering of enemy_side from
+        """
+        ally_xs, ally_ys, _ = cls.unit_columns(ai_units)
+        if influence is not None:
+            return cls(blocked, cls.unit_columns(player_units), None, (ally_xs, ally_ys), ai_units,
+                       influence.threat[enemy_side], influence.presence[enemy_side])
+        threats = np.array([threat_of(unit) for unit in player_units], dtype=float)
+        return cls(blocked, cls.unit_columns(player_units), threats, (ally_xs, ally_ys), ai_units)
+
+    @classmethod
+    def from_obstacles(cls, player_units, ai_units, obstacles, grid_width, grid_height, threat_of,
+                       influence=None, enemy_side=None):
+        """Build the fields from an obstacle list when no board index is available"""
+        blocked = np.zeros((grid_height, grid_width), dtype=bool)
+        for obstacle in obstacles:
+            if 0 <= obstacle["x"] < grid_width and 0 <= obstacle["y"] < grid_height:
+                blocked[obstacle["y"], obstacle["x"]] = True
+        return cls.from_units(player_units, ai_units, blocked, threat_of, influence, enemy_side)
+
+    @classmethod
+    def from_board(cls, player_units, ai_units, board, threat_of, influence=None, enemy_side=None):
+        """Build the fields from the board's obstacle flags"""
+        blocked = np.frombuffer(bytes(board.obstacles), dtype=np.uint8).reshape(board.height, board.width) == 1
+        return cls.from_units(player_units, ai_units, blocked, threat_of, influence, enemy_side)
+
+    @classmethod
+    def from_store(cls, store, player, blocked, threat_of_rows, ally_views):
+        """Build the fields straight from UnitStore columns.
+
+        player: the side the AI plays
+        threat_of_rows: function returning the threat values of an array of rows
+        ally_views: UnitViews of the AI's rows, in row order
+        """
+        enemy_rows = np.flatnonzero(store.player != player)
+        ally_rows = np.flatnonzero(store.player == player)
+        enemies = (store.x[enemy_rows], store.y[enemy_rows], store.attack_range[enemy_rows])
+        allies = (store.x[ally_rows], store.y[ally_rows])
+        return cls(blocked, enemies, threat_of_rows(store, enemy_rows).astype(float), allies, ally_views)
+
+    def _chunks(self, count):
+        """Split a number of units into ranges small enough to compare against the whole grid"""
+        step = max(1, CHUNK_CELLS // (self.width * self.height))
+        return [(start, min(count, start + step)) for start in range(0, count, step)]
+
+    def _distances(self, xs, ys):
+        """Manhattan distance from each of several tiles to every tile, shape (units, height, width)"""
+        return (np.abs(self.grid_xs - xs[:, np.newaxis, np.newaxis]) +
+                np.abs(self.grid_ys - ys[:, np.newaxis, np.newaxis]))
+
+    def _nearest_two(self, xs, ys):
+        """Distance to the closest and second closest of several tiles from every tile,
+        and the index of the closest.
+
+        Manhattan distance splits into a pass along each row and then one down
+        each column, each sweeping forwards and backwards, so on big maps this
+        costs a few array operations per row and column however many tiles
+        there are. Returns (nearest, nearest index, second nearest); inf and -1
+        where there is no such tile.
+        """
+        shape = (self.height, self.width)
+        if len(xs) * self.width * self.height <= DIRECT_CELLS:
+            distance = np.concatenate([self._distances(xs, ys), np.full((2,) + shape, np.inf)])
+            order = np.argpartition(distance, 1, axis=0)[:2]
+            nearest, second = np.take_along_axis(distance, order, axis=0)
+            return nearest, np.where(order[0] < len(xs), order[0], -1), second
+
+        first = np.full(shape, np.inf)
+        first_index = np.full(shape, -1)
+        second = np.full(shape, np.inf)
+        second_index = np.full(shape, -1)
+        first[ys, xs] = 0
+        first_index[ys, xs] = np.arange(len(xs))
+        near = (first, first_index, second, second_index)
+
+        near = self._sweep([grid.T for grid in near])  # Along each row
+        near = self._sweep([grid.T for grid in near])  # Down each column
+        return near[0], near[1], near[2]
+
+    def _sweep(self, near):
+        """Spread the two closest tiles one step at a time along the first axis, both ways"""
+        forward = [grid.copy() for grid in near]
+        for i in range(1, len(forward[0])):
+            merged = self._merge([grid[i] for grid in forward], self._step([grid[i - 1] for grid in forward]))
+            for grid, values in zip(forward, merged):
+                grid[i] = values
+        backward = [grid.copy() for grid in near]
+        for i in range(len(backward[0]) - 2, -1, -1):
+            merged = self._merge([grid[i] for grid in backward], self._step([grid[i + 1] for grid in backward]))
+            for grid, values in zip(backward, merged):
+                grid[i] = values
+        return self._merge(forward, backward)
+
+    @staticmethod
+    def _step(near):
+        """The same two closest tiles, seen from one tile further away"""
+        return near[0] + 1, near[1], near[2] + 1, near[3]
+
+    @staticmethod
+    def _merge(a, b):
+        """Closest two different tiles out of two (distance, index, distance, index) candidates"""
+        take_a = a[0] <= b[0]
+        first = np.where(take_a, a[0], b[0])
+        first_index = np.where(take_a, a[1], b[1])
+
+        # Second place goes to the better of the winner's runner-up and the loser's
+        # best tile that isn't the winner (both sides may have found the same tile)
+        loser_first, loser_first_index = np.where(take_a, b[0], a[0]), np.where(take_a, b[1], a[1])
+        loser_second, loser_second_index = np.where(take_a, b[2], a[2]), np.where(take_a, b[3], a[3])
+        same = loser_first_index == first_index
+        other = np.where(same, loser_second, loser_first)
+        other_index = np.where(same, loser_second_index, loser_first_index)
+        runner_up, runner_up_index = np.where(take_a, a[2], b[2]), np.where(take_a, a[3], b[3])
+        take_runner_up = runner_up <= other
+        return (first, first_index,
+                np.where(take_runner_up, runner_up, other), np.where(take_runner_up, runner_up_index, other_index))
+
+    def distance_from(self, x, y):
+        """Manhattan distance from a tile to every tile on the grid"""
+        return np.abs(self.grid_xs - x) + np.abs(self.grid_ys - y)
+
+    def ally_distance(self, unit, ys, xs):
+        """Distance from the given tiles to the closest ally of a unit, not counting the unit itself"""
+        nearest = self.ally_nearest[ys, xs]
+        index = self.ally_index.get(unit)
+        if index is None:
+            return nearest
+        return np.where(self.ally_nearest_index[ys, xs] == index, self.ally_second[ys, xs], nearest)
+
+    def area_target_count(self, ability_range):
+        """Weighted number of enemies an area attack from each tile could reach"""
+        if ability_range not in self.area_targets:
+            # Enemies clustered around a target count as half a target each
+            if self.enemy_cluster is not None:
+                weights = 1 + 0.5 * (self.enemy_cluster[self.enemy_ys, self.enemy_xs] - 1)
+            else:
+                weights = np.ones(len(self.enemy_xs))
+                for start, end in self._chunks(len(self.enemy_xs)):
+                    nearby = (np.abs(self.enemy_xs[start:end, np.newaxis] - self.enemy_xs) +
+                              np.abs(self.enemy_ys[start:end, np.newaxis] - self.enemy_ys)) <= 1
+                    weights[start:end] += 0.5 * (nearby.sum(axis=1) - 1)
+
+            counts = np.zeros((self.height, self.width))
+            for start, end in self._chunks(len(self.enemy_xs)):
+                in_range = self._distances(self.enemy_xs[start:end], self.enemy_ys[start:end]) <= ability_range
+                counts += (in_range * weights[start:end, np.newaxis, np.newaxis]).sum(axis=0)
+            self.area_targets[ability_range] = counts
+        return self.area_targets[ability_range]
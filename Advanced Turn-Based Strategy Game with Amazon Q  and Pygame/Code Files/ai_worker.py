@@ -0,0 +1,83 @@
+import threading
+from board import Board
+from unit import Unit
+
+class AITurnPlanner:
+    """Plans one AI turn on a background thread, from a snapshot of the game.
+
+    The game keeps drawing and handling input meanwhile and polls for the
+    result. Planning works on copies of the units, so nothing the game
+    does in the meantime can change what the AI sees; the finished plan
+    names units by uid and is turned back into the game's own units by
+    resolve().
+    """
+
+    def __init__(self, ai, snapshot):
+        self.ai = ai
+        self.snapshot = snapshot
+        self.grid_width = snapshot["grid_width"]
+        self.grid_height = snapshot["grid_height"]
+        self.actions = None  # Planned actions by uid, once done
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+        self.thread = threading.Thread(target=self.run, name="ai-planner", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            units = [Unit.from_dict(data) for data in self.snapshot["units"]]
+            obstacles = self.snapshot["obstacles"]
+            board = Board(self.grid_width, self.grid_height)
+            board.rebuild(units, obstacles)
+
+            ai_units = [unit for unit in units if unit.player == self.ai.player]
+            enemy_units = [unit for unit in units if unit.player != self.ai.player]
+            actions = self.ai.process_turn(ai_units, enemy_units, units, obstacles,
+                                           self.grid_width, self.grid_height, board)
+            self.actions = [self.to_uids(action_data) for action_data in actions]
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    @staticmethod
+    def to_uids(action_data):
+        """Copy of one unit's planned actions with units replaced by their uids"""
+        unit_actions = dict(action_data["actions"])
+        if "attack" in unit_actions:
+            unit_actions["attack"] = {"target": unit_actions["attack"]["target"].uid}
+        return {"unit": action_data["unit"].uid, "actions": unit_actions}
+
+    def cancel(self):
+        """Stop planning as soon as possible; the result will be ignored"""
+        self.cancelled = True
+        self.ai.cancel()
+
+    def poll(self):
+        """The planned actions (by uid) once planning has finished, else None"""
+        if self.cancelled or not self.done.is_set():
+            return None
+        if self.error is not None:
+            print(f"Error planning AI turn: {self.error}")
+            return []
+        return self.actions
+
+    @staticmethod
+    def resolve(actions, engine):
+        """Turn planned actions back into actions on the engine's units, skipping units that are gone"""
+        resolved = []
+        for action_data in actions:
+            unit = engine.unit_by_uid(action_data["unit"])
+            if unit is None:
+                continue
+            unit_actions = dict(action_data["actions"])
+            if "attack" in unit_actions:
+                target = engine.unit_by_uid(unit_actions["attack"]["target"])
+                if target is None:
+                    del unit_actions["attack"]
+                else:
+                    unit_actions["attack"] = {"target": target}
+            resolved.append({"unit": unit, "actions": unit_actions})
+        return resolved
@@ -0,0 +1,60 @@
+import numpy as np
+
+def solve_assignment(cost):
+    """Minimum-cost assignment of every row to a different column (Hungarian method).
+
+    cost: array of shape (rows, columns) with rows <= columns
+    Returns the column chosen for each row. Runs in O(rows^2 * columns),
+    with the work over columns done in NumPy.
+    """
+    cost = np.asarray(cost, dtype=float)
+    rows, columns = cost.shape
+    if rows == 0:
+        return np.zeros(0, dtype=int)
+
+    # Potentials and matching; column 0 is a virtual column used to start each augmenting path
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=int)  # 1-based row matched to each column, 0 if free
+    way = np.zeros(columns + 1, dtype=int)  # Previous column on the shortest path
+
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+
+        # Grow a shortest path of alternating edges until it reaches a free column
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            reduced = cost[current_row - 1] - row_potential[current_row] - column_potential[1:]
+
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            visited = np.flatnonzero(used)
+            row_potential[owner[visited]] += delta
+            column_potential[visited] -= delta
+            min_reduced[~used] -= delta
+
+            column = next_column
+            if owner[column] == 0:
+                break
+
+        # Flip the matching along the path
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assigned = np.full(rows, -1)
+    matched = np.flatnonzero(owner[1:]) + 1
+    assigned[owner[matched] - 1] = matched - 1
+    return assigned
@@ -0,0 +1,78 @@
+import os
+import threading
+from save_load import encode_game, write_atomic
+
+AUTOSAVE_DIR = "autosaves"
+AUTOSAVE_SLOTS = 3
+
+def autosave_path(slot, folder=AUTOSAVE_DIR):
+    return os.path.join(folder, f"autosave_{slot}.sav")
+
+def latest_autosave(folder=AUTOSAVE_DIR, slots=AUTOSAVE_SLOTS):
+    """Path of the most recently written autosave, or None"""
+    paths = [autosave_path(slot, folder) for slot in range(slots)]
+    paths = [path for path in paths if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+class AutosaveWorker:
+    """Writes saves on a background thread so the game loop never waits for compression or disk.
+
+    Autosaves rotate through a fixed number of slots, replacing the oldest.
+    If a file is queued again before it was written, only the newest state
+    is kept.
+    """
+
+    def __init__(self, slots=AUTOSAVE_SLOTS, folder=AUTOSAVE_DIR):
+        self.slots = slots
+        self.folder = folder
+        self.pending = {}  # filename -> state waiting to be written
+        self.busy = False
+        self.condition = threading.Condition()
+        self.next_slot = self.oldest_slot()
+
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def oldest_slot(self):
+        """Slot to write next: an empty one, or else the one written longest ago"""
+        def written_at(slot):
+            path = autosave_path(slot, self.folder)
+            return os.path.getmtime(path) if os.path.exists(path) else -1
+        return min(range(self.slots), key=written_at)
+
+    def autosave(self, snapshot):
+        """Queue a game state snapshot for the next autosave slot"""
+        filename = autosave_path(self.next_slot, self.folder)
+        self.next_slot = (self.next_slot + 1) % self.slots
+        self.submit(snapshot, filename)
+
+    def submit(self, state, filename):
+        """Queue a game state to be written to a file; returns immediately"""
+        with self.condition:
+            self.pending[filename] = state
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                filename = next(iter(self.pending))
+                state = self.pending.pop(filename)
+                self.busy = True
+
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+                write_atomic(filename, encode_game(state))
+                print(f"Game saved to {filename}")
+            except Exception as e:
+                print(f"Error saving game: {e}")
+
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every queued save has been written; returns False on timeout"""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
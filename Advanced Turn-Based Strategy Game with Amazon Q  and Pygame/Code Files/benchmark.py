@@ -0,0 +1,184 @@
+import argparse
+import cProfile
+import json
+import pstats
+import random
+import time
+
+from engine import GameEngine
+from levels import CompiledLevel
+from unit import UnitType
+from ai_controller import AIController
+from ai_fields import TurnFields
+from search_ai import create_ai, SEARCH_DIFFICULTY
+
+# Units per side and obstacles per tile on the shipped 16x12 levels; bigger maps keep the same density
+UNIT_DENSITY = 5 / (16 * 12)
+OBSTACLE_DENSITY = 7 / (16 * 12)
+UNIT_MIX = [UnitType.INFANTRY, UnitType.INFANTRY, UnitType.ARCHER, UnitType.CAVALRY, UnitType.MAGE]
+# Shipped levels have an enemy spawn point every six rows of the enemy's edge and spawn every 3 to 5 turns
+SPAWN_ROW_SPACING = 6
+DEFAULT_SPAWN_INTERVAL = 4
+DEFAULT_SIZES = ["16x12", "64x64", "256x256"]
+
+# Functions whose time is reported, grouped into the parts of a turn they belong to; matched
+# to the profile by their code, so other functions of the same name aren't counted
+PHASES = [
+    ("AI: threat and distance fields", [TurnFields.from_units]),
+    ("AI: influence maps", [AIController.update_influence]),
+    ("AI: abilities", [AIController.should_use_ability, AIController.use_ability]),
+    ("AI: attack targets", [AIController.find_best_attack_target]),
+    ("AI: move scoring", [AIController.find_move_options]),
+    ("AI: move assignment", [AIController.assign_moves]),
+    ("Rules: apply actions", [GameEngine.apply_ai_actions]),
+    ("Rules: end turn", [GameEngine.end_turn]),
+]
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def build_level(width, height, seed=0, density=UNIT_DENSITY, spawn_interval=DEFAULT_SPAWN_INTERVAL):
+    """Level data for a width x height skirmish with the shipped levels' unit, obstacle and spawn density.
+
+    Each side starts in its own quarter of the map, as on the shipped levels,
+    obstacles are scattered over the middle half and enemies spawn along the
+    enemy's edge.
+    """
+    rng = random.Random(seed)
+    per_side = max(1, round(width * height * density))
+    quarter = max(1, width // 4)
+    taken = set()
+
+    def free_tile(left, right):
+        while True:
+            x, y = rng.randrange(left, right), rng.randrange(height)
+            if (x, y) not in taken:
+                taken.add((x, y))
+                return x, y
+
+    rosters = ([], [])
+    for player, (left, right) in enumerate([(0, quarter), (width - quarter, width)]):
+        # Never ask for more units than the quarter has room for
+        for _ in range(min(per_side, (right - left) * height)):
+            x, y = free_tile(left, right)
+            rosters[player].append({"type": rng.choice(UNIT_MIX).name, "x": x, "y": y})
+
+    obstacles = []
+    middle = width - 2 * quarter
+    for _ in range(min(round(width * height * OBSTACLE_DENSITY), middle * height // 2)):
+        x, y = free_tile(quarter, width - quarter)
+        obstacles.append({"x": x, "y": y, "type": rng.choice(["tree", "rock"])})
+
+    # Spawn points spread down the enemy's edge, skipping rows whose edge tile is taken
+    spawn_points = [{"x": width - 1, "y": y} for y in range(SPAWN_ROW_SPACING // 3, height, SPAWN_ROW_SPACING)
+                    if (width - 1, y) not in taken]
+
+    return {
+        "name": f"Benchmark {width}x{height}",
+        "grid_width": width,
+        "grid_height": height,
+        "spawn_interval": spawn_interval,
+        "player_units": rosters[0],
+        "enemy_units": rosters[1],
+        "spawn_points": spawn_points,
+        "obstacles": obstacles
+    }
+
+def build_engine(width, height, seed=0, spawn_interval=DEFAULT_SPAWN_INTERVAL):
+    """Engine playing a generated benchmark level"""
+    engine = GameEngine(seed=seed)
+    engine.start_level(CompiledLevel(0, build_level(width, height, seed, spawn_interval=spawn_interval)))
+    return engine
+
+def run_size(width, height, turns, difficulty=3, seed=0, profile=False, spawn_interval=DEFAULT_SPAWN_INTERVAL):
+    """Play a few AI-vs-AI turns on one map size and time each part of them"""
+    engine = build_engine(width, height, seed, spawn_interval)
+    level = engine.level
+    controllers = [create_ai(difficulty, player=player, rng=engine.rng.stream(f"ai{player}")) for player in (0, 1)]
+    for controller in controllers:
+        controller.watch(engine)
+
+    profiler = cProfile.Profile() if profile else None
+    timings = {"plan": [], "apply": [], "end_turn": []}
+    for _ in range(turns):
+        if engine.game_over:
+            break
+        ai = controllers[engine.current_player]
+        own_units = engine.get_units(engine.current_player)
+        enemy_units = [unit for unit in engine.units if unit.player != engine.current_player]
+
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        actions = ai.process_turn(own_units, enemy_units, engine.units, engine.obstacles,
+                                  engine.grid_width, engine.grid_height, engine.board)
+        planned = time.perf_counter()
+        engine.apply_ai_actions(actions)
+        applied = time.perf_counter()
+        if not engine.game_over:
+            engine.end_turn()
+        ended = time.perf_counter()
+        if profiler:
+            profiler.disable()
+
+        timings["plan"].append(planned - start)
+        timings["apply"].append(applied - planned)
+        timings["end_turn"].append(ended - applied)
+
+    result = {
+        "size": f"{width}x{height}",
+        "units": len(level.player_units) + len(level.enemy_units),
+        "obstacles": len(level.obstacles),
+        "spawn_points": len(level.spawn_points),
+        "turns": len(timings["plan"]),
+        "mean_ms": {stage: 1000 * sum(times) / len(times) if times else 0.0 for stage, times in timings.items()},
+        "max_plan_ms": 1000 * max(timings["plan"], default=0.0)
+    }
+    if profiler:
+        result["phases_ms"] = phase_times(pstats.Stats(profiler), result["turns"])
+    return result
+
+def profile_key(function):
+    """The (file, first line, name) key cProfile reports a function's time under"""
+    code = getattr(function, "__func__", function).__code__
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+def phase_times(stats, turns):
+    """Mean milliseconds per turn spent in each of PHASES, from profiler stats"""
+    cumulative = {key: cumtime for key, (_, _, _, cumtime, _) in stats.stats.items()}
+    return {label: 1000 * sum(cumulative.get(profile_key(function), 0.0) for function in functions) / max(1, turns)
+            for label, functions in PHASES}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time AI and rules turns on maps of growing size")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="map sizes as WIDTHxHEIGHT")
+    parser.add_argument("--turns", type=int, default=4, help="turns to play on each map (both sides count)")
+    parser.add_argument("--difficulty", type=int, default=3, choices=[1, 2, 3, SEARCH_DIFFICULTY])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn-interval", type=int, default=DEFAULT_SPAWN_INTERVAL, help="turns between enemy spawns")
+    parser.add_argument("--no-profile", action="store_true", help="skip the per-phase breakdown (it adds overhead)")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        width, height = parse_size(size)
+        result = run_size(width, height, args.turns, args.difficulty, args.seed, not args.no_profile,
+                          args.spawn_interval)
+        results.append(result)
+
+        mean = result["mean_ms"]
+        print(f"{result['size']}: {result['units']} units, {result['obstacles']} obstacles, "
+              f"{result['spawn_points']} spawn points, {result['turns']} turns, "
+              f"plan {mean['plan']:.1f} ms (max {result['max_plan_ms']:.1f}), "
+              f"apply {mean['apply']:.1f} ms, end turn {mean['end_turn']:.1f} ms")
+        for label, ms in result.get("phases_ms", {}).items():
+            print(f"    {label}: {ms:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
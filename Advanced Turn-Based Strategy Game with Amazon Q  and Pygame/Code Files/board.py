@@ -0,0 +1,103 @@
+class Board:
+    """Occupancy index of units and obstacles for O(1) tile lookups"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = [None] * (width * height)  # Unit standing on each tile
+        self.obstacles = bytearray(width * height)  # 1 where an obstacle blocks the tile
+        self.version = 0  # Bumped on every change so dependent caches can tell they are stale
+
+    def rebuild(self, units, obstacles, obstacle_mask=None):
+        """Rebuild the whole index from the unit list and obstacle dicts.
+
+        obstacle_mask: precomputed obstacle flags of the same size (e.g. from a
+        CompiledLevel), copied instead of walking the obstacle list
+        """
+        self.cells = [None] * (self.width * self.height)
+        if obstacle_mask is not None:
+            self.obstacles = bytearray(obstacle_mask)
+        else:
+            self.obstacles = bytearray(self.width * self.height)
+            for obstacle in obstacles:
+                if self.in_bounds(obstacle["x"], obstacle["y"]):
+                    self.obstacles[obstacle["y"] * self.width + obstacle["x"]] = 1
+
+        for unit in units:
+            self.place_unit(unit)
+
+        self.version += 1
+
+    def in_bounds(self, x, y):
+        """Check if a position is inside the grid"""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def unit_at(self, x, y):
+        """Return the unit on a tile, or None"""
+        if not self.in_bounds(x, y):
+            return None
+        return self.cells[y * self.width + x]
+
+    def is_obstacle(self, x, y):
+        """Check if an obstacle sits on a tile"""
+        return self.in_bounds(x, y) and self.obstacles[y * self.width + x] == 1
+
+    def is_blocked(self, x, y):
+        """Check if a tile is off the grid or covered by an obstacle"""
+        if not self.in_bounds(x, y):
+            return True
+        return self.obstacles[y * self.width + x] == 1
+
+    def is_free(self, x, y):
+        """Check if a unit could stand on a tile"""
+        if not self.in_bounds(x, y):
+            return False
+        index = y * self.width + x
+        return self.obstacles[index] == 0 and self.cells[index] is None
+
+    def place_unit(self, unit):
+        """Add a unit to the index at its current position"""
+        if self.in_bounds(unit.x, unit.y):
+            self.cells[unit.y * self.width + unit.x] = unit
+        self.version += 1
+
+    def remove_unit(self, unit):
+        """Remove a unit from the index"""
+        if self.in_bounds(unit.x, unit.y) and self.cells[unit.y * self.width + unit.x] is unit:
+            self.cells[unit.y * self.width + unit.x] = None
+        self.version += 1
+
+    def move_unit(self, unit, x, y):
+        """Move a unit to a new tile and keep the index in sync"""
+        self.remove_unit(unit)
+        unit.x = x
+        unit.y = y
+        self.place_unit(unit)
+
+    def reachable_tiles(self, unit, move_range):
+        """Flood fill the tiles a unit can walk to within its move range.
+
+        Obstacles and enemy units block the path, allied units can be passed
+        through but not stopped on. Returns a dict of (x, y) -> steps taken.
+        """
+        reachable = {}
+        visited = {(unit.x, unit.y)}
+        frontier = [(unit.x, unit.y)]
+
+        for steps in range(1, move_range + 1):
+            next_frontier = []
+            for x, y in frontier:
+                for nx, ny in ((x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)):
+                    if (nx, ny) in visited or self.is_blocked(nx, ny):
+                        continue
+                    visited.add((nx, ny))
+
+                    occupant = self.cells[ny * self.width + nx]
+                    if occupant is None:
+                        reachable[(nx, ny)] = steps
+                        next_frontier.append((nx, ny))
+                    elif occupant.player == unit.player:
+                        next_frontier.append((nx, ny))
+            frontier = next_frontier
+
+        return reachable
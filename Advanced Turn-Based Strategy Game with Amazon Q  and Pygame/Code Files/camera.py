@@ -0,0 +1,102 @@
+import pygame
+
+ZOOM_STEP = 1.25  # Zoom factor per mouse wheel notch or +/- key press
+MAX_ZOOM = 2.0
+SCROLL_STEP = 50  # Pixels scrolled per arrow key press
+
+class Camera:
+    """Scrollable, zoomable view of the board inside a rectangle of the window.
+
+    Converts between tiles and screen pixels and tells which tiles are on
+    screen, so drawing and clicks only deal with the visible part of the map.
+    The board can be zoomed out until the whole of it fits the view.
+    """
+
+    def __init__(self, view, tile_size, grid_width, grid_height):
+        self.view = pygame.Rect(view)
+        self.base_tile_size = tile_size
+        self.zoom = 1.0
+        self.offset_x = 0  # Board pixel (at the current zoom) shown at the view's left edge
+        self.offset_y = 0
+        self.version = 0  # Bumped whenever the view changes, so cached drawing can be redone
+        self.set_grid(grid_width, grid_height)
+
+    @property
+    def tile_size(self):
+        return max(1, round(self.base_tile_size * self.zoom))
+
+    def set_grid(self, grid_width, grid_height):
+        """Show a board of a new size, from its top left corner at normal zoom"""
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.zoom = 1.0
+        self.offset_x = self.offset_y = 0
+        self.clamp()
+
+    def min_zoom(self):
+        """Zoom at which the whole board fits the view (never more than normal size)"""
+        fit = min(self.view.width / (self.grid_width * self.base_tile_size),
+                  self.view.height / (self.grid_height * self.base_tile_size))
+        return min(1.0, fit)
+
+    def clamp(self):
+        """Keep the zoom in range and the view over the board"""
+        self.zoom = max(self.min_zoom(), min(MAX_ZOOM, self.zoom))
+        max_x = max(0, self.grid_width * self.tile_size - self.view.width)
+        max_y = max(0, self.grid_height * self.tile_size - self.view.height)
+        self.offset_x = max(0, min(max_x, self.offset_x))
+        self.offset_y = max(0, min(max_y, self.offset_y))
+        self.version += 1
+
+    def scroll(self, dx, dy):
+        self.offset_x += dx
+        self.offset_y += dy
+        self.clamp()
+
+    def zoom_at(self, factor, pos):
+        """Zoom by a factor, keeping the board point under a screen position in place"""
+        old_size = self.tile_size
+        board_x = (pos[0] - self.view.x + self.offset_x) / old_size
+        board_y = (pos[1] - self.view.y + self.offset_y) / old_size
+        self.zoom *= factor
+        self.zoom = max(self.min_zoom(), min(MAX_ZOOM, self.zoom))
+        self.offset_x = round(board_x * self.tile_size - (pos[0] - self.view.x))
+        self.offset_y = round(board_y * self.tile_size - (pos[1] - self.view.y))
+        self.clamp()
+
+    def center_on(self, x, y):
+        """Scroll so a tile is in the middle of the view"""
+        self.offset_x = (x * self.tile_size + self.tile_size // 2) - self.view.width // 2
+        self.offset_y = (y * self.tile_size + self.tile_size // 2) - self.view.height // 2
+        self.clamp()
+
+    def tile_rect(self, x, y):
+        """Screen rectangle of a tile"""
+        size = self.tile_size
+        return pygame.Rect(self.view.x + x * size - self.offset_x, self.view.y + y * size - self.offset_y, size, size)
+
+    def screen_to_tile(self, pos):
+        """Tile under a screen position, or None if it is outside the view or the board"""
+        if not self.view.collidepoint(pos):
+            return None
+        x = (pos[0] - self.view.x + self.offset_x) // self.tile_size
+        y = (pos[1] - self.view.y + self.offset_y) // self.tile_size
+        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
+            return x, y
+        return None
+
+    def visible_tiles(self, margin=0):
+        """(left, top, right, bottom) range of tiles at least partly on screen, right and bottom exclusive.
+
+        margin: extra tiles to include on each side, for things drawn past their own tile
+        """
+        size = self.tile_size
+        left = self.offset_x // size - margin
+        top = self.offset_y // size - margin
+        right = -(-(self.offset_x + self.view.width) // size) + margin
+        bottom = -(-(self.offset_y + self.view.height) // size) + margin
+        return (max(0, left), max(0, top), min(self.grid_width, right), min(self.grid_height, bottom))
+
+    def is_visible(self, x, y):
+        left, top, right, bottom = self.visible_tiles()
+        return left <= x < right and top <= y < bottom
@@ -0,0 +1,116 @@
+from enum import Enum
+
+# Temporary effects a unit can be under
+class EffectType(Enum):
+    ATTACK_BOOST = "attack_boost"
+    DEFENSE_BOOST = "defense_boost"
+    RANGE_BOOST = "range_boost"
+    MOVE_BOOST = "move_boost"
+    SHIELD = "shield"
+    DOUBLE_ATTACK = "double_attack"
+
+# Stat raised by each boost effect. Range and move boosts used to be looked up as
+# "attack_range_boost" and "move_range_boost", so the Range Extender and Movement Boost items had no effect;
+# mapping them to their stats here makes those items work.
+EFFECT_STATS = {
+    EffectType.ATTACK_BOOST: "attack",
+    EffectType.DEFENSE_BOOST: "defense",
+    EffectType.RANGE_BOOST: "attack_range",
+    EffectType.MOVE_BOOST: "move_range"
+}
+
+# Icon and color drawn on the unit for each effect
+EFFECT_DISPLAY = {
+    EffectType.ATTACK_BOOST: ("D", (255, 0, 0)),  # Red
+    EffectType.DEFENSE_BOOST: ("S", (0, 0, 255)),  # Blue
+    EffectType.RANGE_BOOST: ("R", (255, 255, 0)),  # Yellow
+    EffectType.MOVE_BOOST: ("M", (255, 165, 0)),  # Orange
+    EffectType.SHIELD: ("S", (0, 0, 255)),  # Blue
+    EffectType.DOUBLE_ATTACK: ("D", (255, 0, 0))  # Red
+}
+
+class Effect:
+    """One active effect: what it does, how many turns it has left and its strength"""
+
+    __slots__ = ("effect_type", "duration", "value", "uses")
+
+    def __init__(self, effect_type, duration, value=0, uses=0):
+        self.effect_type = effect_type
+        self.duration = duration
+        self.value = value  # Stat bonus of boost effects
+        self.uses = uses  # Extra attacks left for double attack
+
+    @property
+    def stat(self):
+        """Name of the stat this effect raises, or None"""
+        return EFFECT_STATS.get(self.effect_type)
+
+    @property
+    def icon(self):
+        return EFFECT_DISPLAY[self.effect_type][0]
+
+    @property
+    def color(self):
+        return EFFECT_DISPLAY[self.effect_type][1]
+
+    def to_dict(self):
+        """Convert effect to dictionary for saving"""
+        return {
+            "type": self.effect_type.value,
+            "duration": self.duration,
+            "value": self.value,
+            "uses": self.uses
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an effect from dictionary data (older saves also carry icon and color)"""
+        return cls(EffectType(data["type"]), data.get("duration", 1), data.get("value", 0), data.get("uses", 0))
+
+class EffectSet:
+    """A unit's active effects, with the bonus each stat gets from them kept up to date"""
+
+    __slots__ = ("effects", "bonuses")
+
+    def __init__(self, effects=()):
+        self.effects = []
+        self.bonuses = {stat: 0 for stat in EFFECT_STATS.values()}
+        for effect in effects:
+            self.add(effect)
+
+    def __iter__(self):
+        return iter(self.effects)
+
+    def __len__(self):
+        return len(self.effects)
+
+    def add(self, effect):
+        self.effects.append(effect)
+        if effect.stat:
+            self.bonuses[effect.stat] += effect.value
+
+    def remove(self, effect):
+        self.effects.remove(effect)
+        if effect.stat:
+            self.bonuses[effect.stat] -= effect.value
+
+    def find(self, effect_type):
+        """First active effect of a type, or None"""
+        for effect in self.effects:
+            if effect.effect_type == effect_type:
+                return effect
+        return None
+
+    def tick(self):
+        """Count durations down at the end of a turn and drop expired effects"""
+        for effect in list(self.effects):
+            effect.duration -= 1
+            if effect.duration <= 0:
+                self.remove(effect)
+
+    def to_list(self):
+        return [effect.to_dict() for effect in self.effects]
+
+    @classmethod
+    def from_list(cls, data):
+        return cls(Effect.from_dict(effect) for effect in data)
@@ -0,0 +1,423 @@
+import os
+
+# The rules engine never opens a window, so keep pygame quiet if unit.py imports it
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from unit import Unit, UnitType
+from abilities import AbilityType, Ability
+from levels import LevelManager, GRID_WIDTH, GRID_HEIGHT
+from board import Board
+from effects import Effect, EffectType
+from rng import RandomService
+from action_log import ActionLog, CHECKPOINT_INTERVAL
+
+class GameEngine:
+    """Headless rules engine: board state, action application and win detection.
+
+    Nothing here touches the display, the mixer or stdout. Front ends pass a
+    listener that is called as listener(event, data) for things they may want
+    to play a sound for or report, e.g. "move", "attack", "defeat", "ability",
+    "item", "spawn", "victory" and "loss". Finer-grained board changes are
+    reported too, for caches that depend on them: "unit_moved" (with the
+    tile it came "from"), "hp_changed", "unit_changed" (stats, cooldown or
+    effects), "unit_died" and "board_reset" (new level or loaded game).
+
+    All randomness comes from the seeded streams in self.rng, and every
+    action is appended to self.log so the match can be replayed.
+
+    The grid size comes from the level data (or the saved game), so it can
+    change whenever a level is started or a game is loaded.
+    """
+
+    def __init__(self, level_number=1, load_state=None, listener=None, seed=None,
+                 checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.grid_width = GRID_WIDTH
+        self.grid_height = GRID_HEIGHT
+        self.listeners = [listener] if listener is not None else []
+        self.rng = RandomService(seed)
+        self.spawn_random = self.rng.stream("spawn")
+        self.checkpoint_interval = checkpoint_interval
+        self.log = None
+        self.next_uid = 1
+        self.units_by_uid = {}
+        self.units = []
+        self.obstacles = []
+        self.board = Board(self.grid_width, self.grid_height)  # Occupancy index for tile lookups
+        self.current_player = 0  # 0 for player, 1 for AI
+        self.turn_count = 1
+        self.game_over = False
+        self.winner = None
+
+        # Level management
+        self.level_manager = LevelManager()
+        self.current_level = level_number
+        self.level_manager.current_level = level_number
+        self.level = None  # CompiledLevel being played
+
+        if load_state:
+            self.load_state(load_state)
+        else:
+            self.initialize_level(level_number)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def set_grid_size(self, grid_width, grid_height):
+        """Resize the board; callers rebuild its contents afterwards"""
+        if (grid_width, grid_height) != (self.grid_width, self.grid_height):
+            self.grid_width = grid_width
+            self.grid_height = grid_height
+            self.board = Board(grid_width, grid_height)
+
+    def emit(self, event, data=None):
+        """Notify the front end (and any other listeners) about something that happened"""
+        for listener in self.listeners:
+            listener(event, data or {})
+
+    def initialize_level(self, level_number):
+        """Initialize a new level with units and obstacles"""
+        self.start_level(self.level_manager.get_level(level_number))
+
+    def start_level(self, level):
+        """Start playing a CompiledLevel, which need not be one of the level files"""
+        self.units = []
+        self.obstacles = []
+        self.current_level = level.number
+        self.current_player = 0
+        self.turn_count = 1
+        self.game_over = False
+        self.winner = None
+
+        self.level = level
+        self.set_grid_size(self.level.grid_width, self.level.grid_height)
+
+        # Create player units
+        for type_name, x, y in self.level.player_units:
+            self.units.append(Unit(UnitType[type_name], x, y, 0))
+
+        # Create enemy units
+        for type_name, x, y in self.level.enemy_units:
+            self.units.append(Unit(UnitType[type_name], x, y, 1))
+
+        # Set obstacles
+        self.obstacles = self.level.obstacle_list()
+        self.board.rebuild(self.units, self.obstacles, self.level.obstacle_mask)
+        self.start_log()
+        self.emit("board_reset")
+
+    def load_state(self, saved_game):
+        """Load game state from saved data"""
+        self.current_level = saved_game["current_level"]
+        self.level_manager.current_level = self.current_level
+        self.current_player = saved_game["current_player"]
+        self.turn_count = saved_game["turn_count"]
+        self.obstacles = saved_game["obstacles"]
+        self.game_over = False
+        self.level = self.level_manager.get_level(self.current_level)
+
+        # Saves from before maps could differ in size don't record one; use the level's
+        if "grid_width" in saved_game:
+            self.set_grid_size(saved_game["grid_width"], saved_game["grid_height"])
+        else:
+            self.set_grid_size(self.level.grid_width, self.level.grid_height)
+        self.winner = None
+
+        # Load units; binary saves come back with the units already built
+        self.units = [unit if isinstance(unit, Unit) else Unit.from_dict(unit) for unit in saved_game["units"]]
+
+        self.board.rebuild(self.units, self.obstacles)
+        self.start_log()
+        self.emit("board_reset")
+
+    def start_log(self):
+        """Give every unit a uid and start a new action log from the current state"""
+        self.next_uid = max([self.next_uid - 1] + [unit.uid for unit in self.units if unit.uid is not None]) + 1
+        for unit in self.units:
+            if unit.uid is None:
+                unit.uid = self.next_uid
+                self.next_uid += 1
+        self.units_by_uid = {unit.uid: unit for unit in self.units}
+        self.log = ActionLog(self.rng.seed, self.snapshot(), self.rng.get_state(), self.checkpoint_interval)
+
+    def record(self, action, **data):
+        """Append an action to the log"""
+        self.log.append(self.turn_count, self.current_player, action, **data)
+
+    def unit_by_uid(self, uid):
+        return self.units_by_uid.get(uid)
+
+    def get_state(self):
+        """Get the game state as plain data for saving"""
+        return {
+            "current_level": self.current_level,
+            "current_player": self.current_player,
+            "turn_count": self.turn_count,
+            "grid_width": self.grid_width,
+            "grid_height": self.grid_height,
+            "units": [unit.to_dict() for unit in self.units],
+            "obstacles": self.obstacles
+        }
+
+    def snapshot(self):
+        """Copy of the game state that later actions can't change, e.g. for saving on another thread"""
+        state = self.get_state()
+        state["obstacles"] = [dict(obstacle) for obstacle in self.obstacles]
+        return state
+
+    def get_units(self, player):
+        """Get all units belonging to a player"""
+        return [unit for unit in self.units if unit.player == player]
+
+    def move_unit(self, unit, x, y):
+        """Move a unit if the target tile is reachable this turn"""
+        if not unit.can_move_to(x, y, self.units, self.obstacles, self.board):
+            return False
+
+        origin = (unit.x, unit.y)
+        self.board.move_unit(unit, x, y)
+        unit.moved = True
+        self.record("move", unit=unit.uid, x=x, y=y)
+        self.emit("move", {"unit": unit})
+        self.emit("unit_moved", {"unit": unit, "from": origin})
+        return True
+
+    def attack_unit(self, unit, target):
+        """Attack a target if it is in range; returns the damage dealt or None"""
+        if not unit.can_attack(target):
+            return None
+
+        damage = unit.attack_unit(target)
+        self.record("attack", unit=unit.uid, target=target.uid)
+        self.emit("attack", {"unit": unit, "target": target, "damage": damage})
+        self.emit("hp_changed", {"unit": target})
+
+        # Remove dead units
+        if target.hp <= 0:
+            self.emit("defeat", {"unit": target})
+            self.emit("unit_died", {"unit": target})
+            self.units.remove(target)
+            self.units_by_uid.pop(target.uid, None)
+            self.board.remove_unit(target)
+            self.check_game_over()
+
+        return damage
+
+    def activate_ability(self, unit, target_x=None, target_y=None):
+        """Use a unit's special ability; returns True if it took effect"""
+        if unit.ability_used or unit.ability_cooldown > 0:
+            return False
+
+        ability_data = Ability.get_ability_data(unit.ability)
+
+        if unit.ability == AbilityType.SHIELD:
+            # Reduce damage taken
+            unit.active_effects.add(Effect(EffectType.SHIELD, duration=1))
+
+        elif unit.ability == AbilityType.DOUBLE_ATTACK:
+            # Allow attacking twice
+            unit.active_effects.add(Effect(EffectType.DOUBLE_ATTACK, duration=1, uses=1))
+
+        elif unit.ability == AbilityType.TELEPORT:
+            # Teleport to an empty tile within range
+            if target_x is None or not self.board.is_free(target_x, target_y):
+                return False
+            if abs(unit.x - target_x) + abs(unit.y - target_y) > ability_data["range"]:
+                return False
+            origin = (unit.x, unit.y)
+            self.board.move_unit(unit, target_x, target_y)
+            self.emit("unit_moved", {"unit": unit, "from": origin})
+
+        elif unit.ability == AbilityType.HEAL:
+            # Heal an ally within range
+            target = self.board.unit_at(target_x, target_y) if target_x is not None else unit
+            if not target or target.player != unit.player:
+                return False
+            if abs(unit.x - target.x) + abs(unit.y - target.y) > ability_data["range"]:
+                return False
+            target.hp = min(target.max_hp, target.hp + 30)
+            self.emit("hp_changed", {"unit": target})
+
+        elif unit.ability == AbilityType.AREA_ATTACK:
+            # Damage every enemy within 1 tile of a targeted enemy in range
+            center = self.board.unit_at(target_x, target_y) if target_x is not None else None
+            if not center or center.player == unit.player:
+                return False
+            if abs(unit.x - center.x) + abs(unit.y - center.y) > ability_data["range"]:
+                return False
+            for target in self.units:
+                if target.player != unit.player:
+                    if abs(center.x - target.x) + abs(center.y - target.y) <= 1:  # 1-tile radius
+                        target.hp -= max(1, unit.attack // 2)
+                        self.emit("hp_changed", {"unit": target})
+
+        else:
+            return False
+
+        unit.ability_used = True
+        unit.ability_cooldown = ability_data["cooldown"]
+        self.record("ability", unit=unit.uid, x=target_x, y=target_y)
+        self.emit("ability", {"unit": unit})
+        self.emit("unit_changed", {"unit": unit})
+
+        if unit.ability == AbilityType.AREA_ATTACK:
+            self.remove_dead_units()
+        return True
+
+    def use_item(self, unit, item_index):
+        """Use an item from a unit's inventory"""
+        success, message = unit.use_item(item_index)
+        if success:
+            self.record("item", unit=unit.uid, index=item_index)
+            self.emit("item", {"unit": unit, "message": message})
+            self.emit("unit_changed", {"unit": unit})
+        return success, message
+
+    def spawn_enemy(self, spawn_points):
+        """Spawn a new enemy unit at one of the spawn points ((x, y) tuples)"""
+        if not spawn_points:
+            return None
+
+        # Choose a random spawn point
+        x, y = self.spawn_random.choice(spawn_points)
+
+        # Check if spawn point is occupied
+        if self.board.unit_at(x, y) is not None:
+            return None  # Spawn point is occupied
+
+        # Choose a random unit type with weighted probabilities
+        unit_types = [UnitType.INFANTRY, UnitType.ARCHER, UnitType.CAVALRY, UnitType.MAGE]
+        weights = [0.4, 0.3, 0.2, 0.1]  # Infantry most common, mage least common
+        unit_type = self.spawn_random.choices(unit_types, weights=weights, k=1)[0]
+
+        return self.spawn_unit(unit_type, x, y, 1)  # player=1 for AI
+
+    def spawn_unit(self, unit_type, x, y, player):
+        """Create and add a new unit"""
+        new_unit = Unit(unit_type, x, y, player)
+        new_unit.uid = self.next_uid
+        self.next_uid += 1
+        self.units.append(new_unit)
+        self.units_by_uid[new_unit.uid] = new_unit
+        self.board.place_unit(new_unit)
+        self.record("spawn", unit_type=unit_type.name, x=x, y=y, owner=player)
+        self.emit("spawn", {"unit": new_unit})
+        return new_unit
+
+    def remove_dead_units(self):
+        """Remove units with HP <= 0"""
+        for unit in self.units:
+            if unit.hp <= 0:
+                self.board.remove_unit(unit)
+                self.units_by_uid.pop(unit.uid, None)
+                self.emit("unit_died", {"unit": unit})
+        self.units = [unit for unit in self.units if unit.hp > 0]
+        self.check_game_over()
+
+    def check_game_over(self):
+        """Check if one side has no units left; returns True if the game is over"""
+        if self.game_over:
+            return True
+
+        player_units = any(unit.player == 0 for unit in self.units)
+        ai_units = any(unit.player == 1 for unit in self.units)
+
+        if not player_units:
+            self.game_over = True
+            self.winner = 1  # AI wins
+            self.emit("loss", {"winner": 1})
+        elif not ai_units:
+            self.game_over = True
+            self.winner = 0  # Player wins
+            self.emit("victory", {"winner": 0})
+
+        return self.game_over
+
+    def end_turn(self, spawn=True):
+        """End the current player's turn (replays pass spawn=False and apply the logged spawns)"""
+        self.record("end_turn")
+
+        # Reset unit states for the next player
+        for unit in self.units:
+            if unit.player == self.current_player:
+                changed = unit.ability_used or unit.ability_cooldown > 0 or len(unit.active_effects) > 0
+                unit.reset_turn()
+                unit.selected = False
+                if changed:
+                    self.emit("unit_changed", {"unit": unit})
+
+        self.current_player = 1 - self.current_player  # Switch player
+
+        # Increment turn count when player's turn starts
+        if self.current_player == 0:
+            self.turn_count += 1
+
+            # Check for enemy spawning
+            if spawn and self.turn_count % self.level.spawn_interval == 0:
+                self.spawn_enemy(self.level.spawn_points)
+
+            if self.log.wants_checkpoint(self.turn_count):
+                self.log.add_checkpoint(self.turn_count, self.snapshot(), self.rng.get_state())
+
+    def apply_ai_actions(self, actions):
+        """Apply the action list returned by AIController.process_turn"""
+        for action_data in actions:
+            if self.game_over:
+                return
+
+            unit = action_data["unit"]
+            unit_actions = action_data["actions"]
+            if unit not in self.units:
+                continue  # Unit died earlier this turn
+
+            # Process ability actions first
+            if "ability" in unit_actions:
+                ability_action = unit_actions["ability"]
+                if ability_action["type"] == "self":
+                    self.activate_ability(unit)
+                else:
+                    self.activate_ability(unit, ability_action["x"], ability_action["y"])
+                if self.game_over:
+                    return
+
+            # Process attack actions
+            if "attack" in unit_actions and not unit.attacked:
+                target = unit_actions["attack"]["target"]
+                if target in self.units:
+                    self.attack_unit(unit, target)
+                    if self.game_over:
+                        return
+
+            # Process movement actions
+            if "move" in unit_actions and not unit.moved:
+                self.move_unit(unit, unit_actions["move"]["x"], unit_actions["move"]["y"])
+
+    def run_ai_turn(self, ai):
+        """Let an AIController play the current player's turn"""
+        own_units = self.get_units(self.current_player)
+        enemy_units = [unit for unit in self.units if unit.player != self.current_player]
+
+        # Get AI's planned actions for all units
+        actions = ai.process_turn(own_units, enemy_units, self.units, self.obstacles,
+                                  self.grid_width, self.grid_height, self.board)
+        self.apply_ai_actions(actions)
+
+def simulate_match(level_number, controllers, max_turns=100, seed=None):
+    """Play a full AI-vs-AI match headlessly.
+
+    controllers: AIController for player 0 and player 1
+    Returns (winner, turns played); winner is None if max_turns was reached.
+    """
+    engine = GameEngine(level_number, seed=seed)
+    for player in (0, 1):
+        controllers[player].watch(engine)
+
+    while not engine.game_over and engine.turn_count <= max_turns:
+        engine.run_ai_turn(controllers[engine.current_player])
+        if not engine.game_over:
+            engine.end_turn()
+
+    return engine.winner, engine.turn_count
@@ -0,0 +1,69 @@
+import pygame
+from collections import OrderedDict
+
+# Most rendered text surfaces kept around; labels that change every turn
+# (HP, turn counter) push out old entries instead of growing forever
+MAX_CACHED_TEXTS = 1024
+
+# Labels drawn every frame, rendered up front by prerender_labels()
+STATIC_LABELS = [
+    # Unit type glyphs and ability cooldowns
+    (20, "I", (255, 255, 255)), (20, "A", (255, 255, 255)),
+    (20, "C", (255, 255, 255)), (20, "M", (255, 255, 255)),
+    (20, "1", (255, 255, 255)), (20, "2", (255, 255, 255)), (20, "3", (255, 255, 255)),
+    (20, "4", (255, 255, 255)), (20, "5", (255, 255, 255)),
+    # Active effect icons
+    (16, "D", (255, 0, 0)), (16, "S", (0, 0, 255)),
+    (16, "R", (255, 255, 0)), (16, "M", (255, 165, 0)),
+    # Obstacle glyphs
+    (24, "T", (0, 200, 0)), (24, "R", (200, 200, 200)), (24, "X", (200, 200, 200)),
+    # Button captions
+    (24, "End Turn", (255, 255, 255)), (24, "Save Game", (255, 255, 255)),
+    (24, "Use Ability (A)", (255, 255, 255)), (24, "Inventory (I)", (255, 255, 255)),
+    (24, "Continue", (255, 255, 255))
+]
+
+_fonts = {}
+_text_cache = OrderedDict()
+
+class CachedFont:
+    """Shared default font of one size that reuses rendered text surfaces"""
+
+    def __init__(self, size):
+        self.point_size = size
+        self.font = pygame.font.SysFont(None, size)
+
+    def render(self, text, antialias, color, background=None):
+        """Render text, or return the surface rendered earlier for the same (size, text, color)"""
+        key = (self.point_size, text, antialias, tuple(color), background and tuple(background))
+        surface = _text_cache.get(key)
+
+        if surface is None:
+            if background is None:
+                surface = self.font.render(text, antialias, color)
+            else:
+                surface = self.font.render(text, antialias, color, background)
+            _text_cache[key] = surface
+            if len(_text_cache) > MAX_CACHED_TEXTS:
+                _text_cache.popitem(last=False)
+        else:
+            _text_cache.move_to_end(key)
+
+        return surface
+
+    def size(self, text):
+        """Width and height the text would take when rendered"""
+        return self.font.size(text)
+
+def get_font(size):
+    """Return the process-wide cached font for a size"""
+    font = _fonts.get(size)
+    if font is None:
+        font = CachedFont(size)
+        _fonts[size] = font
+    return font
+
+def prerender_labels():
+    """Render the static labels once so the first frames don't pay for them"""
+    for size, text, color in STATIC_LABELS:
+        get_font(size).render(text, True, color)
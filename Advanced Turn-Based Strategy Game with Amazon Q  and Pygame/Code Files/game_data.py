@@ -2,124 +2,14 @@ import json
 import os
 from enum import Enum
 
+from levels import LevelManager
+
 # Define map layouts for different levels
 class MapLayouts:
     @staticmethod
     def get_level_map(level):
-        """Returns map data for the specified level"""
-        maps = {
-            1: {
-                "name": "Training Grounds",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 9}
-                ],
-                "spawn_interval": 5,  # Spawn new enemies every 5 turns
-                "tutorial": True,     # Show tutorial for this level
-                "obstacles": []       # No obstacles in first level
-            },
-            2: {
-                "name": "Forest Ambush",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 9},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 10}
-                ],
-                "spawn_interval": 4,  # Spawn new enemies every 4 turns
-                "tutorial": False,
-                "obstacles": [
-                    {"x": 7, "y": 3},
-                    {"x": 7, "y": 4},
-                    {"x": 8, "y": 4},
-                    {"x": 8, "y": 5},
-                    {"x": 7, "y": 8},
-                    {"x": 8, "y": 8},
-                    {"x": 8, "y": 9}
-                ]
-            },
-            3: {
-                "name": "Mountain Pass",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7},
-                    {"type": "MAGE", "x": 2, "y": 4}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "INFANTRY", "x": 13, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 9},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "CAVALRY", "x": 14, "y": 2},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 10},
-                    {"x": 13, "y": 1}
-                ],
-                "spawn_interval": 3,  # Spawn new enemies every 3 turns
-                "tutorial": False,
-                "obstacles": [
-                    {"x": 5, "y": 2},
-                    {"x": 5, "y": 3},
-                    {"x": 6, "y": 3},
-                    {"x": 6, "y": 4},
-                    {"x": 7, "y": 4},
-                    {"x": 7, "y": 5},
-                    {"x": 8, "y": 5},
-                    {"x": 8, "y": 6},
-                    {"x": 9, "y": 6},
-                    {"x": 9, "y": 7},
-                    {"x": 8, "y": 7},
-                    {"x": 8, "y": 8},
-                    {"x": 7, "y": 8},
-                    {"x": 7, "y": 9},
-                    {"x": 6, "y": 9},
-                    {"x": 6, "y": 10}
-                ]
-            }
-        }
-        
-        return maps.get(level, maps[1])  # Default to level 1 if level not found
+        """Returns map data for the specified level (from the level files, like LevelManager)"""
+        return LevelManager().get_level_data(level)
 
 # Item definitions
 class ItemType(Enum):
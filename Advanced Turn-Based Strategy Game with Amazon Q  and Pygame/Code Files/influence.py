@@ -0,0 +1,71 @@
+import numpy as np
+
+class InfluenceMap:
+    """Per-side grids of attack coverage and threat, updated one unit at a time.
+
+    Every unit stamps a diamond around its tile into the grids of its side.
+    When a unit moves, takes damage or dies only its own stamp is taken out
+    and put back, so keeping the maps current costs a few small array
+    updates per change instead of a pass over every pair of units.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        shape = (2, height, width)  # Indexed by side first
+        self.coverage = np.zeros(shape, dtype=np.int32)  # Units able to attack each tile without moving
+        self.threat = np.zeros(shape)  # Summed threat of those units
+        self.danger = np.zeros(shape)  # Summed threat of units that could move and then attack each tile
+        self.presence = np.zeros(shape, dtype=np.int32)  # Units on or next to each tile
+        self.stamps = {}  # uid -> (side, x, y, attack range, reach, threat) currently in the grids
+        self.masks = {}  # Diamond masks by radius
+
+    def _diamond(self, radius):
+        if radius not in self.masks:
+            dy, dx = np.indices((2 * radius + 1, 2 * radius + 1)) - radius
+            self.masks[radius] = np.abs(dx) + np.abs(dy) <= radius
+        return self.masks[radius]
+
+    def _add(self, grid, x, y, radius, value):
+        """Add a value to every tile within a Manhattan radius of (x, y)"""
+        mask = self._diamond(radius)
+        top, bottom = max(0, y - radius), min(self.height, y + radius + 1)
+        left, right = max(0, x - radius), min(self.width, x + radius + 1)
+        if top >= bottom or left >= right:
+            return
+        grid[top:bottom, left:right] += value * mask[top - (y - radius):bottom - (y - radius),
+                                                     left - (x - radius):right - (x - radius)]
+
+    def _stamp(self, stamp, sign):
+        side, x, y, attack_range, reach, threat = stamp
+        self._add(self.coverage[side], x, y, attack_range, sign)
+        self._add(self.threat[side], x, y, attack_range, sign * threat)
+        self._add(self.danger[side], x, y, reach, sign * threat)
+        self._add(self.presence[side], x, y, 1, sign)
+
+    def place(self, uid, side, x, y, attack_range, reach, threat):
+        """Add a unit, replacing whatever it contributed before"""
+        self.remove(uid)
+        stamp = (side, x, y, attack_range, reach, threat)
+        self.stamps[uid] = stamp
+        self._stamp(stamp, 1)
+
+    def remove(self, uid):
+        """Take a unit's contribution out of the grids"""
+        stamp = self.stamps.pop(uid, None)
+        if stamp is not None:
+            self._stamp(stamp, -1)
+
+    def update_unit(self, unit, threat):
+        """Add or refresh a unit from its current position and stats"""
+        key = unit.uid if unit.uid is not None else id(unit)
+        self.place(key, unit.player, unit.x, unit.y, unit.attack_range,
+                   unit.attack_range + unit.move_range, threat)
+
+    def rebuild(self, units, threat_of):
+        """Recompute the grids from scratch"""
+        for grid in (self.coverage, self.threat, self.danger, self.presence):
+            grid.fill(0)
+        self.stamps = {}
+        for unit in units:
+            self.update_unit(unit, threat_of(unit))
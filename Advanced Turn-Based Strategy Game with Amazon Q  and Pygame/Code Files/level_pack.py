@@ -0,0 +1,159 @@
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+
+# Level files are maps/level<N>.json next to this module; the pack built from them sits beside them
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+PACK_PATH = os.path.join(MAPS_DIR, "levels.pack")
+LEVEL_FILE = re.compile(r"level(\d+)\.json$")
+REQUIRED_KEYS = ["name", "spawn_interval", "player_units", "enemy_units", "spawn_points", "obstacles"]
+
+# Pack layout: header, index of fixed-size entries sorted by level number, level names, then each
+# level's JSON. Only the header and index are read when the pack is opened; names and levels are
+# read from the memory-mapped file when asked for.
+MAGIC = b"TBLP"
+PACK_VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, format version, level count
+ENTRY = struct.Struct("<IQIQI")  # level number, data offset, data length, name offset, name length
+
+def level_numbers(maps_dir=MAPS_DIR):
+    """Numbers of the levels that have a data file, in order"""
+    numbers = []
+    for filename in os.listdir(maps_dir):
+        match = LEVEL_FILE.match(filename)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+def pack_is_current(maps_dir=MAPS_DIR, path=PACK_PATH):
+    """Whether a pack still matches the level files: none changed since it was built and none added or removed.
+
+    Only the files' dates are read, not their contents. A pack shipped
+    without its maps folder counts as current.
+    """
+    if not os.path.isdir(maps_dir):
+        return True
+    built = os.path.getmtime(path)
+    numbers = []
+    for entry in os.scandir(maps_dir):
+        match = LEVEL_FILE.match(entry.name)
+        if match:
+            if entry.stat().st_mtime > built:
+                return False
+            numbers.append(int(match.group(1)))
+
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, version, count = HEADER.unpack(header)
+        if magic != MAGIC or version != PACK_VERSION:
+            return False
+        packed = [entry[0] for entry in ENTRY.iter_unpack(f.read(count * ENTRY.size))]
+    return packed == sorted(numbers)
+
+class LevelDirectory:
+    """Levels read straight from their files in a maps folder (used when no pack has been built)"""
+
+    def __init__(self, maps_dir=MAPS_DIR):
+        self.path = maps_dir
+        self.numbers = level_numbers(maps_dir)
+
+    def name(self, number):
+        return self.read(number)["name"]
+
+    def read(self, number):
+        """A level's data, parsed from its file"""
+        with open(os.path.join(self.path, f"level{number}.json")) as f:
+            return json.load(f)
+
+class LevelPack:
+    """Levels read from a pack file built by build_pack().
+
+    The file is memory-mapped and only its index is read up front, so opening
+    a pack costs the same however many levels it holds; a level's JSON is
+    parsed only when that level is played.
+    """
+
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != PACK_VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a level pack this version can read")
+
+        index = self.data[HEADER.size:HEADER.size + count * ENTRY.size]
+        self.entries = {entry[0]: entry[1:] for entry in ENTRY.iter_unpack(index)}
+        self.numbers = list(self.entries)  # Already sorted when the pack was built
+
+    def name(self, number):
+        _, _, name_offset, name_length = self.entries[number]
+        return self.data[name_offset:name_offset + name_length].decode("utf-8")
+
+    def read(self, number):
+        """A level's data, parsed from its slice of the pack"""
+        offset, length, _, _ = self.entries[number]
+        return json.loads(self.data[offset:offset + length])
+
+    def close(self):
+        self.data.close()
+
+def build_pack(maps_dir=MAPS_DIR, path=PACK_PATH):
+    """Compile every level file in a maps folder into one pack file; returns the number of levels"""
+    numbers = level_numbers(maps_dir)
+    names = []
+    bodies = []
+    for number in numbers:
+        with open(os.path.join(maps_dir, f"level{number}.json")) as f:
+            level = json.load(f)
+        missing = [key for key in REQUIRED_KEYS if key not in level]
+        if missing:
+            raise ValueError(f"level{number}.json is missing {', '.join(missing)}")
+        names.append(level["name"].encode("utf-8"))
+        bodies.append(json.dumps(level, separators=(",", ":")).encode("utf-8"))
+
+    # Names follow the index, then the level bodies follow the names
+    name_offset = HEADER.size + len(numbers) * ENTRY.size
+    data_offset = name_offset + sum(len(name) for name in names)
+    index = bytearray()
+    for number, name, body in zip(numbers, names, bodies):
+        index += ENTRY.pack(number, data_offset, len(body), name_offset, len(name))
+        name_offset += len(name)
+        data_offset += len(body)
+
+    # Write to a temporary file first so a running game never maps a half-written pack
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, PACK_VERSION, len(numbers)))
+            f.write(index)
+            for name in names:
+                f.write(name)
+            for body in bodies:
+                f.write(body)
+        os.chmod(temp_path, 0o644)  # mkstemp makes the file private to its owner
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(numbers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a folder of level files into a level pack")
+    parser.add_argument("maps", nargs="?", default=MAPS_DIR, help="folder of level<N>.json files")
+    parser.add_argument("--output", default=None, help="pack file to write (default: levels.pack in the maps folder)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(args.maps, "levels.pack")
+    count = build_pack(args.maps, output)
+    print(f"Packed {count} levels into {output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,128 +1,110 @@
+import os
+from collections import OrderedDict
+
+from level_pack import MAPS_DIR, PACK_PATH, LevelDirectory, LevelPack, pack_is_current
+
+MAX_CACHED_LEVELS = 16
+
+# Grid size for levels that don't give one
+GRID_WIDTH = 16
+GRID_HEIGHT = 12
+
+_level_cache = OrderedDict()  # (level source path, level number) -> CompiledLevel, least recently used first
+_sources = {}  # (maps folder, pack path) -> the LevelPack or LevelDirectory levels are read from
+
+class CompiledLevel:
+    """A level parsed once from its data file, in the forms the engine uses every turn.
+
+    Rosters and spawn points are tuples of positions and obstacles are a
+    per-tile mask laid out like Board.obstacles, so starting the level or
+    checking for spawns never goes back to the level data.
+    """
+
+    def __init__(self, number, data):
+        self.number = number
+        self.data = data  # Level data as loaded, for get_level_data()
+        self.name = data["name"]
+        self.grid_width = data.get("grid_width", GRID_WIDTH)
+        self.grid_height = data.get("grid_height", GRID_HEIGHT)
+        self.spawn_interval = data["spawn_interval"]
+        self.tutorial = data.get("tutorial", False)
+
+        # Unit rosters as (unit type name, x, y)
+        self.player_units = tuple((unit["type"], unit["x"], unit["y"]) for unit in data["player_units"])
+        self.enemy_units = tuple((unit["type"], unit["x"], unit["y"]) for unit in data["enemy_units"])
+
+        self.spawn_points = tuple((point["x"], point["y"]) for point in data["spawn_points"])
+        self.obstacles = tuple(data["obstacles"])
+        self.obstacle_mask = bytearray(self.grid_width * self.grid_height)  # 1 where an obstacle blocks the tile
+        for obstacle in self.obstacles:
+            if 0 <= obstacle["x"] < self.grid_width and 0 <= obstacle["y"] < self.grid_height:
+                self.obstacle_mask[obstacle["y"] * self.grid_width + obstacle["x"]] = 1
+
+    def is_obstacle(self, x, y):
+        """Check if an obstacle sits on a tile"""
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            return False
+        return self.obstacle_mask[y * self.grid_width + x] == 1
+
+    def obstacle_list(self):
+        """Fresh copies of the obstacle dicts, for a game to keep"""
+        return [dict(obstacle) for obstacle in self.obstacles]
+
+def level_source(maps_dir=MAPS_DIR, pack_path=PACK_PATH):
+    """The level pack if one is built and up to date, otherwise the level files themselves; opened once per process"""
+    key = (maps_dir, pack_path)
+    if key not in _sources:
+        if not os.path.exists(pack_path):
+            _sources[key] = LevelDirectory(maps_dir)
+        elif pack_is_current(maps_dir, pack_path):
+            print(f"Loading levels from {pack_path}")
+            _sources[key] = LevelPack(pack_path)
+        else:
+            print(f"{pack_path} is out of date with the level files; loading them directly "
+                  f"(rebuild it with: python level_pack.py)")
+            _sources[key] = LevelDirectory(maps_dir)
+    return _sources[key]
+
+def load_level(number, source):
+    """The compiled level, read from its source only if it isn't among the recently used ones"""
+    key = (source.path, number)
+    level = _level_cache.get(key)
+    if level is None:
+        level = CompiledLevel(number, source.read(number))
+        _level_cache[key] = level
+        if len(_level_cache) > MAX_CACHED_LEVELS:
+            _level_cache.popitem(last=False)
+    else:
+        _level_cache.move_to_end(key)
+    return level
+
 class LevelManager:
-    def __init__(self):
+    def __init__(self, maps_dir=MAPS_DIR, pack_path=PACK_PATH):
+        self.source = level_source(maps_dir, pack_path)
         self.current_level = 1
-        self.max_levels = 3
-        
+        self.numbers = self.source.numbers
+        self.max_levels = max(self.numbers, default=0)
+
     def get_level_count(self):
         """Returns the total number of available levels"""
         return self.max_levels
-        
+
+    def get_level(self, level_number):
+        """Returns the compiled level; unknown levels fall back to level 1"""
+        if level_number not in self.numbers:
+            level_number = 1
+        return load_level(level_number, self.source)
+
+    def get_level_name(self, level_number):
+        """Returns a level's name; from a level pack this doesn't load the level"""
+        if level_number in self.numbers:
+            return self.source.name(level_number)
+        return self.get_level(level_number).name
+
     def get_level_data(self, level_number):
         """Returns map data for the specified level"""
-        maps = {
-            1: {
-                "name": "Training Grounds",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 9}
-                ],
-                "spawn_interval": 5,  # Spawn new enemies every 5 turns
-                "tutorial": True,     # Show tutorial for this level
-                "obstacles": []       # No obstacles in first level
-            },
-            2: {
-                "name": "Forest Ambush",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 9},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 10}
-                ],
-                "spawn_interval": 4,  # Spawn new enemies every 4 turns
-                "tutorial": False,
-                "obstacles": [
-                    {"x": 7, "y": 3, "type": "tree"},
-                    {"x": 7, "y": 4, "type": "tree"},
-                    {"x": 8, "y": 4, "type": "tree"},
-                    {"x": 8, "y": 5, "type": "tree"},
-                    {"x": 7, "y": 8, "type": "rock"},
-                    {"x": 8, "y": 8, "type": "rock"},
-                    {"x": 8, "y": 9, "type": "rock"}
-                ]
-            },
-            3: {
-                "name": "Mountain Pass",
-                "grid_width": 16,
-                "grid_height": 12,
-                "player_units": [
-                    {"type": "INFANTRY", "x": 1, "y": 3},
-                    {"type": "INFANTRY", "x": 1, "y": 8},
-                    {"type": "ARCHER", "x": 0, "y": 5},
-                    {"type": "CAVALRY", "x": 2, "y": 6},
-                    {"type": "MAGE", "x": 0, "y": 7},
-                    {"type": "MAGE", "x": 2, "y": 4}
-                ],
-                "enemy_units": [
-                    {"type": "INFANTRY", "x": 14, "y": 3},
-                    {"type": "INFANTRY", "x": 14, "y": 8},
-                    {"type": "INFANTRY", "x": 13, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 5},
-                    {"type": "ARCHER", "x": 15, "y": 9},
-                    {"type": "CAVALRY", "x": 13, "y": 6},
-                    {"type": "CAVALRY", "x": 14, "y": 2},
-                    {"type": "MAGE", "x": 15, "y": 7}
-                ],
-                "spawn_points": [
-                    {"x": 15, "y": 2},
-                    {"x": 15, "y": 10},
-                    {"x": 13, "y": 1}
-                ],
-                "spawn_interval": 3,  # Spawn new enemies every 3 turns
-                "tutorial": False,
-                "obstacles": [
-                    {"x": 5, "y": 2, "type": "rock"},
-                    {"x": 5, "y": 3, "type": "rock"},
-                    {"x": 6, "y": 3, "type": "rock"},
-                    {"x": 6, "y": 4, "type": "rock"},
-                    {"x": 7, "y": 4, "type": "tree"},
-                    {"x": 7, "y": 5, "type": "tree"},
-                    {"x": 8, "y": 5, "type": "tree"},
-                    {"x": 8, "y": 6, "type": "tree"},
-                    {"x": 9, "y": 6, "type": "rock"},
-                    {"x": 9, "y": 7, "type": "rock"},
-                    {"x": 8, "y": 7, "type": "rock"},
-                    {"x": 8, "y": 8, "type": "tree"},
-                    {"x": 7, "y": 8, "type": "tree"},
-                    {"x": 7, "y": 9, "type": "tree"},
-                    {"x": 6, "y": 9, "type": "rock"},
-                    {"x": 6, "y": 10, "type": "rock"}
-                ]
-            }
-        }
-        
-        return maps.get(level_number, maps[1])  # Default to level 1 if level not found
-    
+        return self.get_level(level_number).data
+
     def next_level(self):
         """Advance to the next level if available"""
         if self.current_level < self.max_levels:
@@ -1,6 +1,8 @@
 import pygame
-import os
+from fonts import get_font
+from render_scheduler import RenderScheduler
 from game_data import load_game
+from save_load import check_save_exists
 
 class MainMenu:
     def __init__(self, screen, screen_width, screen_height):
@@ -8,13 +10,13 @@ class MainMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 64)
-        self.menu_font = pygame.font.SysFont(None, 36)
+        self.title_font = get_font(64)
+        self.menu_font = get_font(36)
         self.selected_option = 0
         self.options = ["Start Game", "Quit"]
         
         # Add "Load Game" option if save exists
-        if os.path.exists('savegame.json'):
+        if check_save_exists():
             self.options.insert(1, "Load Game")
             
         # Add "Level Select" option
@@ -44,11 +46,12 @@ class MainMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -56,9 +59,10 @@ class MainMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Quit"
 
@@ -68,9 +72,9 @@ class LevelSelectMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.selected_level = 0
         self.levels = [
             {"name": "Level 1: Training Grounds", "difficulty": "Easy"},
@@ -115,11 +119,12 @@ class LevelSelectMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -127,9 +132,10 @@ class LevelSelectMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Quit"
 
@@ -139,9 +145,9 @@ class LevelTransition:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.level_completed = level_completed
         self.next_level = next_level
         self.timer = 0
@@ -193,8 +199,8 @@ class InventoryMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         self.selected_item = 0 if unit.inventory else -1
     
     def draw(self):
@@ -257,11 +263,12 @@ class InventoryMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -269,9 +276,10 @@ class InventoryMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 
@@ -282,8 +290,8 @@ class AbilityMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         
         from game_data import Ability
         self.ability_data = Ability.get_ability_data(unit.ability)
@@ -340,11 +348,12 @@ class AbilityMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -352,9 +361,10 @@ class AbilityMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 
@@ -364,8 +374,8 @@ class TutorialPopup:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.tutorial_step = tutorial_step
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.text_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.text_font = get_font(24)
     
     def draw(self):
         # Create semi-transparent overlay
@@ -408,19 +418,21 @@ class TutorialPopup:
         return False
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return False
                 
                 if self.handle_event(event):
                     return True
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return False
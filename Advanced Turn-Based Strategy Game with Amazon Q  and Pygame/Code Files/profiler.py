@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+from fonts import get_font
+
+ROLLING_FRAMES = 120  # Frames shown in the HUD graph
+MAX_TRACE_EVENTS = 200000  # Oldest trace events are dropped past this many
+TRACE_FILE = "profile_trace.json"
+
+# Frame graph colors by section category; anything else in a frame shows as "other"
+CATEGORY_COLORS = [
+    ("events", (80, 160, 255)),
+    ("draw", (80, 200, 120)),
+    ("units", (240, 200, 60)),
+    ("ai_turn", (230, 90, 90)),
+]
+OTHER_COLOR = (120, 120, 120)
+SPAN_COLOR = (230, 90, 90)  # Strip under frames drawn while a span (AI planning) was open
+
+# AIController methods timed on the planning thread; plan_turn's own time covers the rest of a turn.
+# Moves are scored by find_move_options and handed out by assign_moves (find_best_move isn't used in a turn).
+AI_PHASES = ["plan_turn", "update_influence", "plan_quick_turn", "should_use_ability", "use_ability",
+             "find_best_attack_target", "find_move_options", "assign_moves", "search"]
+
+class _NullSection:
+    """Stands in for a section while the profiler is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SECTION = _NullSection()
+
+class _Section:
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.child_time = 0.0
+        self.stack = self.profiler.stack()
+        self.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.stack.pop()
+        duration = end - self.start
+        if self.stack:
+            self.stack[-1].child_time += duration
+        self.profiler.record(self, duration, not self.stack)
+        return False
+
+class FrameProfiler:
+    """Times named sections of frames and AI turns while enabled.
+
+    Sections nest; each one's own time (minus the sections inside it) is
+    added to its category for the current frame, so a frame's categories
+    add up to no more than the frame. Sections timed on other threads (the
+    AI planner) are summed by name into the last finished turn instead.
+    Every section is also kept as a Chrome trace event for export_trace().
+    Spans time something that runs across frames, such as the AI planning
+    in the background from the start of its turn until the game picks up
+    the plan; frames drawn meanwhile are marked in the graph.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.main_thread = threading.get_ident()
+        self.local = threading.local()
+        self.frames = deque(maxlen=ROLLING_FRAMES)  # (frame seconds, {category: seconds}, span open)
+        self.frame_start = None
+        self.frame_totals = {}  # Main thread: {category: seconds} of the frame in progress
+        self.turn_totals = {}  # Planning thread: {name: [seconds, calls]} of the turn in progress
+        self.last_turn = {}  # The same for the last finished turn
+        self.last_turn_time = 0.0
+        self.open_spans = 0
+        self.last_spans = {}  # Name -> seconds of the last finished span
+        self.trace = deque(maxlen=MAX_TRACE_EVENTS)
+
+    def stack(self):
+        """Sections open on the calling thread"""
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def section(self, name, category):
+        """Context manager timing a block as one section"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name, category)
+
+    def record(self, section, duration, outermost):
+        own_time = duration - section.child_time
+        thread = threading.get_ident()
+        self.trace.append({
+            "name": section.name, "cat": section.category, "ph": "X",
+            "ts": (section.start - self.origin) * 1e6, "dur": duration * 1e6,
+            "pid": os.getpid(), "tid": thread
+        })
+
+        if thread == self.main_thread:
+            self.frame_totals[section.category] = self.frame_totals.get(section.category, 0.0) + own_time
+            return
+
+        totals = self.turn_totals.setdefault(section.name, [0.0, 0])
+        totals[0] += own_time
+        totals[1] += 1
+        if outermost:
+            # Swapped in whole so the main thread never reads a half-built turn
+            self.last_turn = self.turn_totals
+            self.last_turn_time = duration
+            self.turn_totals = {}
+
+    def begin_span(self, name, category):
+        """Start timing something that outlasts a frame; returns the span for end_span(), or None while off"""
+        if not self.enabled:
+            return None
+        self.open_spans += 1
+        return (name, category, time.perf_counter())
+
+    def end_span(self, span):
+        if span is None:
+            return
+        name, category, start = span
+        duration = time.perf_counter() - start
+        self.open_spans -= 1
+        self.last_spans[name] = duration
+        self.trace.append({
+            "name": name, "cat": category, "ph": "X",
+            "ts": (start - self.origin) * 1e6, "dur": duration * 1e6,
+            "pid": os.getpid(), "tid": threading.get_ident()
+        })
+
+    def instrument(self, obj, names, category):
+        """Time every call of the named methods of one object (names it lacks are skipped)"""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self.timed(method, name, category))
+
+    def timed(self, method, name, category):
+        def call(*args, **kwargs):
+            with self.section(name, category):
+                return method(*args, **kwargs)
+        return call
+
+    def begin_frame(self):
+        """Start timing a frame; a frame that is never ended (nothing was drawn) is left out of the graph"""
+        self.frame_start = time.perf_counter()
+        self.frame_totals = {}
+
+    def end_frame(self):
+        """Close the frame begun by begin_frame() and add it to the graph"""
+        if self.enabled and self.frame_start is not None:
+            self.frames.append((time.perf_counter() - self.frame_start, self.frame_totals, self.open_spans > 0))
+        self.frame_start = None
+        self.frame_totals = {}
+
+    def averages(self):
+        """Mean frame time and mean time per category over the frames in the graph, in seconds"""
+        if not self.frames:
+            return 0.0, {}
+        totals = {}
+        for _, categories, _ in self.frames:
+            for category, seconds in categories.items():
+                totals[category] = totals.get(category, 0.0) + seconds
+        count = len(self.frames)
+        return (sum(frame for frame, _, _ in self.frames) / count,
+                {category: seconds / count for category, seconds in totals.items()})
+
+    def export_trace(self, filename=TRACE_FILE):
+        """Write the recorded sections as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident,
+                  "args": {"name": thread.name}} for thread in threading.enumerate()]
+        with open(filename, 'w') as f:
+            json.dump({"traceEvents": names + list(self.trace), "displayTimeUnit": "ms"}, f)
+        return len(self.trace)
+
+class ProfilerHUD:
+    """Overlay with the rolling frame-time graph and the last AI turn's phases"""
+
+    GRAPH_WIDTH = 2 * ROLLING_FRAMES
+    GRAPH_HEIGHT = 80
+    GRAPH_MS = 50.0  # Frame time at the top of the graph
+    TEXT_INTERVAL = 500  # Milliseconds between updates of the figures, so they stay readable
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.font = get_font(16)
+        self.lines = []
+        self.next_text_at = 0
+
+    def update_text(self):
+        frame_time, categories = self.profiler.averages()
+        lines = [(f"Frame {frame_time * 1000:.1f} ms ({len(self.profiler.frames)} frames)", (255, 255, 255))]
+        for category, color in CATEGORY_COLORS:
+            lines.append((f"{category} {categories.get(category, 0.0) * 1000:.1f} ms", color))
+
+        planning = self.profiler.last_spans.get("ai_planning")
+        if planning is not None:
+            lines.append((f"AI planning, start to pickup {planning * 1000:.0f} ms", SPAN_COLOR))
+
+        last_turn = self.profiler.last_turn
+        if last_turn:
+            lines.append((f"Last AI turn {self.profiler.last_turn_time * 1000:.0f} ms", (255, 255, 255)))
+            for name, (seconds, calls) in sorted(last_turn.items(), key=lambda item: -item[1][0]):
+                lines.append((f"  {name} {seconds * 1000:.1f} ms x{calls}", (200, 200, 200)))
+        self.lines = lines
+
+    def draw(self, screen, top=50):
+        now = pygame.time.get_ticks()
+        if now >= self.next_text_at:
+            self.update_text()
+            self.next_text_at = now + self.TEXT_INTERVAL
+
+        line_height = self.font.size("Ag")[1]
+        panel = pygame.Rect(0, top, self.GRAPH_WIDTH + 10, self.GRAPH_HEIGHT + 15 + line_height * len(self.lines))
+        panel.right = screen.get_width() - 5
+        background = pygame.Surface(panel.size, pygame.SRCALPHA)
+        background.fill((0, 0, 0, 180))
+        screen.blit(background, panel.topleft)
+
+        # One stacked bar per frame, newest on the right
+        graph = pygame.Rect(panel.x + 5, panel.y + 5, self.GRAPH_WIDTH, self.GRAPH_HEIGHT)
+        scale = graph.height / (self.GRAPH_MS / 1000)
+        x = graph.right - 2 * len(self.profiler.frames)
+        for frame_time, categories, span_open in list(self.profiler.frames):
+            if span_open:
+                pygame.draw.rect(screen, SPAN_COLOR, (x, graph.bottom + 1, 2, 3))
+            bottom = graph.bottom
+            for category, color in CATEGORY_COLORS + [(None, OTHER_COLOR)]:
+                if category is None:
+                    seconds = frame_time - sum(categories.values())
+                else:
+                    seconds = categories.get(category, 0.0)
+                height = min(bottom - graph.top, int(seconds * scale))
+                if height > 0:
+                    pygame.draw.rect(screen, color, (x, bottom - height, 2, height))
+                    bottom -= height
+            x += 2
+
+        # 60 fps budget line
+        budget_y = graph.bottom - int(scale / 60)
+        pygame.draw.line(screen, (255, 255, 255), (graph.left, budget_y), (graph.right, budget_y))
+
+        y = graph.bottom + 5
+        for text, color in self.lines:
+            screen.blit(self.font.render(text, True, color), (graph.left, y))
+            y += line_height
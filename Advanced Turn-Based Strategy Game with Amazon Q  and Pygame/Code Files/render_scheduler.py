@@ -0,0 +1,38 @@
+import pygame
+
+class RenderScheduler:
+    """Redraw only when something changed and sleep in pygame.event.wait otherwise"""
+
+    def __init__(self, max_fps=60, idle_timeout=500):
+        self.max_fps = max_fps
+        self.idle_timeout = idle_timeout  # Longest time (ms) to block waiting for input
+        self.clock = pygame.time.Clock()
+        self.dirty = True  # Draw the first frame
+        self.animating = False  # Redraw every frame while an animation is playing
+
+    def mark_dirty(self):
+        """Request a redraw on the next loop iteration"""
+        self.dirty = True
+
+    def get_events(self):
+        """Return pending events, blocking until input arrives when nothing needs drawing"""
+        if self.dirty or self.animating:
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(self.idle_timeout)
+            events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+
+        # Anything but pointer motion may change what is on screen
+        if any(event.type != pygame.MOUSEMOTION for event in events):
+            self.dirty = True
+
+        return events
+
+    def should_draw(self):
+        """Check if the screen needs to be redrawn this iteration"""
+        return self.dirty or self.animating
+
+    def frame_drawn(self):
+        """Mark the screen as up to date and cap the frame rate"""
+        self.dirty = False
+        self.clock.tick(self.max_fps)
@@ -0,0 +1,107 @@
+import argparse
+import time
+
+from action_log import ActionLog, MATCH_LOG_FILE
+from engine import GameEngine
+from unit import UnitType
+
+class ReplayError(Exception):
+    """A logged action could not be applied, so the replay no longer matches the match"""
+
+class Replay:
+    """Re-applies an ActionLog on a headless GameEngine as fast as the rules allow.
+
+    No AI runs during a replay; spawns come from the log rather than the
+    random streams. seek() starts from the closest checkpoint.
+    """
+
+    def __init__(self, log):
+        self.log = log
+
+    def engine_from(self, state, rng_state):
+        engine = GameEngine(load_state=state, seed=self.log.seed,
+                            checkpoint_interval=self.log.checkpoint_interval)
+        engine.rng.set_state(rng_state)
+        return engine
+
+    def start(self):
+        """Engine in the state the log starts from"""
+        return self.engine_from(self.log.start_state, self.log.rng_state)
+
+    def apply(self, engine, record):
+        """Apply one logged action; raises ReplayError if it no longer applies"""
+        action = record["action"]
+
+        if action == "end_turn":
+            engine.end_turn(spawn=False)
+            return
+        if action == "spawn":
+            engine.spawn_unit(UnitType[record["unit_type"]], record["x"], record["y"], record["owner"])
+            return
+
+        unit = engine.unit_by_uid(record["unit"])
+        if unit is None:
+            raise ReplayError(f"Unit {record['unit']} not found for {action} on turn {record['turn']}")
+
+        if action == "move":
+            applied = engine.move_unit(unit, record["x"], record["y"])
+        elif action == "attack":
+            target = engine.unit_by_uid(record["target"])
+            applied = target is not None and engine.attack_unit(unit, target) is not None
+        elif action == "ability":
+            applied = engine.activate_ability(unit, record["x"], record["y"])
+        elif action == "item":
+            applied, _ = engine.use_item(unit, record["index"])
+        else:
+            raise ReplayError(f"Unknown action {action}")
+
+        if not applied:
+            raise ReplayError(f"Could not apply {action} of unit {unit.uid} on turn {record['turn']}")
+
+    def run(self, engine=None, start_index=0, until_turn=None):
+        """Apply the records from start_index on, stopping before the first action of until_turn"""
+        if engine is None:
+            engine = self.start()
+
+        for record in self.log.records[start_index:]:
+            # Spawns belong to the start of their turn, so they are applied before stopping
+            if until_turn is not None and record["turn"] >= until_turn and record["action"] != "spawn":
+                break
+            self.apply(engine, record)
+
+        return engine
+
+    def seek(self, turn):
+        """Engine as it was when the given turn started"""
+        checkpoints = [checkpoint for checkpoint in self.log.checkpoints if checkpoint["turn"] <= turn]
+        if not checkpoints:
+            return self.run(until_turn=turn)
+
+        checkpoint = checkpoints[-1]
+        engine = self.engine_from(checkpoint["state"], checkpoint["rng_state"])
+        return self.run(engine, checkpoint["index"], until_turn=turn)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a logged match headlessly")
+    parser.add_argument("log", nargs="?", default=MATCH_LOG_FILE, help="action log to replay")
+    parser.add_argument("--turn", type=int, help="stop at the start of this turn (uses checkpoints)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times, for benchmarking")
+    args = parser.parse_args()
+
+    log = ActionLog.load(args.log)
+    replay = Replay(log)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        engine = replay.seek(args.turn) if args.turn is not None else replay.run()
+    elapsed = time.perf_counter() - start
+
+    if args.turn is None and engine.log.records != log.records:
+        print("Warning: the replay logged different actions than the original match")
+
+    print(f"Turn {engine.turn_count}, player {engine.current_player} to move, {len(engine.units)} units, "
+          f"winner {engine.winner}")
+    print(f"Replayed {len(log.records)} actions x{args.repeat} in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
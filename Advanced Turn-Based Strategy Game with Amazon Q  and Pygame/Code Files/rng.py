@@ -0,0 +1,29 @@
+import random
+
+class RandomService:
+    """Seeded random number streams for one match.
+
+    Each consumer (enemy spawns, each AI side) draws from its own named
+    stream, so the same seed gives the same match no matter how many
+    numbers other consumers use.
+    """
+
+    def __init__(self, seed=None):
+        # Without a seed, draw one from the global generator so random.seed() still fixes the match
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.streams = {}
+
+    def stream(self, name):
+        """The random.Random for a consumer, created on first use"""
+        if name not in self.streams:
+            self.streams[name] = random.Random(f"{self.seed}-{name}")
+        return self.streams[name]
+
+    def get_state(self):
+        """State of every stream, for checkpoints"""
+        return {name: stream.getstate() for name, stream in self.streams.items()}
+
+    def set_state(self, state):
+        """Restore stream states from get_state() (also accepts them after a JSON round trip)"""
+        for name, (version, internal, gauss) in state.items():
+            self.stream(name).setstate((version, tuple(internal), gauss))
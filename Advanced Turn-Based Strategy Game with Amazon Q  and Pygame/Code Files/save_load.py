@@ -1,28 +1,189 @@
 import json
 import os
+import struct
+import tempfile
+import zlib
 
-def save_game(game_state, filename="savegame.json"):
-    """Save the game state to a JSON file"""
+from unit import Unit, UnitType
+from abilities import AbilityType, ItemType
+from effects import Effect, EffectSet, EffectType
+
+SAVE_FILE = "savegame.sav"
+LEGACY_SAVE_FILE = "savegame.json"  # Plain JSON saves from older versions
+
+# Binary save layout: file header, then a zlib-compressed body of
+# game header, grid size, obstacle type names, obstacles, units, items and effects
+MAGIC = b"TBSG"
+SAVE_VERSION = 3  # Version 2 added the grid size, version 3 the unit uids
+FILE_HEADER = struct.Struct("<4sH")  # magic, format version
+GAME_HEADER = struct.Struct("<HBIHIIII")  # level, current player, turn count, type names, obstacles, units, items, effects
+GRID = struct.Struct("<HH")  # grid width, grid height
+OBSTACLE = struct.Struct("<HHB")  # x, y, type name index
+UNIT = struct.Struct("<IBBHHiiiihhBhBB")  # uid (0 for none), type, player, x, y, hp, max_hp, attack, defense,
+                                         # move range, attack range, ability, cooldown, item count, effect count
+UNIT_V2 = struct.Struct("<BBHHiiiihhBhBB")  # The same without the uid, in saves before version 3
+EFFECT = struct.Struct("<Bhhh")  # type, duration, value, uses
+NO_TYPE = 255  # Obstacle without a type name
+
+EFFECT_TYPES = list(EffectType)
+EFFECT_CODES = {effect_type: code for code, effect_type in enumerate(EFFECT_TYPES)}
+UNIT_TYPES = {unit_type.value: unit_type for unit_type in UnitType}
+ABILITY_TYPES = {ability.value: ability for ability in AbilityType}
+ITEM_TYPES = {item.value: item for item in ItemType}
+
+def encode_game(game_state):
+    """Pack a game state (as returned by GameEngine.get_state) into the binary save format"""
+    obstacles = game_state["obstacles"]
+    units = game_state["units"]
+    type_names = sorted({obstacle["type"] for obstacle in obstacles if "type" in obstacle})
+    type_codes = {name: code for code, name in enumerate(type_names)}
+
+    items = bytearray()
+    effects = []
+    unit_records = []
+    for unit in units:
+        unit_effects = unit["active_effects"]
+        unit_records.append(UNIT.pack(
+            unit.get("uid") or 0, UnitType[unit["unit_type"]].value, unit["player"], unit["x"], unit["y"],
+            unit["hp"], unit["max_hp"], unit["attack"], unit["defense"],
+            unit["move_range"], unit["attack_range"],
+            AbilityType[unit["ability"]].value, unit["ability_cooldown"],
+            len(unit["inventory"]), len(unit_effects)
+        ))
+        items.extend(ItemType[item].value for item in unit["inventory"])
+        effects.extend(Effect.from_dict(effect) for effect in unit_effects)
+
+    body = [GAME_HEADER.pack(game_state["current_level"], game_state["current_player"], game_state["turn_count"],
+                             len(type_names), len(obstacles), len(units), len(items), len(effects)),
+            GRID.pack(game_state["grid_width"], game_state["grid_height"])]
+    for name in type_names:
+        encoded = name.encode("utf-8")
+        body.append(bytes([len(encoded)]) + encoded)
+    body.extend(OBSTACLE.pack(obstacle["x"], obstacle["y"], type_codes.get(obstacle.get("type"), NO_TYPE))
+                for obstacle in obstacles)
+    body.extend(unit_records)
+    body.append(bytes(items))
+    body.extend(EFFECT.pack(EFFECT_CODES[effect.effect_type], effect.duration, effect.value, effect.uses)
+                for effect in effects)
+
+    return FILE_HEADER.pack(MAGIC, SAVE_VERSION) + zlib.compress(b"".join(body))
+
+def decode_game(data):
+    """Unpack a binary save; units come back as ready-built Unit objects"""
+    magic, version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a save file")
+    if version > SAVE_VERSION:
+        raise ValueError(f"Save format version {version} is newer than this game supports")
+
+    body = memoryview(zlib.decompress(data[FILE_HEADER.size:]))
+    level, current_player, turn_count, name_count, obstacle_count, unit_count, item_count, effect_count = \
+        GAME_HEADER.unpack_from(body)
+    offset = GAME_HEADER.size
+
+    # Older saves leave the grid size to the level
+    grid_size = None
+    if version >= 2:
+        grid_size = GRID.unpack_from(body, offset)
+        offset += GRID.size
+
+    type_names = []
+    for _ in range(name_count):
+        length = body[offset]
+        type_names.append(bytes(body[offset + 1:offset + 1 + length]).decode("utf-8"))
+        offset += 1 + length
+
+    obstacles = []
+    end = offset + obstacle_count * OBSTACLE.size
+    for x, y, type_code in OBSTACLE.iter_unpack(body[offset:end]):
+        obstacle = {"x": x, "y": y}
+        if type_code != NO_TYPE:
+            obstacle["type"] = type_names[type_code]
+        obstacles.append(obstacle)
+    offset = end
+
+    # Older saves have no uids; the engine gives the units new ones
+    if version >= 3:
+        end = offset + unit_count * UNIT.size
+        unit_records = list(UNIT.iter_unpack(body[offset:end]))
+    else:
+        end = offset + unit_count * UNIT_V2.size
+        unit_records = [(0,) + record for record in UNIT_V2.iter_unpack(body[offset:end])]
+    offset = end
+    items = body[offset:offset + item_count]
+    offset += item_count
+    end = offset + effect_count * EFFECT.size
+    effects = [Effect(EFFECT_TYPES[code], duration, value, uses)
+               for code, duration, value, uses in EFFECT.iter_unpack(body[offset:end])]
+
+    units = []
+    next_item = 0
+    next_effect = 0
+    for (uid, unit_type, player, x, y, hp, max_hp, attack, defense, move_range, attack_range,
+         ability, cooldown, unit_items, unit_effects) in unit_records:
+        units.append(Unit.restore(
+            UNIT_TYPES[unit_type], x, y, player, hp, max_hp, attack, defense, move_range, attack_range,
+            ABILITY_TYPES[ability], cooldown,
+            [ITEM_TYPES[item] for item in items[next_item:next_item + unit_items]],
+            EffectSet(effects[next_effect:next_effect + unit_effects]),
+            uid=uid or None
+        ))
+        next_item += unit_items
+        next_effect += unit_effects
+
+    game_state = {
+        "current_level": level,
+        "current_player": current_player,
+        "turn_count": turn_count,
+        "units": units,
+        "obstacles": obstacles
+    }
+    if grid_size is not None:
+        game_state["grid_width"], game_state["grid_height"] = grid_size
+    return game_state
+
+def write_atomic(filename, data):
+    """Write a file through a temporary file in the same folder, so a crash never leaves half a file"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(prefix=".savegame-", dir=directory)
     try:
-        with open(filename, 'w') as f:
-            json.dump(game_state, f)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def save_game(game_state, filename=SAVE_FILE):
+    """Save the game state to a compressed binary file"""
+    try:
+        write_atomic(filename, encode_game(game_state))
         print(f"Game saved to {filename}")
         return True
     except Exception as e:
         print(f"Error saving game: {e}")
         return False
 
-def load_game(filename="savegame.json"):
-    """Load the game state from a JSON file"""
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading game: {e}")
+def load_game(filename=SAVE_FILE):
+    """Load the game state from a binary save, or from an older JSON save"""
+    if not os.path.exists(filename):
+        if filename != SAVE_FILE or not os.path.exists(LEGACY_SAVE_FILE):
             return None
-    return None
+        filename = LEGACY_SAVE_FILE
+
+    try:
+        with open(filename, 'rb') as f:
+            data = f.read()
+        if data.startswith(MAGIC):
+            return decode_game(data)
+        return json.loads(data)
+    except Exception as e:
+        print(f"Error loading game: {e}")
+        return None
 
-def check_save_exists(filename="savegame.json"):
+def check_save_exists(filename=SAVE_FILE):
     """Check if a save file exists"""
-    return os.path.exists(filename)
+    return os.path.exists(filename) or (filename == SAVE_FILE and os.path.exists(LEGACY_SAVE_FILE))
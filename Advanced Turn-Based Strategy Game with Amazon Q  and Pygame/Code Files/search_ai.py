@@ -0,0 +1,329 @@
+import random
+from collections import OrderedDict
+
+import numpy as np
+
+from ai_controller import AIController, AIStrategy
+from ai_fields import TurnFields
+from abilities import AbilityType
+from unit_store import UnitStore
+
+SEARCH_DIFFICULTY = 4  # Difficulty tier that plays SearchAIController
+SEARCH_TIME_BUDGET = 0.3  # Seconds per turn when no budget is given
+
+# Most positions remembered by the transposition table
+TT_SIZE = 50000
+# Largest HP and cooldown values given their own hash keys; higher values share the last one
+HASH_HP_LEVELS = 256
+HASH_COOLDOWN_LEVELS = 8
+WIN_SCORE = 100000.0
+
+# Transposition table bound types
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class SearchTimeout(Exception):
+    """The time budget ran out in the middle of a search"""
+
+# Uids given keys up front; the table doubles when a higher uid shows up
+ZOBRIST_UID_CAPACITY = 64
+
+def mix64(keys):
+    """SplitMix64 finalizer over an array of uint64, so combined keys don't XOR-cancel"""
+    keys = keys ^ (keys >> np.uint64(30))
+    keys = keys * np.uint64(0xBF58476D1CE4E5B9)
+    keys = keys ^ (keys >> np.uint64(27))
+    keys = keys * np.uint64(0x94D049BB133111EB)
+    return keys ^ (keys >> np.uint64(31))
+
+class ZobristTable:
+    """Random 64-bit keys XORed into a position hash.
+
+    Each uid has keys of its own for position, HP and cooldown, and so do
+    every tile, HP value and cooldown value; a unit's key for a tile is the
+    two mixed together. Memory grows with units plus tiles rather than
+    units times tiles, which matters on big maps with many spawns.
+    """
+
+    def __init__(self, grid_width, grid_height, seed=0):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.random = np.random.default_rng(seed)
+        self.tile_keys = self._random_keys((grid_height, grid_width))
+        self.hp_keys = self._random_keys((HASH_HP_LEVELS,))
+        self.cooldown_keys = self._random_keys((HASH_COOLDOWN_LEVELS,))
+        self.side_keys = self._random_keys((2,))
+        self.uid_keys = self._random_keys((ZOBRIST_UID_CAPACITY, 3))  # Position, HP and cooldown key of each uid
+        self.capacity = ZOBRIST_UID_CAPACITY
+
+    def _random_keys(self, shape):
+        count = int(np.prod(shape))
+        return np.frombuffer(self.random.bytes(8 * count), dtype=np.uint64).reshape(shape).copy()
+
+    def _ensure_uids(self, max_uid):
+        """Draw keys for uids not seen before, doubling the capacity so spawns rarely copy the table"""
+        if max_uid < self.capacity:
+            return
+        capacity = self.capacity
+        while capacity <= max_uid:
+            capacity *= 2
+        uid_keys = np.empty((capacity, 3), dtype=np.uint64)
+        uid_keys[:self.capacity] = self.uid_keys
+        uid_keys[self.capacity:] = self._random_keys((capacity - self.capacity, 3))
+        self.uid_keys = uid_keys
+        self.capacity = capacity
+
+    def hash(self, store, side_to_move):
+        """Hash of unit positions, HP and cooldowns, plus whose turn it is"""
+        uids = store.uid
+        if len(uids):
+            self._ensure_uids(int(uids.max()))
+        hp = np.clip(store.hp, 0, HASH_HP_LEVELS - 1)
+        cooldown = np.clip(store.ability_cooldown, 0, HASH_COOLDOWN_LEVELS - 1)
+        unit_keys = self.uid_keys[uids]
+        keys = (mix64(unit_keys[:, 0] ^ self.tile_keys[store.y, store.x]) ^
+                mix64(unit_keys[:, 1] ^ self.hp_keys[hp]) ^
+                mix64(unit_keys[:, 2] ^ self.cooldown_keys[cooldown]))
+        return int(np.bitwise_xor.reduce(keys, initial=np.uint64(0)) ^ self.side_keys[side_to_move])
+
+class TranspositionTable:
+    """Bounded map of position hash -> (depth, bound type, score, best plan index), dropping the least recently used"""
+
+    def __init__(self, size=TT_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, depth, bound, score, best_index):
+        self.entries[key] = (depth, bound, score, best_index)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+class SearchAIController(AIController):
+    """Looks ahead over whole-side turns with alpha-beta search.
+
+    Candidate turns for either side are the greedy plans of the regular AI
+    under each strategy, plus holding position. Turns are simulated on
+    UnitStore copies, positions are scored with evaluate_move and
+    evaluate_attack_target, and results are kept in a transposition table
+    keyed by Zobrist hashes. The search deepens one turn at a time until
+    time_budget (seconds) runs out and plays the deepest finished result.
+    """
+
+    def __init__(self, difficulty=SEARCH_DIFFICULTY, player=1, rng=None, time_budget=SEARCH_TIME_BUDGET, max_depth=4):
+        # Heuristics, and the difficulty they're weighted by, are those of the hard AI; the search adds the lookahead
+        super().__init__(difficulty=3, player=player, rng=rng, time_budget=time_budget)
+        self.search_difficulty = difficulty
+        self.max_depth = max_depth
+        self.table = TranspositionTable()
+        self.zobrist = None
+        self.nodes = 0
+        self.completed_depth = 0
+
+        # Noise-free copies of the regular AI, one per side, that propose candidate turns
+        self.planners = {}
+        for side in (0, 1):
+            planner = AIController(difficulty=3, player=side, rng=random.Random(0))
+            planner.noise = 0
+            self.planners[side] = planner
+
+    def plan_turn(self, ai_units, player_units, all_units, obstacles, grid_width, grid_height, board=None):
+        """Search for the best whole-side turn and return it as regular AI actions"""
+        # Ability use still comes from the one-ply heuristics, which are also the plan if time runs out
+        greedy_actions = super().plan_turn(ai_units, player_units, all_units, obstacles,
+                                           grid_width, grid_height, board)
+        if not ai_units or not player_units or self.out_of_time():
+            return greedy_actions
+
+        if board is not None:
+            blocked = np.frombuffer(bytes(board.obstacles), dtype=np.uint8).reshape(board.height, board.width) == 1
+        else:
+            blocked = np.zeros((grid_height, grid_width), dtype=bool)
+            for obstacle in obstacles:
+                blocked[obstacle["y"], obstacle["x"]] = True
+        if self.zobrist is None or (self.zobrist.grid_width, self.zobrist.grid_height) != (grid_width, grid_height):
+            self.zobrist = ZobristTable(grid_width, grid_height)
+
+        store = UnitStore.from_units(all_units)
+        plan = self.search(store, blocked)
+        return self.merge_plan(store, plan, greedy_actions, board)
+
+    def search(self, store, blocked):
+        """Iterative deepening until the turn's deadline: returns the plan (store actions) of the deepest finished search"""
+        self.blocked = blocked
+        self.nodes = 0
+        self.completed_depth = 0
+
+        plans = self.candidate_plans(store, self.player)
+        best_plan = plans[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                _, best_index = self.alpha_beta(store, self.player, depth, -np.inf, np.inf)
+            except SearchTimeout:
+                break
+            best_plan = plans[best_index]
+            self.completed_depth = depth
+            if self.out_of_time():
+                break
+        return best_plan
+
+    def alpha_beta(self, store, side, depth, alpha, beta):
+        """Score a position for self.player (side is to move); returns (score, index of best plan)"""
+        self.nodes += 1
+        if self.out_of_time():
+            raise SearchTimeout()
+
+        alive = store.player
+        if not np.any(alive == self.player):
+            return -WIN_SCORE - depth, 0  # Losing later is better than losing now
+        if not np.any(alive != self.player):
+            return WIN_SCORE + depth, 0
+        if depth == 0:
+            return self.evaluate_position(store), 0
+
+        key = self.zobrist.hash(store, side)
+        entry = self.table.get(key)
+        first_index = 0
+        if entry is not None:
+            entry_depth, bound, score, first_index = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score, first_index
+                if bound == LOWER and score >= beta:
+                    return score, first_index
+                if bound == UPPER and score <= alpha:
+                    return score, first_index
+
+        plans = self.candidate_plans(store, side)
+        # Try the best plan from an earlier, shallower search first
+        order = [first_index] + [index for index in range(len(plans)) if index != first_index] \
+            if first_index < len(plans) else list(range(len(plans)))
+
+        maximizing = side == self.player
+        original_alpha, original_beta = alpha, beta
+        best_score = -np.inf if maximizing else np.inf
+        best_index = order[0]
+        for index in order:
+            child = store.copy()
+            child.apply_ai_actions(plans[index], self.blocked)
+            child.end_turn(side)
+            score, _ = self.alpha_beta(child, 1 - side, depth - 1, alpha, beta)
+
+            if maximizing and score > best_score:
+                best_score, best_index = score, index
+                alpha = max(alpha, score)
+            elif not maximizing and score < best_score:
+                best_score, best_index = score, index
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= original_beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.put(key, depth, bound, best_score, best_index)
+        return best_score, best_index
+
+    def candidate_plans(self, store, side):
+        """Distinct whole-side turns worth searching: a greedy plan per strategy, then holding position"""
+        planner = self.planners[side]
+        views = [view for view in store.views() if view.player == side]
+        fields = TurnFields.from_store(store, side, self.blocked, planner.calculate_store_threats, views)
+
+        plans = []
+        seen = set()
+        for strategy in (AIStrategy.AGGRESSIVE, AIStrategy.BALANCED, AIStrategy.DEFENSIVE, AIStrategy.ABILITY_FOCUSED):
+            planner.strategy = strategy
+            plan = planner.process_store_turn(store, self.blocked, fields)
+            key = repr(plan)
+            if key not in seen:
+                seen.add(key)
+                plans.append(plan)
+
+        # Attack without moving
+        hold = [{"row": action["row"], "actions": {name: value for name, value in action["actions"].items()
+                                                   if name == "attack"}} for action in plans[0]]
+        if repr(hold) not in seen:
+            plans.append(hold)
+        return plans
+
+    def evaluate_position(self, store):
+        """Score a position for self.player: unit value balance plus evaluate_move/evaluate_attack_target"""
+        own_rows = np.flatnonzero(store.player == self.player)
+        enemy_rows = np.flatnonzero(store.player != self.player)
+        threats = self.calculate_store_threats(store, np.arange(len(store)))
+        values = threats + store.hp
+        score = float(values[own_rows].sum() - values[enemy_rows].sum())
+
+        # Positional terms from the one-ply heuristics, with the noise turned off
+        views = store.views()
+        own_units = [views[row] for row in own_rows]
+        noise, board = self.noise, self.board
+        self.noise = 0
+        self.board = None  # Store rows bypass the threat cache of the real units
+        self.fields = TurnFields.from_store(store, self.player, self.blocked, self.calculate_store_threats, own_units)
+        positional = 0.0
+        for unit in own_units:
+            positional += float(self.score_moves(unit, [(unit.x, unit.y)])[0])
+            targets = store.enemies_in_range(unit.row)
+            if len(targets):
+                positional += 0.5 * max(self.evaluate_attack_target(unit, views[row]) for row in targets)
+        self.noise, self.board = noise, board
+        self.fields = None
+
+        return score + 0.2 * positional / max(1, len(own_units))
+
+    def merge_plan(self, store, plan, greedy_actions, board):
+        """Turn a store plan back into actions on Unit objects, keeping the greedy ability choices"""
+        abilities = {}
+        for action_data in greedy_actions:
+            ability = action_data["actions"].get("ability")
+            # Teleporting would move the unit away from the searched position
+            if ability and action_data["unit"].ability != AbilityType.TELEPORT:
+                abilities[action_data["unit"]] = ability
+
+        planned = {}
+        move_options = []  # Searched destinations, handed out jointly like the greedy moves
+        for action_data in plan:
+            unit = store.units[action_data["row"]]
+            unit_actions = {}
+            if unit in abilities:
+                unit_actions["ability"] = abilities[unit]
+            if "attack" in action_data["actions"]:
+                unit_actions["attack"] = {"target": store.units[action_data["actions"]["attack"]["row"]]}
+            if "move" in action_data["actions"]:
+                move = action_data["actions"]["move"]
+                # The searched tile was reached along a path when planned, possibly through a tile an
+                # earlier unit leaves, so it's kept even if the board doesn't show it reachable yet
+                tiles, scores = [(move["x"], move["y"])], [0]
+                if board is not None:
+                    # Other reachable tiles score lower the further they are from it
+                    for x, y in self.get_reachable_tiles(unit):
+                        if (x, y) != tiles[0]:
+                            tiles.append((x, y))
+                            scores.append(-abs(x - move["x"]) - abs(y - move["y"]))
+                move_options.append((unit, tiles, scores))
+            planned[unit] = unit_actions
+        
+        for unit, tile in self.assign_moves(move_options).items():
+            planned[unit]["move"] = {"x": tile[0], "y": tile[1]}
+        return [{"unit": unit, "actions": unit_actions} for unit, unit_actions in planned.items()]
+
+def create_ai(difficulty, player=1, rng=None, time_budget=None):
+    """AI controller for a difficulty: 1-3 play the one-ply AI, SEARCH_DIFFICULTY looks ahead.
+
+    time_budget: seconds per turn (default: unlimited for the one-ply AI, SEARCH_TIME_BUDGET for the search)
+    """
+    if difficulty >= SEARCH_DIFFICULTY:
+        return SearchAIController(difficulty, player=player, rng=rng, time_budget=time_budget or SEARCH_TIME_BUDGET)
+    return AIController(difficulty=difficulty, player=player, rng=rng, time_budget=time_budget)
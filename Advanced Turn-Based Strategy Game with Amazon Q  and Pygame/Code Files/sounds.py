@@ -1,38 +1,79 @@
+import os
 import pygame
 import numpy as np
 
+# Placeholder beeps: name -> (frequency in Hz, duration in ms)
+SOUND_SPECS = {
+    'move': (220, 100),      # Lower pitch, short
+    'attack': (440, 200),    # Medium pitch, medium
+    'defeat': (110, 500),    # Low pitch, long
+    'select': (660, 50),     # High pitch, very short
+    'turn': (330, 150),      # Medium-low pitch
+    'victory': (880, 400),   # High pitch, long
+    'ability': (550, 300),   # Medium-high pitch
+    'item': (660, 200)       # High pitch, medium
+}
+
+# Generated sample buffers are kept here between runs
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sound_cache")
+
 class SoundManager:
     def __init__(self):
         pygame.mixer.init()
-        self.sounds = {}
-        self.load_sounds()
-        
+        self.sample_rate, _, self.channels = pygame.mixer.get_init()
+        self.sounds = {}  # Filled lazily the first time each sound is played
+
     def load_sounds(self):
-        # Create simple placeholder sounds
-        self.sounds['move'] = self._create_beep(220, 100)      # Lower pitch, short
-        self.sounds['attack'] = self._create_beep(440, 200)    # Medium pitch, medium
-        self.sounds['defeat'] = self._create_beep(110, 500)    # Low pitch, long
-        self.sounds['select'] = self._create_beep(660, 50)     # High pitch, very short
-        self.sounds['turn'] = self._create_beep(330, 150)      # Medium-low pitch
-        self.sounds['victory'] = self._create_beep(880, 400)   # High pitch, long
-        self.sounds['ability'] = self._create_beep(550, 300)   # Medium-high pitch
-        self.sounds['item'] = self._create_beep(660, 200)      # High pitch, medium
-    
-    def _create_beep(self, frequency, duration):
-        # Create a simple beep sound using pygame's built-in functionality
-        sample_rate = 44100
-        buffer = np.zeros((int(sample_rate * duration / 1000), 2), dtype=np.int16)
-        max_sample = 2**(16 - 1) - 1
+        """Create every sound up front instead of on first use"""
+        for sound_name in SOUND_SPECS:
+            self.get_sound(sound_name)
+
+    def get_sound(self, sound_name):
+        """Return a sound, creating it on first use"""
+        if sound_name not in self.sounds and sound_name in SOUND_SPECS:
+            frequency, duration = SOUND_SPECS[sound_name]
+            self.sounds[sound_name] = self._create_beep(frequency, duration)
+        return self.sounds.get(sound_name)
 
-        for sample in range(len(buffer)):
-            t = float(sample) / sample_rate
-            value = int(max_sample * np.sin(2 * np.pi * frequency * t))
-            buffer[sample][0] = value  # Left channel
-            buffer[sample][1] = value  # Right channel
+    def _create_beep(self, frequency, duration):
+        # Create a simple beep sound, reusing the samples cached on disk if possible
+        buffer = self._load_cached_buffer(frequency, duration)
+        if buffer is None:
+            buffer = self._synthesize(frequency, duration)
+            self._save_cached_buffer(frequency, duration, buffer)
 
         sound = pygame.mixer.Sound(buffer=buffer)
         return sound
-    
+
+    def _synthesize(self, frequency, duration):
+        """Generate a sine wave for the whole buffer at once"""
+        max_sample = 2**(16 - 1) - 1
+        t = np.arange(int(self.sample_rate * duration / 1000)) / self.sample_rate
+        wave = (max_sample * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+        # Same samples on every channel
+        return np.ascontiguousarray(np.repeat(wave[:, np.newaxis], self.channels, axis=1))
+
+    def _cache_path(self, frequency, duration):
+        return os.path.join(CACHE_DIR, f"beep_{frequency}_{duration}_{self.sample_rate}_{self.channels}.npy")
+
+    def _load_cached_buffer(self, frequency, duration):
+        path = self._cache_path(frequency, duration)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None  # Corrupt cache entry, synthesize again
+
+    def _save_cached_buffer(self, frequency, duration, buffer):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            np.save(self._cache_path(frequency, duration), buffer)
+        except OSError:
+            pass  # Caching is optional, e.g. on a read-only install
+
     def play(self, sound_name):
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
+        sound = self.get_sound(sound_name)
+        if sound is not None:
+            sound.play()
@@ -0,0 +1,69 @@
+BUCKET_SIZE = 8  # Tiles per side of each bucket
+
+class SpatialIndex:
+    """Objects on the board grouped into square buckets of tiles.
+
+    Finding what lies in a rectangle of tiles only looks at the buckets that
+    overlap it, so drawing and hit-testing a window onto a large map does not
+    depend on how many objects are elsewhere on the board.
+    """
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets = {}  # (bucket x, bucket y) -> {id(obj): (x, y, obj)}
+
+    def _bucket(self, x, y):
+        return (x // self.bucket_size, y // self.bucket_size)
+
+    def clear(self):
+        self.buckets = {}
+
+    def rebuild(self, entries):
+        """Replace the contents with (x, y, obj) entries"""
+        self.clear()
+        for x, y, obj in entries:
+            self.insert(obj, x, y)
+
+    def insert(self, obj, x, y):
+        self.buckets.setdefault(self._bucket(x, y), {})[id(obj)] = (x, y, obj)
+
+    def remove(self, obj, x, y):
+        """Remove an object from the tile it was inserted at"""
+        bucket = self.buckets.get(self._bucket(x, y))
+        if bucket is not None:
+            bucket.pop(id(obj), None)
+            if not bucket:
+                del self.buckets[self._bucket(x, y)]
+
+    def move(self, obj, from_x, from_y, x, y):
+        self.remove(obj, from_x, from_y)
+        self.insert(obj, x, y)
+
+    def entries(self, left, top, right, bottom):
+        """(x, y, obj) for the objects on tiles with left <= x < right and top <= y < bottom"""
+        found = []
+        first_x, first_y = self._bucket(left, top)
+        last_x, last_y = self._bucket(right - 1, bottom - 1)
+        for bucket_y in range(first_y, last_y + 1):
+            for bucket_x in range(first_x, last_x + 1):
+                bucket = self.buckets.get((bucket_x, bucket_y))
+                if bucket is None:
+                    continue
+                for entry in bucket.values():
+                    if left <= entry[0] < right and top <= entry[1] < bottom:
+                        found.append(entry)
+        return found
+
+    def query(self, left, top, right, bottom):
+        """Objects on tiles with left <= x < right and top <= y < bottom"""
+        return [obj for _, _, obj in self.entries(left, top, right, bottom)]
+
+    def around(self, x, y, radius):
+        """Objects within a Manhattan distance of a tile"""
+        return [obj for obj_x, obj_y, obj in self.entries(x - radius, y - radius, x + radius + 1, y + radius + 1)
+                if abs(obj_x - x) + abs(obj_y - y) <= radius]
+
+    def at(self, x, y):
+        """An object on a tile, or None"""
+        found = self.query(x, y, x + 1, y + 1)
+        return found[0] if found else None
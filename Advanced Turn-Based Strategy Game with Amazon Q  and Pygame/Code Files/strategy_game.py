@@ -1,15 +1,23 @@
 import pygame
 import sys
-import random
 from enum import Enum
 
 # Import our modules
-from unit import Unit, UnitType
-from abilities import AbilityType, ItemType, Ability, Item
+from engine import GameEngine
+from abilities import AbilityType, Ability, Item
 from levels import LevelManager
-from save_load import save_game, load_game, check_save_exists
+from save_load import SAVE_FILE, load_game, check_save_exists
+from autosave import AutosaveWorker, latest_autosave
+from ai_controller import AI_TIME_BUDGET, LatencyStats
+from ai_worker import AITurnPlanner
+from action_log import MATCH_LOG_FILE
 from tutorial import Tutorial, TutorialPopup
 from sounds import SoundManager
+from fonts import get_font, prerender_labels
+from render_scheduler import RenderScheduler
+from camera import Camera, ZOOM_STEP, SCROLL_STEP
+from spatial_index import SpatialIndex
+from profiler import FrameProfiler, ProfilerHUD, AI_PHASES, TRACE_FILE
 
 # Initialize pygame
 pygame.init()
@@ -17,11 +25,22 @@ pygame.init()
 # Game constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-GRID_SIZE = 50
-GRID_WIDTH = 16
-GRID_HEIGHT = 12
+GRID_SIZE = 50  # Tile size in pixels; the number of tiles comes from the level
 GRID_COLOR = (50, 50, 50)
 BG_COLOR = (20, 20, 20)
+AI_ACTION_DELAY = 300  # Milliseconds between the AI's unit actions; 0 plays them all at once
+PROFILER_KEY = pygame.K_F3  # Shows or hides the profiler overlay (timing runs only while it is shown)
+TRACE_KEY = pygame.K_F4  # Writes the profiled sections as a Chrome trace
+
+# Camera controls
+SCROLL_KEYS = {
+    pygame.K_LEFT: (-SCROLL_STEP, 0), pygame.K_RIGHT: (SCROLL_STEP, 0),
+    pygame.K_UP: (0, -SCROLL_STEP), pygame.K_DOWN: (0, SCROLL_STEP)
+}
+ZOOM_KEYS = {
+    pygame.K_EQUALS: ZOOM_STEP, pygame.K_PLUS: ZOOM_STEP, pygame.K_KP_PLUS: ZOOM_STEP,
+    pygame.K_MINUS: 1 / ZOOM_STEP, pygame.K_KP_MINUS: 1 / ZOOM_STEP
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -59,14 +78,16 @@ class MainMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 64)
-        self.menu_font = pygame.font.SysFont(None, 36)
+        self.title_font = get_font(64)
+        self.menu_font = get_font(36)
         self.selected_option = 0
         self.options = ["Start Game", "Level Select", "Quit"]
         
         # Add "Load Game" option if save exists
         if check_save_exists():
             self.options.insert(2, "Load Game")
+        if latest_autosave():
+            self.options.insert(len(self.options) - 1, "Load Autosave")
     
     def draw(self):
         self.screen.fill(self.bg_color)
@@ -92,11 +113,12 @@ class MainMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -104,9 +126,10 @@ class MainMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Quit"
 
@@ -116,18 +139,18 @@ class LevelSelectMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.selected_level = 0
         
         # Get level data
         self.level_manager = LevelManager()
         self.levels = []
-        for i in range(1, self.level_manager.get_level_count() + 1):
-            level_data = self.level_manager.get_level_data(i)
+        for i in self.level_manager.numbers:
             self.levels.append({
-                "name": f"Level {i}: {level_data['name']}",
+                "number": i,
+                "name": f"Level {i}: {self.level_manager.get_level_name(i)}",
                 "difficulty": "Easy" if i == 1 else "Medium" if i == 2 else "Hard"
             })
     
@@ -162,17 +185,18 @@ class LevelSelectMenu:
             elif event.key == pygame.K_DOWN:
                 self.selected_level = (self.selected_level + 1) % len(self.levels)
             elif event.key == pygame.K_RETURN:
-                return self.selected_level + 1  # Return level number (1-based)
+                return self.levels[self.selected_level]["number"]
             elif event.key == pygame.K_ESCAPE:
                 return "Back"
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -180,9 +204,10 @@ class LevelSelectMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Back"
 
@@ -192,9 +217,9 @@ class LevelTransition:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.level_completed = level_completed
         self.next_level = next_level
         self.timer = 0
@@ -250,8 +275,8 @@ class InventoryMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         self.selected_item = 0 if unit.inventory else -1
     
     def draw(self):
@@ -313,11 +338,12 @@ class InventoryMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -325,9 +351,10 @@ class InventoryMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 
@@ -338,8 +365,8 @@ class AbilityMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         
         self.ability_data = Ability.get_ability_data(unit.ability)
     
@@ -395,11 +422,12 @@ class AbilityMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -407,9 +435,10 @@ class AbilityMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 # Sound effects
@@ -438,14 +467,16 @@ class MainMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 64)
-        self.menu_font = pygame.font.SysFont(None, 36)
+        self.title_font = get_font(64)
+        self.menu_font = get_font(36)
         self.selected_option = 0
         self.options = ["Start Game", "Level Select", "Quit"]
         
         # Add "Load Game" option if save exists
         if check_save_exists():
             self.options.insert(2, "Load Game")
+        if latest_autosave():
+            self.options.insert(len(self.options) - 1, "Load Autosave")
     
     def draw(self):
         self.screen.fill(self.bg_color)
@@ -471,11 +502,12 @@ class MainMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -483,9 +515,10 @@ class MainMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Quit"
 
@@ -495,18 +528,18 @@ class LevelSelectMenu:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.selected_level = 0
         
         # Get level data
         self.level_manager = LevelManager()
         self.levels = []
-        for i in range(1, self.level_manager.get_level_count() + 1):
-            level_data = self.level_manager.get_level_data(i)
+        for i in self.level_manager.numbers:
             self.levels.append({
-                "name": f"Level {i}: {level_data['name']}",
+                "number": i,
+                "name": f"Level {i}: {self.level_manager.get_level_name(i)}",
                 "difficulty": "Easy" if i == 1 else "Medium" if i == 2 else "Hard"
             })
     
@@ -541,17 +574,18 @@ class LevelSelectMenu:
             elif event.key == pygame.K_DOWN:
                 self.selected_level = (self.selected_level + 1) % len(self.levels)
             elif event.key == pygame.K_RETURN:
-                return self.selected_level + 1  # Return level number (1-based)
+                return self.levels[self.selected_level]["number"]
             elif event.key == pygame.K_ESCAPE:
                 return "Back"
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -559,9 +593,10 @@ class LevelSelectMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Back"
 
@@ -571,9 +606,9 @@ class LevelTransition:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.bg_color = (20, 20, 20)
-        self.title_font = pygame.font.SysFont(None, 48)
-        self.menu_font = pygame.font.SysFont(None, 36)
-        self.info_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(48)
+        self.menu_font = get_font(36)
+        self.info_font = get_font(24)
         self.level_completed = level_completed
         self.next_level = next_level
         self.timer = 0
@@ -628,8 +663,8 @@ class InventoryMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         self.selected_item = 0 if unit.inventory else -1
     
     def draw(self):
@@ -691,11 +726,12 @@ class InventoryMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -703,9 +739,10 @@ class InventoryMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 
@@ -716,8 +753,8 @@ class AbilityMenu:
         self.screen_height = screen_height
         self.bg_color = (0, 0, 0, 180)  # Semi-transparent background
         self.unit = unit
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.item_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.item_font = get_font(24)
         
         self.ability_data = Ability.get_ability_data(unit.ability)
     
@@ -773,11 +810,12 @@ class AbilityMenu:
         return None
     
     def run(self):
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return "Quit"
                 
@@ -785,30 +823,26 @@ class AbilityMenu:
                 if result:
                     return result
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return "Close"
 # Game class
 class Game:
-    def __init__(self, screen=None, sound_manager=None, level_number=1, load_saved_game=False):
+    def __init__(self, screen=None, sound_manager=None, level_number=1, load_saved_game=False,
+                 save_file=SAVE_FILE, autosave=None, profile=False):
         if screen is None:
             self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
             pygame.display.set_caption("Turn-Based Strategy Game")
         else:
             self.screen = screen
             
-        self.clock = pygame.time.Clock()
-        self.units = []
-        self.obstacles = []
+        self.render_scheduler = RenderScheduler()  # Redraws only after input or state changes
         self.selected_unit = None
-        self.current_player = 0  # 0 for player, 1 for AI
-        self.game_over = False
-        self.winner = None
-        self.font = pygame.font.SysFont(None, 36)
-        self.small_font = pygame.font.SysFont(None, 24)
-        self.turn_count = 1
+        self.font = get_font(36)
+        self.small_font = get_font(24)
         self.ability_target_mode = False
         self.teleport_target = None
         
@@ -818,101 +852,160 @@ class Game:
         else:
             self.sound_manager = sound_manager
         
-        # Level management
-        self.level_manager = LevelManager()
-        self.current_level = level_number
-        self.level_manager.current_level = level_number
+        # Saves are written on a background thread
+        if autosave is None:
+            self.autosave = AutosaveWorker()
+        else:
+            self.autosave = autosave
+        
+        # Planning time of every AI turn in this match
+        self.ai_latency = LatencyStats()
+        
+        # Frame and AI phase timing, off until the overlay is shown
+        self.profiler = FrameProfiler(enabled=profile)
+        self.profiler_hud = ProfilerHUD(self.profiler)
+        
+        # The AI plans on a background thread, then its actions are played one unit at a time
+        self.ai_planner = None
+        self.ai_planning_span = None  # Profiler span from the start of planning to picking up the plan
+        self.ai_actions = None
+        self.animate_ai = AI_ACTION_DELAY > 0
+        self.next_ai_action_at = 0
         
         # Tutorial system
         self.tutorial = Tutorial()
-        self.show_tutorial = self.current_level == 1  # Show tutorial on first level
+        self.show_tutorial = level_number == 1  # Show tutorial on first level
         self.current_tutorial = None
-            
-        # Load saved game or initialize new game
-        if load_saved_game:
-            saved_game = load_game()
-            if saved_game:
-                self.load_game_state(saved_game)
-            else:
-                self.initialize_level(level_number)
-        else:
-            self.initialize_level(level_number)
-    
-    def initialize_level(self, level_number):
-        """Initialize a new level with units and obstacles"""
-        self.units = []
-        self.obstacles = []
-        self.current_level = level_number
-        self.turn_count = 1
-        self.game_over = False
-        self.winner = None
         
-        # Get level data
-        level_data = self.level_manager.get_level_data(level_number)
+        # Units and obstacles bucketed by position, so drawing and clicks only look at what is on screen
+        self.unit_index = SpatialIndex()
+        self.obstacle_index = SpatialIndex()
+        
+        # Rules engine holding the board state; this class only draws it and handles input
+        saved_game = load_game(save_file) if load_saved_game else None
+        self.engine = GameEngine(level_number, load_state=saved_game, listener=self.handle_engine_event)
         
-        # Create player units
-        for unit_data in level_data["player_units"]:
-            unit_type = UnitType[unit_data["type"]]
-            self.units.append(Unit(unit_type, unit_data["x"], unit_data["y"], 0))
+        # AI opponent, kept for the whole level so its caches carry over between turns
+        self.ai = None
+        self.setup_ai()
         
-        # Create enemy units
-        for unit_data in level_data["enemy_units"]:
-            unit_type = UnitType[unit_data["type"]]
-            self.units.append(Unit(unit_type, unit_data["x"], unit_data["y"], 1))
+        # Scrollable, zoomable view of the board; right-drag or arrow keys scroll, the wheel zooms
+        self.camera = Camera(self.screen.get_rect(), GRID_SIZE, self.grid_width, self.grid_height)
+        self.dragging = False
         
-        # Set obstacles
-        self.obstacles = level_data["obstacles"]
+        # Pre-rendered grid and obstacles of the visible area, rebuilt only when the view or level changes
+        self.background = None
+        self.background_version = None
+        self.reset_view()
         
         # Start tutorial if needed
-        if level_data.get("tutorial", False) and self.show_tutorial:
+        if not saved_game:
+            self.start_level_tutorial()
+        
+        # Saves made before the AI finished its turn resume it
+        self.resume_ai_turn()
+    
+    # Board state lives in the engine
+    units = property(lambda self: self.engine.units)
+    obstacles = property(lambda self: self.engine.obstacles)
+    board = property(lambda self: self.engine.board)
+    grid_width = property(lambda self: self.engine.grid_width)
+    grid_height = property(lambda self: self.engine.grid_height)
+    current_player = property(lambda self: self.engine.current_player)
+    turn_count = property(lambda self: self.engine.turn_count)
+    game_over = property(lambda self: self.engine.game_over)
+    winner = property(lambda self: self.engine.winner)
+    current_level = property(lambda self: self.engine.current_level)
+    level_manager = property(lambda self: self.engine.level_manager)
+    
+    def handle_engine_event(self, event, data):
+        """Play sounds and report messages for things that happen in the engine"""
+        if event in ('move', 'attack', 'defeat', 'ability', 'item', 'victory'):
+            self.sound_manager.play(event)
+        elif event == 'loss':
+            self.sound_manager.play('defeat')
+        
+        if event == 'attack':
+            attacker = "AI attacked" if data["unit"].player == 1 else "Attacked"
+            print(f"{attacker} for {data['damage']} damage!")
+        elif event == 'item':
+            print(data["message"])
+        elif event == 'spawn':
+            unit = data["unit"]
+            print(f"Enemy {unit.unit_type.name} spawned at ({unit.x}, {unit.y})")
+        
+        # Keep the unit index in step with the board
+        if event == 'unit_moved':
+            unit = data["unit"]
+            self.unit_index.move(unit, data["from"][0], data["from"][1], unit.x, unit.y)
+        elif event == 'spawn':
+            self.unit_index.insert(data["unit"], data["unit"].x, data["unit"].y)
+        elif event == 'unit_died':
+            self.unit_index.remove(data["unit"], data["unit"].x, data["unit"].y)
+    
+    def initialize_level(self, level_number):
+        """Initialize a new level with units and obstacles"""
+        self.selected_unit = None
+        self.ability_target_mode = False
+        self.engine.initialize_level(level_number)
+        self.setup_ai()
+        self.reset_view()
+        self.start_level_tutorial()
+    
+    def start_level_tutorial(self):
+        """Start the tutorial if the current level has one"""
+        if self.level_manager.get_level(self.current_level).tutorial and self.show_tutorial:
             self.current_tutorial = self.tutorial.start()
     
     def load_game_state(self, saved_game):
         """Load game state from saved data"""
-        self.current_level = saved_game["current_level"]
-        self.current_player = saved_game["current_player"]
-        self.turn_count = saved_game["turn_count"]
-        self.obstacles = saved_game["obstacles"]
-        
-        # Load units
-        self.units = []
-        for unit_data in saved_game["units"]:
-            unit_type = UnitType[unit_data["unit_type"]]
-            unit = Unit(unit_type, unit_data["x"], unit_data["y"], unit_data["player"])
-            unit.hp = unit_data["hp"]
-            unit.max_hp = unit_data["max_hp"]
-            unit.attack = unit_data["attack"]
-            unit.defense = unit_data["defense"]
-            unit.move_range = unit_data["move_range"]
-            unit.attack_range = unit_data["attack_range"]
-            unit.ability = AbilityType[unit_data["ability"]]
-            unit.ability_cooldown = unit_data["ability_cooldown"]
-            unit.inventory = [ItemType[item] for item in unit_data["inventory"]]
-            unit.active_effects = unit_data["active_effects"]
-            self.units.append(unit)
+        self.selected_unit = None
+        self.ability_target_mode = False
+        self.engine.load_state(saved_game)
+        self.setup_ai()
+        self.reset_view()
+        self.resume_ai_turn()
     
     def save_game_state(self):
-        """Save current game state"""
-        game_state = {
-            "current_level": self.current_level,
-            "current_player": self.current_player,
-            "turn_count": self.turn_count,
-            "units": [unit.to_dict() for unit in self.units],
-            "obstacles": self.obstacles
-        }
-        
-        success = save_game(game_state)
-        return success
-    def draw_grid(self):
-        for x in range(0, SCREEN_WIDTH, GRID_SIZE):
-            pygame.draw.line(self.screen, GRID_COLOR, (x, 0), (x, SCREEN_HEIGHT))
-        for y in range(0, SCREEN_HEIGHT, GRID_SIZE):
-            pygame.draw.line(self.screen, GRID_COLOR, (0, y), (SCREEN_WIDTH, y))
+        """Save current game state (written in the background); not while the AI is playing its turn"""
+        if self.ai_busy:
+            print("Can't save while the AI is taking its turn")
+            return False
+        self.autosave.submit(self.engine.snapshot(), SAVE_FILE)
+        return True
+
+    def reset_view(self):
+        """Index the new board and point the camera at the player's units"""
+        self.unit_index.rebuild((unit.x, unit.y, unit) for unit in self.units)
+        self.obstacle_index.rebuild((obstacle["x"], obstacle["y"], obstacle) for obstacle in self.obstacles)
+        self.camera.set_grid(self.grid_width, self.grid_height)
+        player_units = self.engine.get_units(0)
+        if player_units:
+            self.camera.center_on(player_units[0].x, player_units[0].y)
+        self.build_background()
+    
+    def build_background(self):
+        """Render the static layer (background, grid and obstacles) of the visible area"""
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.background.fill(BG_COLOR)
+        self.draw_grid(self.background)
+        self.draw_obstacles(self.background)
+        self.background_version = self.camera.version
     
-    def draw_obstacles(self):
-        for obstacle in self.obstacles:
-            x, y = obstacle["x"], obstacle["y"]
-            rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+    def draw_grid(self, surface):
+        left, top, right, bottom = self.camera.visible_tiles()
+        first, last = self.camera.tile_rect(left, top), self.camera.tile_rect(right, bottom)
+        for x in range(left, right):
+            line_x = self.camera.tile_rect(x, top).x
+            pygame.draw.line(surface, GRID_COLOR, (line_x, first.y), (line_x, last.y))
+        for y in range(top, bottom):
+            line_y = self.camera.tile_rect(left, y).y
+            pygame.draw.line(surface, GRID_COLOR, (first.x, line_y), (last.x, line_y))
+    
+    def draw_obstacles(self, surface):
+        font = get_font(24)
+        for obstacle in self.obstacle_index.query(*self.camera.visible_tiles()):
+            rect = self.camera.tile_rect(obstacle["x"], obstacle["y"])
             
             # Different colors for different obstacle types
             if obstacle.get("type") == "tree":
@@ -922,10 +1015,11 @@ class Game:
             else:
                 color = (70, 70, 70)  # Default dark gray
                 
-            pygame.draw.rect(self.screen, color, rect)
+            pygame.draw.rect(surface, color, rect)
             
-            # Draw obstacle icon
-            font = pygame.font.SysFont(None, 24)
+            # Draw obstacle icon, when tiles are big enough for it
+            if rect.width < 20:
+                continue
             if obstacle.get("type") == "tree":
                 text = font.render("T", True, (0, 200, 0))
             elif obstacle.get("type") == "rock":
@@ -933,26 +1027,22 @@ class Game:
             else:
                 text = font.render("X", True, (200, 200, 200))
                 
-            self.screen.blit(text, (x * GRID_SIZE + GRID_SIZE // 2 - 5, y * GRID_SIZE + GRID_SIZE // 2 - 5))
+            surface.blit(text, (rect.x + rect.width // 2 - 5, rect.y + rect.height // 2 - 5))
     
     def draw_move_range(self):
         if self.selected_unit and not self.selected_unit.moved:
-            unit = self.selected_unit
-            for x in range(max(0, unit.x - unit.move_range), min(GRID_WIDTH, unit.x + unit.move_range + 1)):
-                for y in range(max(0, unit.y - unit.move_range), min(GRID_HEIGHT, unit.y + unit.move_range + 1)):
-                    if unit.can_move_to(x, y, self.units, self.obstacles):
-                        distance = abs(unit.x - x) + abs(unit.y - y)
-                        if distance <= unit.get_stat_with_effects("move_range"):
-                            rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                            # Use green for movement range
-                            pygame.draw.rect(self.screen, (0, 200, 0, 128), rect, 2)
+            # Reachable tiles are cached on the unit until the board changes
+            for x, y in self.selected_unit.get_reachable_tiles(self.board):
+                rect = self.camera.tile_rect(x, y)
+                # Use green for movement range
+                pygame.draw.rect(self.screen, (0, 200, 0, 128), rect, 2)
     
     def draw_attack_range(self):
         if self.selected_unit and not self.selected_unit.attacked:
             unit = self.selected_unit
-            for target in self.units:
+            for target in self.unit_index.around(unit.x, unit.y, unit.get_stat_with_effects("attack_range")):
                 if unit.can_attack(target):
-                    rect = pygame.Rect(target.x * GRID_SIZE, target.y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                    rect = self.camera.tile_rect(target.x, target.y)
                     # Use red for attack range
                     pygame.draw.rect(self.screen, (255, 0, 0, 128), rect, 3)
     
@@ -963,43 +1053,28 @@ class Game:
             
             if unit.ability == AbilityType.TELEPORT:
                 # Show all valid teleport locations
-                for x in range(max(0, unit.x - ability_data["range"]), min(GRID_WIDTH, unit.x + ability_data["range"] + 1)):
-                    for y in range(max(0, unit.y - ability_data["range"]), min(GRID_HEIGHT, unit.y + ability_data["range"] + 1)):
+                for x in range(max(0, unit.x - ability_data["range"]), min(self.grid_width, unit.x + ability_data["range"] + 1)):
+                    for y in range(max(0, unit.y - ability_data["range"]), min(self.grid_height, unit.y + ability_data["range"] + 1)):
                         # Check if position is valid (empty)
-                        valid = True
-                        for other_unit in self.units:
-                            if other_unit.x == x and other_unit.y == y:
-                                valid = False
-                                break
-                                
-                        for obstacle in self.obstacles:
-                            if obstacle["x"] == x and obstacle["y"] == y:
-                                valid = False
-                                break
-                        
-                        if valid:
+                        if self.board.is_free(x, y):
                             distance = abs(unit.x - x) + abs(unit.y - y)
                             if distance <= ability_data["range"]:
-                                rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                                rect = self.camera.tile_rect(x, y)
                                 pygame.draw.rect(self.screen, (128, 0, 128, 128), rect, 2)  # Purple for teleport
             
             elif unit.ability == AbilityType.HEAL:
                 # Show valid heal targets (self and adjacent allies)
-                for target in self.units:
+                for target in self.unit_index.around(unit.x, unit.y, ability_data["range"]):
                     if target.player == unit.player:  # Only allies
-                        distance = abs(unit.x - target.x) + abs(unit.y - target.y)
-                        if distance <= ability_data["range"]:
-                            rect = pygame.Rect(target.x * GRID_SIZE, target.y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                            pygame.draw.rect(self.screen, (0, 255, 0, 128), rect, 2)  # Green for heal
+                        rect = self.camera.tile_rect(target.x, target.y)
+                        pygame.draw.rect(self.screen, (0, 255, 0, 128), rect, 2)  # Green for heal
             
             elif unit.ability == AbilityType.AREA_ATTACK:
                 # Show area attack range
-                for target in self.units:
+                for target in self.unit_index.around(unit.x, unit.y, ability_data["range"]):
                     if target.player != unit.player:  # Only enemies
-                        distance = abs(unit.x - target.x) + abs(unit.y - target.y)
-                        if distance <= ability_data["range"]:
-                            rect = pygame.Rect(target.x * GRID_SIZE, target.y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                            pygame.draw.rect(self.screen, (255, 165, 0, 128), rect, 2)  # Orange for area attack
+                        rect = self.camera.tile_rect(target.x, target.y)
+                        pygame.draw.rect(self.screen, (255, 165, 0, 128), rect, 2)  # Orange for area attack
     def draw_ui(self):
         # Draw turn indicator with background
         turn_bg = pygame.Rect(0, 0, SCREEN_WIDTH, 40)
@@ -1014,6 +1089,12 @@ class Game:
         level_text = self.small_font.render(f"Level: {self.current_level}", True, WHITE)
         self.screen.blit(level_text, (SCREEN_WIDTH - 100, 10))
         
+        # Show that the AI is thinking, with dots that cycle while the window waits
+        if self.ai_planner is not None:
+            dots = "." * (pygame.time.get_ticks() // 300 % 4)
+            thinking_text = self.small_font.render(f"AI thinking{dots}", True, WHITE)
+            self.screen.blit(thinking_text, (10, SCREEN_HEIGHT - 70))
+        
         # Draw selected unit info
         if self.selected_unit:
             unit = self.selected_unit
@@ -1082,8 +1163,6 @@ class Game:
         if self.current_player != 0:  # Only handle clicks during player's turn
             return
         
-        x, y = pos[0] // GRID_SIZE, pos[1] // GRID_SIZE
-        
         # Check if end turn button was clicked
         end_turn_rect = pygame.Rect(SCREEN_WIDTH - 120, 10, 110, 30)
         if end_turn_rect.collidepoint(pos):
@@ -1111,80 +1190,23 @@ class Game:
                 self.open_inventory()
                 return
         
-        # Handle ability target selection
+        # Everything else is about the tile under the pointer
+        tile = self.camera.screen_to_tile(pos)
+        if tile is None:
+            return
+        x, y = tile
+        
+        # Handle ability target selection (teleport, heal and area attack need a target tile)
         if self.ability_target_mode and self.selected_unit:
-            ability_data = Ability.get_ability_data(self.selected_unit.ability)
-            
-            if self.selected_unit.ability == AbilityType.TELEPORT:
-                # Check if clicked position is valid for teleport
-                valid = True
-                for unit in self.units:
-                    if unit.x == x and unit.y == y:
-                        valid = False
-                        break
-                
-                for obstacle in self.obstacles:
-                    if obstacle["x"] == x and obstacle["y"] == y:
-                        valid = False
-                        break
-                
-                distance = abs(self.selected_unit.x - x) + abs(self.selected_unit.y - y)
-                if valid and distance <= ability_data["range"]:
-                    # Teleport to the selected position
-                    self.selected_unit.x = x
-                    self.selected_unit.y = y
-                    self.selected_unit.ability_used = True
-                    self.selected_unit.ability_cooldown = ability_data["cooldown"]
-                    self.sound_manager.play('ability')
-                    self.ability_target_mode = False
-                    return
+            self.engine.activate_ability(self.selected_unit, x, y)
             
-            elif self.selected_unit.ability == AbilityType.HEAL:
-                # Check if clicked on valid heal target
-                for unit in self.units:
-                    if unit.x == x and unit.y == y and unit.player == self.selected_unit.player:
-                        distance = abs(self.selected_unit.x - unit.x) + abs(self.selected_unit.y - unit.y)
-                        if distance <= ability_data["range"]:
-                            # Heal the target
-                            unit.hp = min(unit.max_hp, unit.hp + 30)
-                            self.selected_unit.ability_used = True
-                            self.selected_unit.ability_cooldown = ability_data["cooldown"]
-                            self.sound_manager.play('ability')
-                            self.ability_target_mode = False
-                            return
-            
-            elif self.selected_unit.ability == AbilityType.AREA_ATTACK:
-                # Check if clicked in range for area attack
-                for unit in self.units:
-                    if unit.x == x and unit.y == y and unit.player != self.selected_unit.player:
-                        distance = abs(self.selected_unit.x - unit.x) + abs(self.selected_unit.y - unit.y)
-                        if distance <= ability_data["range"]:
-                            # Perform area attack
-                            for target in self.units:
-                                if target.player != self.selected_unit.player:
-                                    target_distance = abs(unit.x - target.x) + abs(unit.y - target.y)
-                                    if target_distance <= 1:  # 1-tile radius
-                                        damage = max(1, self.selected_unit.attack // 2)
-                                        target.hp -= damage
-                            
-                            self.selected_unit.ability_used = True
-                            self.selected_unit.ability_cooldown = ability_data["cooldown"]
-                            self.sound_manager.play('ability')
-                            self.ability_target_mode = False
-                            
-                            # Remove dead units
-                            self.remove_dead_units()
-                            return
-            
-            # If we get here, cancel ability mode on invalid click
+            # Cancel ability mode whether or not the target was valid
             self.ability_target_mode = False
+            self.check_game_over()
             return
+        
         # Check if a unit was clicked
-        clicked_unit = None
-        for unit in self.units:
-            if unit.x == x and unit.y == y:
-                clicked_unit = unit
-                break
+        clicked_unit = self.unit_index.at(x, y)
         
         # If a unit is already selected
         if self.selected_unit:
@@ -1204,16 +1226,8 @@ class Game:
             
             # If clicked on enemy unit, try to attack
             elif clicked_unit and clicked_unit.player == 1:
-                if self.selected_unit.can_attack(clicked_unit):
-                    damage = self.selected_unit.attack_unit(clicked_unit)
-                    self.sound_manager.play('attack')
-                    print(f"Attacked for {damage} damage!")
-                    
-                    # Remove dead units
-                    if clicked_unit.hp <= 0:
-                        self.sound_manager.play('defeat')
-                        self.units.remove(clicked_unit)
-                        self.check_game_over()
+                if self.engine.attack_unit(self.selected_unit, clicked_unit) is not None:
+                    self.check_game_over()
                     
                     # Trigger tutorial if needed
                     if self.show_tutorial:
@@ -1222,12 +1236,7 @@ class Game:
                             self.show_tutorial_popup()
             
             # If clicked on empty cell, try to move
-            elif self.selected_unit.can_move_to(x, y, self.units, self.obstacles):
-                self.selected_unit.x = x
-                self.selected_unit.y = y
-                self.selected_unit.moved = True
-                self.sound_manager.play('move')
-                
+            elif self.engine.move_unit(self.selected_unit, x, y):
                 # Trigger tutorial if needed
                 if self.show_tutorial:
                     self.current_tutorial = self.tutorial.trigger_event("show_movement")
@@ -1255,39 +1264,9 @@ class Game:
         
         # Handle abilities that don't need targeting
         if self.ability_target_mode:
-            if self.selected_unit.ability == AbilityType.SHIELD:
-                # Apply shield effect immediately
-                self.selected_unit.active_effects.append({
-                    "type": "shield",
-                    "duration": 1,
-                    "icon": "S",
-                    "color": BLUE
-                })
-                self.selected_unit.ability_used = True
-                ability_data = Ability.get_ability_data(self.selected_unit.ability)
-                self.selected_unit.ability_cooldown = ability_data["cooldown"]
-                self.sound_manager.play('ability')
-                self.ability_target_mode = False
-                
-                # Trigger tutorial if needed
-                if self.show_tutorial:
-                    self.current_tutorial = self.tutorial.trigger_event("show_abilities")
-                    if self.current_tutorial:
-                        self.show_tutorial_popup()
-            
-            elif self.selected_unit.ability == AbilityType.DOUBLE_ATTACK:
-                # Apply double attack effect immediately
-                self.selected_unit.active_effects.append({
-                    "type": "double_attack",
-                    "duration": 1,
-                    "uses": 1,
-                    "icon": "D",
-                    "color": RED
-                })
-                self.selected_unit.ability_used = True
-                ability_data = Ability.get_ability_data(self.selected_unit.ability)
-                self.selected_unit.ability_cooldown = ability_data["cooldown"]
-                self.sound_manager.play('ability')
+            if self.selected_unit.ability in (AbilityType.SHIELD, AbilityType.DOUBLE_ATTACK):
+                # Apply the effect immediately
+                self.engine.activate_ability(self.selected_unit)
                 self.ability_target_mode = False
                 
                 # Trigger tutorial if needed
@@ -1306,11 +1285,8 @@ class Game:
         
         if result.startswith("Use:"):
             item_index = int(result.split(":")[1])
-            success, message = self.selected_unit.use_item(item_index)
+            success, message = self.engine.use_item(self.selected_unit, item_index)
             if success:
-                self.sound_manager.play('item')
-                print(message)
-                
                 # Trigger tutorial if needed
                 if self.show_tutorial:
                     self.current_tutorial = self.tutorial.trigger_event("show_inventory")
@@ -1326,24 +1302,13 @@ class Game:
     
     def end_turn(self):
         """End the current player's turn"""
-        # Reset unit states for the next player
-        for unit in self.units:
-            if unit.player == self.current_player:
-                unit.reset_turn()
-                unit.selected = False
-        
         self.selected_unit = None
         self.ability_target_mode = False
-        self.current_player = 1 - self.current_player  # Switch player
+        self.engine.end_turn()
         
-        # Increment turn count when player's turn starts
-        if self.current_player == 0:
-            self.turn_count += 1
-            
-            # Check for enemy spawning
-            level_data = self.level_manager.get_level_data(self.current_level)
-            if self.turn_count % level_data["spawn_interval"] == 0:
-                self.spawn_enemy(level_data["spawn_points"])
+        # Autosave at the start of each of the player's turns
+        if self.current_player == 0 and not self.game_over:
+            self.autosave.autosave(self.engine.snapshot())
         
         # Trigger tutorial if needed
         if self.show_tutorial and self.current_player == 0:
@@ -1355,177 +1320,106 @@ class Game:
         if self.current_player == 1:
             self.ai_turn()
     
-    def spawn_enemy(self, spawn_points):
-        """Spawn a new enemy unit at one of the spawn points"""
-        if not spawn_points:
-            return
-            
-        # Choose a random spawn point
-        spawn_point = random.choice(spawn_points)
-        x, y = spawn_point["x"], spawn_point["y"]
-        
-        # Check if spawn point is occupied
-        for unit in self.units:
-            if unit.x == x and unit.y == y:
-                return  # Spawn point is occupied
-        
-        # Choose a random unit type with weighted probabilities
-        unit_types = [UnitType.INFANTRY, UnitType.ARCHER, UnitType.CAVALRY, UnitType.MAGE]
-        weights = [0.4, 0.3, 0.2, 0.1]  # Infantry most common, mage least common
-        unit_type = random.choices(unit_types, weights=weights, k=1)[0]
-        
-        # Create and add the new unit
-        new_unit = Unit(unit_type, x, y, 1)  # player=1 for AI
-        self.units.append(new_unit)
-        print(f"Enemy {unit_type.name} spawned at ({x}, {y})")
-    
-    def remove_dead_units(self):
-        """Remove units with HP <= 0"""
-        self.units = [unit for unit in self.units if unit.hp > 0]
-        self.check_game_over()
+    def setup_ai(self):
+        """Create the AI controller for the current level; it follows the engine's board events"""
+        # Import the AI controller if not already imported
+        from search_ai import create_ai, SEARCH_DIFFICULTY
+        
+        if self.ai is not None:
+            self.engine.remove_listener(self.ai.handle_engine_event)
+        
+        # Create AI controller with difficulty based on current level; the hard level searches ahead
+        ai_difficulty = SEARCH_DIFFICULTY if self.current_level >= 3 else self.current_level
+        self.ai = create_ai(ai_difficulty, rng=self.engine.rng.stream("ai1"), time_budget=AI_TIME_BUDGET)
+        self.ai.latency = self.ai_latency
+        self.profiler.instrument(self.ai, AI_PHASES, "ai")
+        self.ai.watch(self.engine)
     
     def ai_turn(self):
-        """Handle AI turn logic with optimized AI controller"""
+        """Start planning the AI's turn on a background thread; update_ai() plays it once ready"""
         print("AI's turn")
         
-        # Import the AI controller if not already imported
-        from ai_controller import AIController
-        
-        # Create AI controller with difficulty based on current level
-        ai_difficulty = min(3, self.current_level)  # Cap difficulty at 3
-        ai = AIController(difficulty=ai_difficulty)
+        # Plan on a snapshot so the window keeps drawing while the AI thinks
+        self.ai_planner = AITurnPlanner(self.ai, self.engine.snapshot())
+        self.ai_planning_span = self.profiler.begin_span("ai_planning", "ai_turn")
+        self.render_scheduler.animating = True
+    
+    def resume_ai_turn(self):
+        """Start the AI's turn if the game was left on it"""
+        if self.current_player == 1 and not self.game_over and not self.ai_busy:
+            self.ai_turn()
+    
+    @property
+    def ai_busy(self):
+        """Whether the AI is still thinking or playing its actions"""
+        return self.ai_planner is not None or self.ai_actions is not None
+    
+    def update_ai(self):
+        """Pick up the AI's plan once it is ready and play its actions, one unit at a time when animating"""
+        if self.ai_planner is not None:
+            actions = self.ai_planner.poll()
+            if actions is None:
+                return
+            self.ai_planner = None
+            self.profiler.end_span(self.ai_planning_span)
+            self.ai_planning_span = None
+            self.ai_actions = AITurnPlanner.resolve(actions, self.engine)
+            self.next_ai_action_at = 0
         
-        # Get player and AI units
-        ai_units = [unit for unit in self.units if unit.player == 1]
-        player_units = [unit for unit in self.units if unit.player == 0]
+        if self.ai_actions is None:
+            return
         
-        # Get AI's planned actions for all units
-        actions = ai.process_turn(ai_units, player_units, self.units, self.obstacles, GRID_WIDTH, GRID_HEIGHT)
+        if self.animate_ai:
+            now = pygame.time.get_ticks()
+            if now < self.next_ai_action_at:
+                return
+            # Units with nothing to do don't get a pause of their own
+            while self.ai_actions and not self.ai_actions[0]["actions"]:
+                self.ai_actions.pop(0)
+            if self.ai_actions:
+                self.engine.apply_ai_actions([self.ai_actions.pop(0)])
+                self.next_ai_action_at = now + AI_ACTION_DELAY
+                self.render_scheduler.mark_dirty()
+                if not self.game_over:
+                    return
+        else:
+            self.engine.apply_ai_actions(self.ai_actions)
         
-        # Execute the actions for each unit
-        for action_data in actions:
-            unit = action_data["unit"]
-            unit_actions = action_data["actions"]
-            
-            # Process ability actions first
-            if "ability" in unit_actions and not unit.ability_used and unit.ability_cooldown == 0:
-                ability_action = unit_actions["ability"]
-                
-                if unit.ability == AbilityType.SHIELD:
-                    # Apply shield effect
-                    unit.active_effects.append({
-                        "type": "shield",
-                        "duration": 1,
-                        "icon": "S",
-                        "color": BLUE
-                    })
-                    unit.ability_used = True
-                    ability_data = Ability.get_ability_data(unit.ability)
-                    unit.ability_cooldown = ability_data["cooldown"]
-                    self.sound_manager.play('ability')
-                
-                elif unit.ability == AbilityType.DOUBLE_ATTACK:
-                    # Apply double attack effect
-                    unit.active_effects.append({
-                        "type": "double_attack",
-                        "duration": 1,
-                        "uses": 1,
-                        "icon": "D",
-                        "color": RED
-                    })
-                    unit.ability_used = True
-                    ability_data = Ability.get_ability_data(unit.ability)
-                    unit.ability_cooldown = ability_data["cooldown"]
-                    self.sound_manager.play('ability')
-                
-                elif unit.ability == AbilityType.AREA_ATTACK and ability_action["type"] == "target":
-                    target_x, target_y = ability_action["x"], ability_action["y"]
-                    
-                    # Perform area attack
-                    for target in player_units:
-                        distance = abs(target_x - target.x) + abs(target_y - target.y)
-                        if distance <= 1:  # 1-tile radius
-                            damage = max(1, unit.attack // 2)
-                            target.hp -= damage
-                    
-                    unit.ability_used = True
-                    ability_data = Ability.get_ability_data(unit.ability)
-                    unit.ability_cooldown = ability_data["cooldown"]
-                    self.sound_manager.play('ability')
-                    
-                    # Remove dead units
-                    self.remove_dead_units()
-                    if self.game_over:
-                        return
-                        
-                elif unit.ability == AbilityType.TELEPORT and ability_action["type"] == "position":
-                    # Teleport to target position
-                    unit.x, unit.y = ability_action["x"], ability_action["y"]
-                    unit.ability_used = True
-                    ability_data = Ability.get_ability_data(unit.ability)
-                    unit.ability_cooldown = ability_data["cooldown"]
-                    self.sound_manager.play('ability')
-            
-            # Process attack actions
-            if "attack" in unit_actions and not unit.attacked:
-                target = unit_actions["attack"]["target"]
-                if unit.can_attack(target):
-                    damage = unit.attack_unit(target)
-                    self.sound_manager.play('attack')
-                    print(f"AI attacked for {damage} damage!")
-                    
-                    # Remove dead units
-                    if target.hp <= 0:
-                        self.sound_manager.play('defeat')
-                        self.units.remove(target)
-                        player_units.remove(target)
-                        self.check_game_over()
-                        if self.game_over:
-                            return
-            
-            # Process movement actions
-            if "move" in unit_actions and not unit.moved:
-                move_x, move_y = unit_actions["move"]["x"], unit_actions["move"]["y"]
-                if unit.can_move_to(move_x, move_y, self.units, self.obstacles):
-                    unit.x, unit.y = move_x, move_y
-                    unit.moved = True
-                    self.sound_manager.play('move')
+        self.ai_actions = None
+        self.render_scheduler.animating = False
+        self.render_scheduler.mark_dirty()
+        self.finish_ai_turn()
+    
+    def finish_ai_turn(self):
+        """Hand the turn back to the player once the AI's actions have been played"""
+        if self.game_over:
+            self.check_game_over()
+            return
         
         # End AI turn
         self.sound_manager.play('turn')
         self.end_turn()
     
     def check_game_over(self):
-        """Check if the game is over"""
-        player_units = any(unit.player == 0 for unit in self.units)
-        ai_units = any(unit.player == 1 for unit in self.units)
+        """Move on to the next level once the player has won"""
+        if not self.game_over or self.winner != 0:
+            return
         
-        if not player_units:
-            self.game_over = True
-            self.winner = 1  # AI wins
-            self.sound_manager.play('defeat')
-        elif not ai_units:
-            self.game_over = True
-            self.winner = 0  # Player wins
-            self.sound_manager.play('victory')
+        # Check if there's a next level
+        if self.level_manager.next_level():
+            # Show level transition
+            transition = LevelTransition(
+                self.screen, 
+                SCREEN_WIDTH, 
+                SCREEN_HEIGHT, 
+                self.current_level, 
+                self.level_manager.current_level
+            )
+            result = transition.run()
             
-            # Check if there's a next level
-            if self.level_manager.next_level():
-                # Show level transition
-                transition = LevelTransition(
-                    self.screen, 
-                    SCREEN_WIDTH, 
-                    SCREEN_HEIGHT, 
-                    self.current_level, 
-                    self.level_manager.current_level
-                )
-                result = transition.run()
-                
-                if isinstance(result, int):
-                    # Start next level
-                    self.initialize_level(result)
-                    self.game_over = False
-                    self.winner = None
+            if isinstance(result, int):
+                # Start next level
+                self.initialize_level(result)
     
     def run(self):
         """Main game loop"""
@@ -1536,47 +1430,101 @@ class Game:
             self.show_tutorial_popup()
         
         while running:
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left click
-                        self.handle_click(event.pos)
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r and self.game_over:
-                        # Restart game
-                        self.__init__(self.screen, self.sound_manager, self.current_level)
-                    elif event.key == pygame.K_s:
-                        # Save game with S key
-                        self.save_game_state()
-                    elif event.key == pygame.K_a and self.selected_unit and not self.ability_target_mode:
-                        # Use ability with A key
-                        self.toggle_ability_mode()
-                    elif event.key == pygame.K_i and self.selected_unit:
-                        # Open inventory with I key
-                        self.open_inventory()
+            # Handle events, sleeping until input arrives while nothing changes
+            events = self.render_scheduler.get_events()
+            self.profiler.begin_frame()
+            with self.profiler.section("events", "events"):
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.MOUSEBUTTONDOWN:
+                        if event.button == 1:  # Left click
+                            self.handle_click(event.pos)
+                        elif event.button == 3:  # Right-drag scrolls the board
+                            self.dragging = True
+                    elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+                        self.dragging = False
+                    elif event.type == pygame.MOUSEMOTION and self.dragging:
+                        self.camera.scroll(-event.rel[0], -event.rel[1])
+                        self.render_scheduler.mark_dirty()
+                    elif event.type == pygame.MOUSEWHEEL:
+                        self.camera.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+                    elif event.type == pygame.KEYDOWN and event.key in SCROLL_KEYS:
+                        self.camera.scroll(*SCROLL_KEYS[event.key])
+                    elif event.type == pygame.KEYDOWN and event.key in ZOOM_KEYS:
+                        self.camera.zoom_at(ZOOM_KEYS[event.key], self.camera.view.center)
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_r and self.game_over:
+                            # Restart game, dropping any AI turn still being planned
+                            if self.ai_planner is not None:
+                                self.ai_planner.cancel()
+                            self.__init__(self.screen, self.sound_manager, self.current_level, autosave=self.autosave,
+                                          profile=self.profiler.enabled)
+                        elif event.key == pygame.K_s:
+                            # Save game with S key
+                            self.save_game_state()
+                        elif event.key == pygame.K_a and self.selected_unit and not self.ability_target_mode:
+                            # Use ability with A key
+                            self.toggle_ability_mode()
+                        elif event.key == pygame.K_i and self.selected_unit:
+                            # Open inventory with I key
+                            self.open_inventory()
+                        elif event.key == PROFILER_KEY:
+                            self.profiler.enabled = not self.profiler.enabled
+                        elif event.key == TRACE_KEY:
+                            count = self.profiler.export_trace(TRACE_FILE)
+                            print(f"Profiler trace with {count} sections saved to {TRACE_FILE}")
             
-            # Draw everything
-            self.screen.fill(BG_COLOR)
-            self.draw_grid()
-            self.draw_obstacles()
+            # Play the AI's turn once it has been planned
+            if self.ai_busy:
+                with self.profiler.section("update_ai", "ai_turn"):
+                    self.update_ai()
             
-            if self.ability_target_mode:
-                self.draw_ability_range()
-            else:
-                self.draw_move_range()
-                self.draw_attack_range()
+            if not self.render_scheduler.should_draw():
+                continue
+            
+            # Draw the static layer, then units, highlights and UI on top
+            with self.profiler.section("draw_background", "draw"):
+                if self.background_version != self.camera.version:
+                    self.build_background()
+                self.screen.blit(self.background, (0, 0))
             
-            for unit in self.units:
-                unit.draw(self.screen)
+            with self.profiler.section("draw_ranges", "draw"):
+                if self.ability_target_mode:
+                    self.draw_ability_range()
+                else:
+                    self.draw_move_range()
+                    self.draw_attack_range()
             
-            self.draw_ui()
+            # Only units on screen; one extra row and column for health bars drawn above a unit's tile
+            with self.profiler.section("draw_units", "units"):
+                for unit in self.unit_index.query(*self.camera.visible_tiles(margin=1)):
+                    unit.draw(self.screen, self.camera.tile_rect(unit.x, unit.y))
+            
+            with self.profiler.section("draw_ui", "draw"):
+                self.draw_ui()
+                if self.profiler.enabled:
+                    self.profiler_hud.draw(self.screen)
             
             # Update display
-            pygame.display.flip()
-            self.clock.tick(60)
-        
+            with self.profiler.section("flip", "draw"):
+                pygame.display.flip()
+            self.profiler.end_frame()
+            self.render_scheduler.frame_drawn()
+        
+        # Stop the AI if it is still thinking
+        if self.ai_planner is not None:
+            self.ai_planner.cancel()
+        
+        # Let saves still being written finish before quitting, and keep the
+        # match's action log so it can be replayed
+        self.autosave.flush()
+        self.engine.log.save(MATCH_LOG_FILE)
+        
+        latency = self.ai_latency.summary()
+        if latency["turns"]:
+            print(f"AI planning: {latency['turns']} turns, mean {latency['mean_ms']:.0f} ms, "
+                  f"max {latency['max_ms']:.0f} ms, budget reached on {latency['bound_rate']:.0%} of turns")
         return False  # Game ended
 
 # Main function
@@ -1584,6 +1532,7 @@ def main():
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Turn-Based Strategy Game")
+    prerender_labels()
     sound_manager = SoundManager()
     
     # Show main menu
@@ -1602,6 +1551,9 @@ def main():
     elif choice == "Load Game":
         game = Game(screen, sound_manager, load_saved_game=True)
         game.run()
+    elif choice == "Load Autosave":
+        game = Game(screen, sound_manager, load_saved_game=True, save_file=latest_autosave())
+        game.run()
     elif choice == "Quit":
         pygame.quit()
         sys.exit()
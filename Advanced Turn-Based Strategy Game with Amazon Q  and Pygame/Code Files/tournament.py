@@ -0,0 +1,184 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from ai_controller import AIStrategy, LatencyStats
+from engine import GameEngine
+from levels import LevelManager
+from search_ai import create_ai, SEARCH_DIFFICULTY
+
+def match_seed(base_seed, level_number, match_index):
+    """Deterministic seed for one match, independent of which worker plays it"""
+    return random.Random(f"{base_seed}-{level_number}-{match_index}").randrange(2**32)
+
+def create_controller(config, player, rng=None):
+    """Build an AIController from a tournament side configuration"""
+    ai = create_ai(config["difficulty"], player=player, rng=rng, time_budget=config.get("time_budget"))
+    if config.get("strategy"):
+        ai.strategy = AIStrategy[config["strategy"]]
+    ai.weights.update(config.get("weights", {}))
+    return ai
+
+def play_match(job):
+    """Play one seeded AI-vs-AI match and return its result row"""
+    level_number, match_index, seed, configs, max_turns, log_dir = job
+    engine = GameEngine(level_number, seed=seed)
+
+    # Alternate sides so neither configuration always moves first
+    a_side = match_index % 2
+    side_configs = {a_side: configs["a"], 1 - a_side: configs["b"]}
+    controllers = {player: create_controller(side_configs[player], player, engine.rng.stream(f"ai{player}"))
+                   for player in (0, 1)}
+    for controller in controllers.values():
+        controller.watch(engine)
+    # Decision latency covers planning and playing the turn, unlike the controllers' own planning times
+    latencies = {0: LatencyStats(), 1: LatencyStats()}
+    while not engine.game_over and engine.turn_count <= max_turns:
+        player = engine.current_player
+        start = time.perf_counter()
+        engine.run_ai_turn(controllers[player])
+        latencies[player].record(time.perf_counter() - start, controllers[player].budget_bound)
+        if not engine.game_over:
+            engine.end_turn()
+
+    if log_dir:
+        engine.log.save(os.path.join(log_dir, f"level{level_number}_match{match_index}.log"))
+
+    if engine.winner is None:
+        winner = "draw"
+    else:
+        winner = "a" if engine.winner == a_side else "b"
+
+    return {
+        "level": level_number,
+        "match": match_index,
+        "seed": seed,
+        "a_side": a_side,
+        "winner": winner,
+        "turns": engine.turn_count,
+        "latencies_a": latencies[a_side].latencies,
+        "latencies_b": latencies[1 - a_side].latencies,
+        "bound_a": latencies[a_side].bound,
+        "bound_b": latencies[1 - a_side].bound
+    }
+
+def side_latency(results, side):
+    """LatencyStats of one side's turns over a list of match results"""
+    stats = LatencyStats()
+    for r in results:
+        for elapsed, bound in zip(r[f"latencies_{side}"], r[f"bound_{side}"]):
+            stats.record(elapsed, bound)
+    return stats
+
+def summarize(results):
+    """Aggregate win rates, turn counts and latency for a list of match results"""
+    matches = len(results)
+    wins_a = sum(1 for r in results if r["winner"] == "a")
+    wins_b = sum(1 for r in results if r["winner"] == "b")
+    latency_a = side_latency(results, "a").summary()
+    latency_b = side_latency(results, "b").summary()
+    return {
+        "matches": matches,
+        "wins_a": wins_a,
+        "wins_b": wins_b,
+        "draws": matches - wins_a - wins_b,
+        "win_rate_a": wins_a / matches if matches else 0.0,
+        "win_rate_b": wins_b / matches if matches else 0.0,
+        "mean_turns": sum(r["turns"] for r in results) / matches if matches else 0.0,
+        "latency_a": latency_a,
+        "latency_b": latency_b,
+        "bound_rate_a": latency_a["bound_rate"],
+        "bound_rate_b": latency_b["bound_rate"]
+    }
+
+def run_tournament(configs, levels, matches_per_level, base_seed=0, max_turns=100, workers=None, log_dir=None):
+    """Play every match across a process pool and return the results sorted by level and match"""
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    jobs = [
+        (level_number, index, match_seed(base_seed, level_number, index), configs, max_turns, log_dir)
+        for level_number in levels
+        for index in range(matches_per_level)
+    ]
+
+    with Pool(processes=workers or os.cpu_count()) as pool:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count()) * 4))
+        results = list(pool.imap_unordered(play_match, jobs, chunksize=chunksize))
+
+    results.sort(key=lambda r: (r["level"], r["match"]))
+    return results
+
+def write_csv(results, filename):
+    """Write one row per match"""
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["level", "match", "seed", "a_side", "winner", "turns", "mean_latency_a_ms", "mean_latency_b_ms"])
+        for r in results:
+            writer.writerow([
+                r["level"], r["match"], r["seed"], r["a_side"], r["winner"], r["turns"],
+                round(side_latency([r], "a").summary()["mean_ms"], 3),
+                round(side_latency([r], "b").summary()["mean_ms"], 3)
+            ])
+
+def parse_side(args, side):
+    """Collect the configuration of one side from the command line"""
+    return {
+        "difficulty": getattr(args, f"difficulty_{side}"),
+        "strategy": getattr(args, f"strategy_{side}"),
+        "weights": json.loads(getattr(args, f"weights_{side}") or "{}"),
+        "time_budget": getattr(args, f"budget_{side}") / 1000 if getattr(args, f"budget_{side}") else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded AI-vs-AI matches in parallel to tune the AI")
+    parser.add_argument("--matches", type=int, default=100, help="matches per level")
+    parser.add_argument("--levels", type=int, nargs="+", help="levels to play (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for per-match seeds")
+    parser.add_argument("--max-turns", type=int, default=100, help="turn limit before a match is a draw")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--csv", help="write per-match results to this CSV file")
+    parser.add_argument("--json", help="write the summary and per-match results to this JSON file")
+    parser.add_argument("--logs", help="write each match's action log to this folder, for replay.py")
+    strategies = [strategy.name for strategy in AIStrategy]
+    for side in ("a", "b"):
+        parser.add_argument(f"--difficulty-{side}", type=int, default=3, choices=[1, 2, 3, SEARCH_DIFFICULTY])
+        parser.add_argument(f"--strategy-{side}", choices=strategies, help="fixed strategy (default: picked by difficulty)")
+        parser.add_argument(f"--weights-{side}", help='JSON weight overrides, e.g. \'{"attack_high_threat": 1.2}\'')
+        parser.add_argument(f"--budget-{side}", type=float, help="planning time budget per turn in ms (default: unlimited, 300 for difficulty 4)")
+    args = parser.parse_args()
+
+    levels = args.levels or list(range(1, LevelManager().get_level_count() + 1))
+    configs = {"a": parse_side(args, "a"), "b": parse_side(args, "b")}
+
+    start = time.perf_counter()
+    results = run_tournament(configs, levels, args.matches, args.seed, args.max_turns, args.workers, args.logs)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "configs": configs,
+        "seed": args.seed,
+        "elapsed_s": elapsed,
+        "overall": summarize(results),
+        "levels": {str(level): summarize([r for r in results if r["level"] == level]) for level in levels}
+    }
+
+    for name, summary in [("All", report["overall"])] + [(f"Level {level}", s) for level, s in report["levels"].items()]:
+        print(f"{name}: {summary['matches']} matches, A {summary['win_rate_a']:.1%}, B {summary['win_rate_b']:.1%}, "
+              f"draws {summary['draws']}, {summary['mean_turns']:.1f} turns, "
+              f"latency A {summary['latency_a']['mean_ms']:.2f} ms, B {summary['latency_b']['mean_ms']:.2f} ms, "
+              f"budget reached A {summary['bound_rate_a']:.1%}, B {summary['bound_rate_b']:.1%}")
+    print(f"Played {len(results)} matches in {elapsed:.1f}s")
+
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.json:
+        report["matches"] = results
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
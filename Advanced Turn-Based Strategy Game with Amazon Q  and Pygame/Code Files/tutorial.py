@@ -1,4 +1,6 @@
 import pygame
+from fonts import get_font
+from render_scheduler import RenderScheduler
 
 class Tutorial:
     def __init__(self):
@@ -67,8 +69,8 @@ class TutorialPopup:
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.tutorial_step = tutorial_step
-        self.title_font = pygame.font.SysFont(None, 36)
-        self.message_font = pygame.font.SysFont(None, 24)
+        self.title_font = get_font(36)
+        self.message_font = get_font(24)
     
     def draw(self):
         # Create semi-transparent overlay
@@ -123,19 +125,21 @@ class TutorialPopup:
     
     def run(self):
         """Run the tutorial popup and return True when dismissed"""
-        clock = pygame.time.Clock()
+        scheduler = RenderScheduler()
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # Wait for input instead of repainting an unchanged screen
+            for event in scheduler.get_events():
                 if event.type == pygame.QUIT:
                     return False
                 
                 if self.handle_event(event):
                     return True
             
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            if scheduler.should_draw():
+                self.draw()
+                pygame.display.flip()
+                scheduler.frame_drawn()
         
         return False
@@ -1,7 +1,12 @@
-import pygame
+try:
+    import pygame
+    from fonts import get_font
+except ImportError:  # The headless engine and simulations run without pygame
+    pygame = None
 from enum import Enum
 import random
-from abilities import ItemType, AbilityType, Item, Ability
+from abilities import ItemType, AbilityType, Item
+from effects import Effect, EffectSet, EffectType
 
 # Colors
 WHITE = (255, 255, 255)
@@ -13,6 +18,14 @@ PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 GRAY = (128, 128, 128)
 
+# Names used in item messages for each stat boost
+BOOST_NAMES = {
+    EffectType.ATTACK_BOOST: "Attack",
+    EffectType.DEFENSE_BOOST: "Defense",
+    EffectType.RANGE_BOOST: "Attack range",
+    EffectType.MOVE_BOOST: "Movement range"
+}
+
 # Unit types
 class UnitType(Enum):
     INFANTRY = 1
@@ -20,8 +33,26 @@ class UnitType(Enum):
     CAVALRY = 3
     MAGE = 4
 
+# Base stats of each unit type; colors are (player, AI)
+UNIT_STATS = {
+    UnitType.INFANTRY: {"max_hp": 100, "attack": 20, "defense": 10, "move_range": 3, "attack_range": 1,
+                        "colors": (RED, BLUE), "ability": AbilityType.SHIELD},
+    UnitType.ARCHER: {"max_hp": 70, "attack": 15, "defense": 5, "move_range": 2, "attack_range": 3,
+                      "colors": (GREEN, YELLOW), "ability": AbilityType.DOUBLE_ATTACK},
+    UnitType.CAVALRY: {"max_hp": 90, "attack": 25, "defense": 8, "move_range": 5, "attack_range": 1,
+                       "colors": (YELLOW, GREEN), "ability": AbilityType.TELEPORT},
+    UnitType.MAGE: {"max_hp": 60, "attack": 30, "defense": 3, "move_range": 2, "attack_range": 2,
+                    "colors": (PURPLE, WHITE), "ability": AbilityType.AREA_ATTACK}
+}
+
 class Unit:
+    # Fixed attribute layout: no per-instance __dict__, so large battles stay small in memory
+    __slots__ = ("uid", "unit_type", "x", "y", "player", "selected", "moved", "attacked", "ability_used",
+                 "grid_size", "inventory", "active_effects", "ability_cooldown", "reach_cache",
+                 "max_hp", "hp", "attack", "defense", "move_range", "attack_range", "color", "ability")
+    
     def __init__(self, unit_type, x, y, player, grid_size=50):
+        self.uid = None  # Match-wide id given by the engine, used by action logs
         self.unit_type = unit_type
         self.x = x
         self.y = y
@@ -32,46 +63,20 @@ class Unit:
         self.ability_used = False
         self.grid_size = grid_size
         self.inventory = []  # Max 2 items
-        self.active_effects = []  # List of active effects/buffs
+        self.active_effects = EffectSet()  # Active effects/buffs and the stat bonuses they add
         self.ability_cooldown = 0
+        self.reach_cache = None  # (board state key, reachable tiles) from the last flood fill
         
         # Set unit stats based on type
-        if unit_type == UnitType.INFANTRY:
-            self.max_hp = 100
-            self.hp = 100
-            self.attack = 20
-            self.defense = 10
-            self.move_range = 3
-            self.attack_range = 1
-            self.color = RED if player == 0 else BLUE
-            self.ability = AbilityType.SHIELD
-        elif unit_type == UnitType.ARCHER:
-            self.max_hp = 70
-            self.hp = 70
-            self.attack = 15
-            self.defense = 5
-            self.move_range = 2
-            self.attack_range = 3
-            self.color = GREEN if player == 0 else YELLOW
-            self.ability = AbilityType.DOUBLE_ATTACK
-        elif unit_type == UnitType.CAVALRY:
-            self.max_hp = 90
-            self.hp = 90
-            self.attack = 25
-            self.defense = 8
-            self.move_range = 5
-            self.attack_range = 1
-            self.color = YELLOW if player == 0 else GREEN
-            self.ability = AbilityType.TELEPORT
-        elif unit_type == UnitType.MAGE:
-            self.max_hp = 60
-            self.hp = 60
-            self.attack = 30
-            self.defense = 3
-            self.move_range = 2
-            self.attack_range = 2
-            self.color = PURPLE if player == 0 else WHITE
-            self.ability = AbilityType.AREA_ATTACK
+        stats = UNIT_STATS[unit_type]
+        self.max_hp = stats["max_hp"]
+        self.hp = stats["max_hp"]
+        self.attack = stats["attack"]
+        self.defense = stats["defense"]
+        self.move_range = stats["move_range"]
+        self.attack_range = stats["attack_range"]
+        self.color = stats["colors"][0] if player == 0 else stats["colors"][1]
+        self.ability = stats["ability"]
             
         # Give starting items to player units
         if player == 0:
@@ -87,9 +92,13 @@ class Unit:
             # All player units get a health potion
             self.add_item(ItemType.HEALTH_POTION)
     
-    def draw(self, screen):
+    def draw(self, screen, rect=None):
+        """Draw the unit on its tile; rect is the tile's screen rectangle when the view is scrolled or zoomed"""
+        if rect is None:
+            rect = pygame.Rect(self.x * self.grid_size, self.y * self.grid_size, self.grid_size, self.grid_size)
+        size = rect.width
+        
         # Draw unit on the grid
-        rect = pygame.Rect(self.x * self.grid_size, self.y * self.grid_size, self.grid_size, self.grid_size)
         pygame.draw.rect(screen, self.color, rect)
         
         # Draw border if selected
@@ -98,16 +107,20 @@ class Unit:
         
         # Draw health bar with background
         # Background (red)
-        health_bg_rect = pygame.Rect(self.x * self.grid_size, self.y * self.grid_size - 8, self.grid_size, 5)
+        health_bg_rect = pygame.Rect(rect.x, rect.y - 8, size, 5)
         pygame.draw.rect(screen, RED, health_bg_rect)
         
         # Foreground (green) - scales with health percentage
-        health_width = int((self.hp / self.max_hp) * self.grid_size)
-        health_rect = pygame.Rect(self.x * self.grid_size, self.y * self.grid_size - 8, health_width, 5)
+        health_width = int((self.hp / self.max_hp) * size)
+        health_rect = pygame.Rect(rect.x, rect.y - 8, health_width, 5)
         pygame.draw.rect(screen, GREEN, health_rect)
         
+        # Labels don't fit on tiles zoomed far out
+        if size < 20:
+            return
+        
         # Draw unit type indicator
-        font = pygame.font.SysFont(None, 20)
+        font = get_font(20)
         if self.unit_type == UnitType.INFANTRY:
             text = font.render("I", True, WHITE)
         elif self.unit_type == UnitType.ARCHER:
@@ -117,25 +130,26 @@ class Unit:
         elif self.unit_type == UnitType.MAGE:
             text = font.render("M", True, WHITE)
         
-        screen.blit(text, (self.x * self.grid_size + self.grid_size // 2 - 5, self.y * self.grid_size + self.grid_size // 2 - 5))
+        screen.blit(text, (rect.x + size // 2 - 5, rect.y + size // 2 - 5))
         
         # Draw active effects indicators
         if self.active_effects:
-            effect_font = pygame.font.SysFont(None, 16)
+            effect_font = get_font(16)
             for i, effect in enumerate(self.active_effects):
-                effect_text = effect_font.render(effect["icon"], True, effect["color"])
-                screen.blit(effect_text, (self.x * self.grid_size + 5 + (i * 10), self.y * self.grid_size + 5))
+                effect_text = effect_font.render(effect.icon, True, effect.color)
+                screen.blit(effect_text, (rect.x + 5 + (i * 10), rect.y + 5))
         
         # Draw ability cooldown if applicable
         if self.ability_cooldown > 0:
             cooldown_text = font.render(str(self.ability_cooldown), True, WHITE)
             pygame.draw.circle(screen, GRAY, 
-                              (self.x * self.grid_size + self.grid_size - 10, 
-                               self.y * self.grid_size + 10), 8)
-            screen.blit(cooldown_text, (self.x * self.grid_size + self.grid_size - 13, 
-                                       self.y * self.grid_size + 5))
+                              (rect.x + size - 10, 
+                               rect.y + 10), 8)
+            screen.blit(cooldown_text, (rect.x + size - 13, 
+                                       rect.y + 5))
     
-    def can_move_to(self, x, y, units, obstacles):
+    def can_move_to(self, x, y, units, obstacles, board=None, grid_width=None, grid_height=None):
+        """Check a move against the board, or against the unit and obstacle lists and the grid size"""
         # Check if the position is within move range
         distance = abs(self.x - x) + abs(self.y - y)
         
@@ -145,6 +159,10 @@ class Unit:
         if distance > actual_move_range or self.moved:
             return False
         
+        # Use the board's reachability flood fill when available
+        if board is not None:
+            return (x, y) in self.get_reachable_tiles(board)
+        
         # Check if the position is occupied by a unit
         for unit in units:
             if unit.x == x and unit.y == y:
@@ -156,7 +174,7 @@ class Unit:
                 return False
         
         # Check if the position is within grid bounds
-        if x < 0 or x >= 16 or y < 0 or y >= 12:  # Using default grid size
+        if x < 0 or y < 0 or x >= grid_width or y >= grid_height:
             return False
         
         return True
@@ -185,132 +203,22 @@ class Unit:
         damage = max(1, actual_attack - target.get_stat_with_effects("defense") // 2)
         
         # Apply damage reduction if target has shield effect
-        for effect in target.active_effects:
-            if effect["type"] == "shield":
-                damage = int(damage * 0.5)  # 50% damage reduction
-                break
+        if target.has_effect(EffectType.SHIELD):
+            damage = int(damage * 0.5)  # 50% damage reduction
         
         target.hp -= damage
         self.attacked = True
         
         # If double attack is active, don't mark as attacked yet
-        for effect in self.active_effects:
-            if effect["type"] == "double_attack" and effect["uses"] > 0:
-                self.attacked = False
-                effect["uses"] -= 1
-                if effect["uses"] <= 0:
-                    self.active_effects.remove(effect)
-                break
+        effect = self.active_effects.find(EffectType.DOUBLE_ATTACK)
+        if effect and effect.uses > 0:
+            self.attacked = False
+            effect.uses -= 1
+            if effect.uses <= 0:
+                self.active_effects.remove(effect)
         
         return damage
     
-    def use_ability(self, target_x=None, target_y=None, units=None):
-        """Use the unit's special ability"""
-        if self.ability_used or self.ability_cooldown > 0:
-            return False, "Ability on cooldown"
-        
-        ability_data = Ability.get_ability_data(self.ability)
-        result = False
-        message = ""
-        
-        if self.ability == AbilityType.HEAL:
-            # Heal self or adjacent ally
-            if target_x is not None and target_y is not None and units is not None:
-                # Find target unit
-                target_unit = None
-                for unit in units:
-                    if unit.x == target_x and unit.y == target_y:
-                        target_unit = unit
-                        break
-                
-                if target_unit and target_unit.player == self.player:
-                    # Check if target is in range
-                    distance = abs(self.x - target_x) + abs(self.y - target_y)
-                    if distance <= ability_data["range"]:
-                        target_unit.hp = min(target_unit.max_hp, target_unit.hp + 30)
-                        result = True
-                        message = f"Healed {target_unit.unit_type.name} for 30 HP"
-                    else:
-                        message = "Target out of range"
-                else:
-                    message = "Invalid target"
-            else:
-                # Heal self
-                self.hp = min(self.max_hp, self.hp + 30)
-                result = True
-                message = "Healed self for 30 HP"
-                
-        elif self.ability == AbilityType.DOUBLE_ATTACK:
-            # Allow attacking twice
-            self.active_effects.append({
-                "type": "double_attack",
-                "duration": 1,
-                "uses": 1,
-                "icon": "D",
-                "color": RED
-            })
-            result = True
-            message = "Double Attack activated"
-            
-        elif self.ability == AbilityType.SHIELD:
-            # Reduce damage taken
-            self.active_effects.append({
-                "type": "shield",
-                "duration": 1,
-                "icon": "S",
-                "color": BLUE
-            })
-            result = True
-            message = "Shield activated"
-            
-        elif self.ability == AbilityType.TELEPORT:
-            # Teleport to target location
-            if target_x is not None and target_y is not None and units is not None:
-                # Check if target location is valid
-                can_teleport = True
-                for unit in units:
-                    if unit.x == target_x and unit.y == target_y:
-                        can_teleport = False
-                        break
-                
-                # Check if target is in range
-                distance = abs(self.x - target_x) + abs(self.y - target_y)
-                if distance <= ability_data["range"] and can_teleport:
-                    self.x = target_x
-                    self.y = target_y
-                    result = True
-                    message = "Teleported successfully"
-                else:
-                    message = "Invalid teleport location"
-            else:
-                message = "No target specified"
-                
-        elif self.ability == AbilityType.AREA_ATTACK:
-            # Attack all enemies in a 1-tile radius
-            if units is not None:
-                targets_hit = 0
-                for unit in units:
-                    if unit.player != self.player:
-                        distance = abs(self.x - unit.x) + abs(self.y - unit.y)
-                        if distance <= ability_data["range"]:
-                            damage = max(1, self.attack // 2)  # Area attack does half damage
-                            unit.hp -= damage
-                            targets_hit += 1
-                
-                if targets_hit > 0:
-                    result = True
-                    message = f"Area attack hit {targets_hit} enemies"
-                else:
-                    message = "No targets in range"
-            else:
-                message = "No units specified"
-        
-        if result:
-            self.ability_used = True
-            self.ability_cooldown = ability_data["cooldown"]
-        
-        return result, message
-    
     def use_item(self, item_index):
         """Use an item from the unit's inventory"""
         if item_index < 0 or item_index >= len(self.inventory):
@@ -332,53 +240,12 @@ class Unit:
             result = True
             message = f"Healed for {effect['value']} HP"
             
-        elif effect["type"] == "attack_boost":
-            # Add attack boost effect
-            self.active_effects.append({
-                "type": "attack_boost",
-                "value": effect["value"],
-                "duration": effect["duration"],
-                "icon": "D",
-                "color": RED
-            })
-            result = True
-            message = f"Attack increased by {effect['value']} for {effect['duration']} turn(s)"
-            
-        elif effect["type"] == "defense_boost":
-            # Add defense boost effect
-            self.active_effects.append({
-                "type": "defense_boost",
-                "value": effect["value"],
-                "duration": effect["duration"],
-                "icon": "S",
-                "color": BLUE
-            })
+        elif effect["type"] in ("attack_boost", "defense_boost", "range_boost", "move_boost"):
+            # Add a stat boost effect
+            boost = Effect(EffectType(effect["type"]), effect["duration"], effect["value"])
+            self.active_effects.add(boost)
             result = True
-            message = f"Defense increased by {effect['value']} for {effect['duration']} turn(s)"
-            
-        elif effect["type"] == "range_boost":
-            # Add range boost effect
-            self.active_effects.append({
-                "type": "range_boost",
-                "value": effect["value"],
-                "duration": effect["duration"],
-                "icon": "R",
-                "color": YELLOW
-            })
-            result = True
-            message = f"Attack range increased by {effect['value']} for {effect['duration']} turn(s)"
-            
-        elif effect["type"] == "move_boost":
-            # Add movement boost effect
-            self.active_effects.append({
-                "type": "move_boost",
-                "value": effect["value"],
-                "duration": effect["duration"],
-                "icon": "M",
-                "color": ORANGE
-            })
-            result = True
-            message = f"Movement range increased by {effect['value']} for {effect['duration']} turn(s)"
+            message = f"{BOOST_NAMES[boost.effect_type]} increased by {effect['value']} for {effect['duration']} turn(s)"
         
         if result:
             # Remove the item from inventory
@@ -395,14 +262,21 @@ class Unit:
     
     def get_stat_with_effects(self, stat_name):
         """Get a stat value including any active effects"""
-        base_value = getattr(self, stat_name, 0)
-        bonus = 0
+        return getattr(self, stat_name, 0) + self.active_effects.bonuses.get(stat_name, 0)
+    
+    def has_effect(self, effect_type):
+        """Check if an effect of a type is active on the unit"""
+        return self.active_effects.find(effect_type) is not None
+    
+    def get_reachable_tiles(self, board):
+        """Get the tiles this unit can move to, cached until the board changes"""
+        move_range = self.get_stat_with_effects("move_range")
+        cache_key = (board, board.version, self.x, self.y, move_range)
         
-        for effect in self.active_effects:
-            if effect["type"] == f"{stat_name}_boost" and "value" in effect:
-                bonus += effect["value"]
+        if self.reach_cache is None or self.reach_cache[0] != cache_key:
+            self.reach_cache = (cache_key, board.reachable_tiles(self, move_range))
         
-        return base_value + bonus
+        return self.reach_cache[1]
     
     def update_effects(self):
         """Update active effects at the end of turn"""
@@ -411,11 +285,7 @@ class Unit:
             self.ability_cooldown -= 1
         
         # Update effect durations
-        for effect in list(self.active_effects):
-            if "duration" in effect:
-                effect["duration"] -= 1
-                if effect["duration"] <= 0:
-                    self.active_effects.remove(effect)
+        self.active_effects.tick()
     
     def reset_turn(self):
         """Reset unit state for a new turn"""
@@ -427,6 +297,7 @@ class Unit:
     def to_dict(self):
         """Convert unit to dictionary for saving"""
         return {
+            "uid": self.uid,
             "unit_type": self.unit_type.name,
             "x": self.x,
             "y": self.y,
@@ -440,31 +311,48 @@ class Unit:
             "ability": self.ability.name,
             "ability_cooldown": self.ability_cooldown,
             "inventory": [item.name for item in self.inventory],
-            "active_effects": self.active_effects
+            "active_effects": self.active_effects.to_list()
         }
     
+    @classmethod
+    def restore(cls, unit_type, x, y, player, hp, max_hp, attack, defense, move_range, attack_range,
+                ability, ability_cooldown, inventory, active_effects, uid=None):
+        """Build a unit straight from saved values, without setting up a fresh unit first"""
+        unit = cls.__new__(cls)
+        unit.uid = uid
+        unit.unit_type = unit_type
+        unit.x = x
+        unit.y = y
+        unit.player = player
+        unit.selected = False
+        unit.moved = False
+        unit.attacked = False
+        unit.ability_used = False
+        unit.grid_size = 50
+        unit.inventory = inventory
+        unit.active_effects = active_effects
+        unit.ability_cooldown = ability_cooldown
+        unit.reach_cache = None
+        unit.max_hp = max_hp
+        unit.hp = hp
+        unit.attack = attack
+        unit.defense = defense
+        unit.move_range = move_range
+        unit.attack_range = attack_range
+        colors = UNIT_STATS[unit_type]["colors"]
+        unit.color = colors[0] if player == 0 else colors[1]
+        unit.ability = ability
+        return unit
+    
     @classmethod
     def from_dict(cls, data):
         """Create a unit from dictionary data"""
-        unit_type = UnitType[data["unit_type"]]
-        unit = cls(unit_type, data["x"], data["y"], data["player"])
-        
-        # Restore stats
-        unit.hp = data["hp"]
-        unit.max_hp = data["max_hp"]
-        unit.attack = data["attack"]
-        unit.defense = data["defense"]
-        unit.move_range = data["move_range"]
-        unit.attack_range = data["attack_range"]
-        
-        # Restore ability and cooldown
-        unit.ability = AbilityType[data["ability"]]
-        unit.ability_cooldown = data["ability_cooldown"]
-        
-        # Restore inventory
-        unit.inventory = [ItemType[item] for item in data["inventory"]]
-        
-        # Restore active effects
-        unit.active_effects = data["active_effects"]
-        
-        return unit
+        return cls.restore(
+            UnitType[data["unit_type"]], data["x"], data["y"], data["player"],
+            data["hp"], data["max_hp"], data["attack"], data["defense"],
+            data["move_range"], data["attack_range"],
+            AbilityType[data["ability"]], data["ability_cooldown"],
+            [ItemType[item] for item in data["inventory"]],
+            EffectSet.from_list(data["active_effects"]),
+            data.get("uid")
+        )
@@ -0,0 +1,245 @@
+import numpy as np
+from unit import UnitType, UNIT_STATS
+from abilities import AbilityType
+from effects import EffectType
+
+# Integer columns; unit_type and ability hold the enum values
+INT_COLUMNS = ("uid", "x", "y", "player", "hp", "max_hp", "attack", "defense", "move_range",
+               "attack_range", "ability_cooldown", "unit_type", "ability")
+# Per-turn flags
+FLAG_COLUMNS = ("moved", "attacked", "ability_used", "shielded")
+
+class UnitStore:
+    """Units as NumPy columns, one row per unit, for scanning large battles.
+
+    Rows are created from Unit objects (and can be written back to them) or
+    straight from a unit type for simulations that never build Unit objects.
+    Columns are read as attributes, e.g. store.hp, which returns a writable
+    view of the live rows.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.next_uid = 0
+        self.units = []  # Unit object behind each row, or None for rows made by add()
+        self.columns = {name: np.zeros(capacity, dtype=np.int32) for name in INT_COLUMNS}
+        self.columns.update({name: np.zeros(capacity, dtype=bool) for name in FLAG_COLUMNS})
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns")
+        if columns is not None and name in columns:
+            return columns[name][:self.count]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_units(cls, units):
+        """Copy the stats of a list of Unit objects into a new store"""
+        store = cls(max(1, len(units)))
+        store.units = list(units)
+        store.count = len(units)
+        store.refresh()
+        store.next_uid = int(store.uid.max()) + 1 if units else 0
+        return store
+
+    def copy(self):
+        """Independent copy of the columns (the Unit objects behind the rows are shared)"""
+        store = UnitStore.__new__(UnitStore)
+        store.count = self.count
+        store.next_uid = self.next_uid
+        store.units = list(self.units)
+        store.columns = {name: column[:self.count].copy() for name, column in self.columns.items()}
+        return store
+
+    def refresh(self):
+        """Re-read every row from the Unit object it was built from"""
+        rows = [(index, unit) for index, unit in enumerate(self.units) if unit is not None]
+        if not rows:
+            return
+        indices = np.array([index for index, _ in rows])
+        for name in INT_COLUMNS:
+            if name in ("unit_type", "ability"):
+                values = [getattr(unit, name).value for _, unit in rows]
+            elif name == "uid":
+                values = [index if unit.uid is None else unit.uid for index, unit in rows]
+            else:
+                values = [getattr(unit, name) for _, unit in rows]
+            self.columns[name][indices] = values
+        for name in ("moved", "attacked", "ability_used"):
+            self.columns[name][indices] = [getattr(unit, name) for _, unit in rows]
+        self.columns["shielded"][indices] = [unit.has_effect(EffectType.SHIELD) for _, unit in rows]
+
+    def write_back(self):
+        """Copy positions, HP, cooldowns and turn flags back to the Unit objects"""
+        for index, unit in enumerate(self.units):
+            if unit is None:
+                continue
+            unit.x = int(self.columns["x"][index])
+            unit.y = int(self.columns["y"][index])
+            unit.hp = int(self.columns["hp"][index])
+            unit.ability_cooldown = int(self.columns["ability_cooldown"][index])
+            unit.moved = bool(self.columns["moved"][index])
+            unit.attacked = bool(self.columns["attacked"][index])
+            unit.ability_used = bool(self.columns["ability_used"][index])
+
+    def add(self, unit_type, x, y, player):
+        """Add a fresh unit of a type without creating a Unit object; returns its row"""
+        if self.count == len(self.columns["x"]):
+            self._grow(2 * self.count)
+
+        row = self.count
+        stats = UNIT_STATS[unit_type]
+        values = {
+            "uid": self.next_uid, "x": x, "y": y, "player": player,
+            "hp": stats["max_hp"], "max_hp": stats["max_hp"],
+            "attack": stats["attack"], "defense": stats["defense"],
+            "move_range": stats["move_range"], "attack_range": stats["attack_range"],
+            "ability_cooldown": 0, "unit_type": unit_type.value, "ability": stats["ability"].value
+        }
+        for name, value in values.items():
+            self.columns[name][row] = value
+        for name in FLAG_COLUMNS:
+            self.columns[name][row] = False
+
+        self.units.append(None)
+        self.count += 1
+        self.next_uid += 1
+        return row
+
+    def _grow(self, capacity):
+        capacity = max(1, capacity)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+
+    def remove_dead(self):
+        """Drop rows with HP <= 0, keeping the others in order; returns how many were removed"""
+        alive = self.columns["hp"][:self.count] > 0
+        removed = self.count - int(alive.sum())
+        if removed:
+            for name, column in self.columns.items():
+                kept = column[:self.count][alive]
+                column[:len(kept)] = kept
+            self.units = [unit for unit, keep in zip(self.units, alive) if keep]
+            self.count -= removed
+        return removed
+
+    def view(self, row):
+        """Unit-like access to one row"""
+        return UnitView(self, row)
+
+    def views(self):
+        return [UnitView(self, row) for row in range(self.count)]
+
+    def rows_of(self, player):
+        """Rows belonging to a player"""
+        return np.flatnonzero(self.player == player)
+
+    def distances_from(self, x, y):
+        """Manhattan distance from a tile to every unit"""
+        return np.abs(self.x - x) + np.abs(self.y - y)
+
+    def enemies_in_range(self, row):
+        """Rows of enemy units the unit in a row can attack from where it stands"""
+        in_range = self.distances_from(self.x[row], self.y[row]) <= self.attack_range[row]
+        return np.flatnonzero(in_range & (self.player != self.player[row]))
+
+    def occupancy(self, grid_width, grid_height):
+        """Grid holding the row of the unit on each tile, or -1"""
+        grid = np.full((grid_height, grid_width), -1, dtype=np.int32)
+        grid[self.y, self.x] = np.arange(self.count)
+        return grid
+
+    def damage(self, attacker, targets):
+        """Damage the unit in a row would deal to each target row (same rules as Unit.attack_unit)"""
+        damage = np.maximum(1, self.attack[attacker] - self.defense[targets] // 2)
+        return np.where(self.shielded[targets], damage // 2, damage)
+
+    def attack_unit(self, attacker, target):
+        """Attack one row from another; returns the damage dealt"""
+        damage = int(self.damage(attacker, target))
+        self.hp[target] -= damage
+        self.attacked[attacker] = True
+        return damage
+
+    def move_unit(self, row, x, y):
+        self.x[row] = x
+        self.y[row] = y
+        self.moved[row] = True
+
+    def end_turn(self, player):
+        """Reset a side's turn flags and count its cooldowns down"""
+        rows = self.player == player
+        for name in FLAG_COLUMNS:
+            self.columns[name][:self.count][rows] = False
+        cooldowns = self.ability_cooldown
+        cooldowns[rows] = np.maximum(0, cooldowns[rows] - 1)
+
+    def apply_ai_actions(self, actions, blocked):
+        """Apply actions from AIController.process_store_turn.
+
+        blocked: bool array of shape (grid_height, grid_width), True for obstacles
+        Moves onto a tile that has been taken since planning are skipped.
+        """
+        occupied = self.occupancy(blocked.shape[1], blocked.shape[0]) >= 0
+        for action_data in actions:
+            row = action_data["row"]
+            unit_actions = action_data["actions"]
+            if self.hp[row] <= 0:
+                continue  # Unit died earlier this turn
+
+            if "attack" in unit_actions and not self.attacked[row]:
+                target = unit_actions["attack"]["row"]
+                if self.hp[target] > 0:
+                    self.attack_unit(row, target)
+                    if self.hp[target] <= 0:
+                        occupied[self.y[target], self.x[target]] = False
+
+            if "move" in unit_actions and not self.moved[row]:
+                x, y = unit_actions["move"]["x"], unit_actions["move"]["y"]
+                if not occupied[y, x] and not blocked[y, x]:
+                    occupied[self.y[row], self.x[row]] = False
+                    occupied[y, x] = True
+                    self.move_unit(row, x, y)
+
+        self.remove_dead()
+
+class UnitView:
+    """One row of a UnitStore, readable like a Unit so AI scoring code works on it"""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getattr__(self, name):
+        if name == "unit_type":
+            return UnitType(int(self.store.columns["unit_type"][self.row]))
+        if name == "ability":
+            return AbilityType(int(self.store.columns["ability"][self.row]))
+        if name in FLAG_COLUMNS:
+            return bool(self.store.columns[name][self.row])
+        if name in INT_COLUMNS:
+            return int(self.store.columns[name][self.row])
+        raise AttributeError(name)
+
+    def __eq__(self, other):
+        return isinstance(other, UnitView) and other.store is self.store and other.row == self.row
+
+    def __hash__(self):
+        return hash((id(self.store), self.row))
+
+    def get_stat_with_effects(self, stat_name):
+        return getattr(self, stat_name)
+
+    def has_effect(self, effect_type):
+        return effect_type == EffectType.SHIELD and bool(self.store.columns["shielded"][self.row])
+
+    def can_attack(self, target):
+        """Check if a target is an enemy within attack range and this unit has not attacked yet"""
+        distance = abs(self.x - target.x) + abs(self.y - target.y)
+        return distance <= self.attack_range and not self.attacked and self.player != target.player